@@ -16,15 +16,51 @@ class Settings:
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     
     # Storage
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")  # local | s3
+    STORAGE_ROOT: str = "storage"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
     ALLOWED_EXTENSIONS: List[str] = [".pdf"]
     UPLOAD_DIR: str = "storage/uploads"
     OUTPUT_DIR: str = "storage/outputs"
     TEMP_DIR: str = "storage/temp"
+    UPLOAD_SESSION_DIR: str = "storage/sessions"
+    ANALYSIS_JOBS_DIR: str = "storage/jobs"
+    BLOB_DIR: str = "storage/blobs"
+    CONTENT_INDEX_DB: str = "storage/content_index.db"
+    FILE_REGISTRY_DB: str = "storage/registry.db"
+    ANALYSIS_CACHE_DB: str = "storage/analysis_cache.db"
+    PAGE_HASH_DB: str = "storage/page_hashes.db"
+    SEARCH_INDEX_DB: str = "storage/search_index.db"
+    ANALYSIS_CACHE_MAX_BYTES: int = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256MB
+    FILE_TTL_HOURS: int = int(os.getenv("FILE_TTL_HOURS", 24))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # 1MB
+    
+    # Cleanup (reaper em segundo plano)
+    REAPER_ENABLED: bool = os.getenv("REAPER_ENABLED", "True").lower() == "true"
+    REAPER_INTERVAL_SECONDS: int = int(os.getenv("REAPER_INTERVAL_SECONDS", 60))
+    REAPER_BATCH_SIZE: int = int(os.getenv("REAPER_BATCH_SIZE", 100))
+    REAPER_BATCH_PAUSE_SECONDS: float = float(os.getenv("REAPER_BATCH_PAUSE_SECONDS", 0.05))
+    STORAGE_QUOTA_BYTES: int = int(os.getenv("STORAGE_QUOTA_BYTES", 0))  # 0 = sem cota
+    REAPER_LOCK_FILE: str = "storage/reaper.lock"  # Apenas um worker executa o reaper
+    
+    # S3-compatible storage (STORAGE_BACKEND=s3)
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "pdfgo")
+    S3_ACCESS_KEY: str = os.getenv("S3_ACCESS_KEY", "")
+    S3_SECRET_KEY: str = os.getenv("S3_SECRET_KEY", "")
+    S3_REGION: str = os.getenv("S3_REGION", "")
+    S3_MULTIPART_CHUNK_SIZE: int = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024))  # 8MB
+    
+    # Cache de documentos abertos (somente leitura)
+    DOCUMENT_CACHE_MAX_ENTRIES: int = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", 32))
+    DOCUMENT_CACHE_MAX_BYTES: int = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512MB
     
     # Processing
     DEFAULT_DPI: int = 300
-    MAX_PAGES_FOR_ANALYSIS: int = 50
+    MAX_PAGES_FOR_ANALYSIS: int = int(os.getenv("MAX_PAGES_FOR_ANALYSIS", 50))
+    ANALYSIS_PROCESS_WORKERS: int = int(os.getenv("ANALYSIS_PROCESS_WORKERS", 0))  # 0 = um por núcleo
+    ANALYSIS_PARALLEL_MIN_PAGES: int = int(os.getenv("ANALYSIS_PARALLEL_MIN_PAGES", 200))
+    ANALYSIS_SHARD_PAGES: int = int(os.getenv("ANALYSIS_SHARD_PAGES", 50))
     OCR_ENABLED: bool = os.getenv("OCR_ENABLED", "True").lower() == "true"
     
     # Quality
@@ -46,6 +82,14 @@ class Settings:
     
     # External Services
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    
+    # Cache compartilhado (L1 em memória + L2 no Redis)
+    SHARED_CACHE_REDIS_ENABLED: bool = os.getenv("SHARED_CACHE_REDIS_ENABLED", "False").lower() == "true"
+    SHARED_CACHE_REDIS_TIMEOUT: float = float(os.getenv("SHARED_CACHE_REDIS_TIMEOUT", 0.2))
+    SHARED_CACHE_RETRY_SECONDS: int = int(os.getenv("SHARED_CACHE_RETRY_SECONDS", 30))
+    SHARED_CACHE_TTL_SECONDS: int = int(os.getenv("SHARED_CACHE_TTL_SECONDS", 3600))
+    SHARED_CACHE_L1_MAX_BYTES: int = int(os.getenv("SHARED_CACHE_L1_MAX_BYTES", 64 * 1024 * 1024))  # 64MB
+    SHARED_CACHE_MAX_ITEM_BYTES: int = int(os.getenv("SHARED_CACHE_MAX_ITEM_BYTES", 1024 * 1024))  # 1MB
     SENTRY_DSN: str = os.getenv("SENTRY_DSN", "")
     
     # Security
@@ -54,7 +98,7 @@ class Settings:
     
     def __init__(self):
         # Create required directories
-        for directory in [self.UPLOAD_DIR, self.OUTPUT_DIR, self.TEMP_DIR]:
+        for directory in [self.UPLOAD_DIR, self.OUTPUT_DIR, self.TEMP_DIR, self.BLOB_DIR, self.UPLOAD_SESSION_DIR, self.ANALYSIS_JOBS_DIR]:
             os.makedirs(directory, exist_ok=True)
 
 settings = Settings()
\ No newline at end of file
@@ -6,6 +6,10 @@ from datetime import datetime
 
 from app.config import settings
 from app.routes.api import api_router
+from app.services.core.storage_reaper import StorageReaper
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+from app.services.core.analysis_pool import AnalysisPool
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -36,6 +40,16 @@ app.add_middleware(
 # Include all routes
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def start_background_services():
+    # Limpeza contínua de arquivos vencidos e controle de cota de disco
+    StorageReaper.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await StorageReaper.stop()
+    AnalysisPool.shutdown()
+
 @app.get("/")
 async def root():
     return {
@@ -79,7 +93,10 @@ async def health_check():
             "merge": "active",
             "edit": "active",
             "page_editor": "active"
-        }
+        },
+        "storage_reaper": StorageReaper.get_status(),
+        "document_cache": DocumentCache.get_stats(),
+        "shared_cache": SharedCache.get_stats()
     }
 
 @app.get("/api/v1/info")
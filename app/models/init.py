@@ -4,7 +4,10 @@ Models and schemas for PDFGo API
 
 from app.models.schemas import (
     PDFUploadResponse,
+    UploadSessionRequest,
+    UploadSessionResponse,
     AnalysisResponse,
+    AnalysisStatusResponse,
     OperationResponse,
     SplitRequest,
     MergeRequest,
@@ -17,7 +20,10 @@ from app.models.schemas import (
 
 __all__ = [
     "PDFUploadResponse",
+    "UploadSessionRequest",
+    "UploadSessionResponse",
     "AnalysisResponse", 
+    "AnalysisStatusResponse",
     "OperationResponse",
     "SplitRequest",
     "MergeRequest",
@@ -54,7 +54,21 @@ class PDFUploadResponse(BaseModel):
     filename: str
     pages: int
     file_size: int
+    duplicate: bool = False
     analysis: Optional[Dict[str, Any]] = None
+    analysis_status: Optional[str] = None
+    analysis_status_url: Optional[str] = None
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    total_size: int
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    filename: str
+    offset: int
+    total_size: int
+    complete: bool
 
 class AnalysisResponse(BaseModel):
     file_id: str
@@ -62,6 +76,13 @@ class AnalysisResponse(BaseModel):
     quality_score: float
     recommendations: List[str]
 
+class AnalysisStatusResponse(BaseModel):
+    file_id: str
+    status: str
+    progress: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
 class QualityMetrics(BaseModel):
     resolution: int
     compression_ratio: float
@@ -87,6 +108,7 @@ class MergeRequest(BaseModel):
     file_ids: List[str]
     output_filename: Optional[str] = "merged_document"
     optimize: bool = True
+    drop_duplicates: bool = False
 
 class EditRequest(BaseModel):
     file_id: str
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from app.routes.core.upload import router as upload_router
 from app.routes.core.analyze import router as analyze_router
 from app.routes.core.preview import router as preview_router
+from app.routes.core.search import router as search_router
 from app.routes.operations.split import router as split_router
 from app.routes.operations.merge import router as merge_router
 from app.routes.operations.edit import router as edit_router
@@ -14,6 +15,7 @@ api_router = APIRouter()
 api_router.include_router(upload_router, prefix="/api/v1")
 api_router.include_router(analyze_router, prefix="/api/v1")
 api_router.include_router(preview_router, prefix="/api/v1")
+api_router.include_router(search_router, prefix="/api/v1")
 api_router.include_router(split_router, prefix="/api/v1")
 api_router.include_router(merge_router, prefix="/api/v1")
 api_router.include_router(edit_router, prefix="/api/v1")
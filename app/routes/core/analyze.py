@@ -1,21 +1,33 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from app.services.core.pdf_analyzer import PDFAnalyzer
 from app.services.core.quality_engine import QualityEngine
-from app.models.schemas import AnalysisResponse
+from app.services.core.page_features import PageFeatures
+from app.services.core.analysis_jobs import AnalysisJobs
+from app.services.core.resource_inventory import ResourceInventory
+from app.services.core.duplicate_pages import DuplicatePages
+from app.models.schemas import AnalysisResponse, AnalysisStatusResponse
 import os
-from app.config import settings
+import json
+import asyncio
+from app.utils.storage_layout import StorageLayout
+from app.utils.document_cache import DocumentCache
 
 router = APIRouter(prefix="/analyze", tags=["PDF Analysis"])
 
 @router.get("/{file_id}", response_model=AnalysisResponse)
-async def analyze_pdf(file_id: str):
-    """Realiza análise completa e detalhada do PDF"""
+async def analyze_pdf(
+    file_id: str,
+    full: bool = Query(False, description="Analisar todas as páginas mesmo acima de MAX_PAGES_FOR_ANALYSIS")
+):
+    """Realiza análise completa e detalhada do PDF (por amostragem em documentos grandes)"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
-        analysis = await PDFAnalyzer.comprehensive_analysis(file_path)
+        analysis = await PDFAnalyzer.comprehensive_analysis(file_path, full=full)
         
         return AnalysisResponse(
             file_id=file_id,
@@ -28,15 +40,65 @@ async def analyze_pdf(file_id: str):
     except Exception as e:
         raise HTTPException(500, f"Erro na análise do PDF: {str(e)}")
 
+@router.get("/{file_id}/stream")
+async def stream_pdf_analysis(
+    file_id: str,
+    format: str = Query("ndjson", regex="^(ndjson|sse)$"),
+    full: bool = Query(False, description="Analisar todas as páginas mesmo acima de MAX_PAGES_FOR_ANALYSIS")
+):
+    """Envia a análise página a página (NDJSON ou server-sent events) e um resumo final"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        records = PDFAnalyzer.iter_analysis(file_path, full)
+        if format == "sse":
+            body = (f"event: {record['type']}\ndata: {json.dumps(record, default=str)}\n\n" for record in records)
+            media_type = "text/event-stream"
+        else:
+            body = (json.dumps(record, default=str) + "\n" for record in records)
+            media_type = "application/x-ndjson"
+        
+        # Gerador síncrono: o Starlette o consome em thread, sem travar o event loop
+        return StreamingResponse(body, media_type=media_type, headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro na análise do PDF: {str(e)}")
+
+@router.get("/{file_id}/status", response_model=AnalysisStatusResponse)
+async def get_analysis_status(file_id: str):
+    """Retorna o progresso da análise agendada no upload ou o resultado final"""
+    try:
+        job = await asyncio.to_thread(AnalysisJobs.get_status, file_id)
+        if job is None:
+            raise HTTPException(404, "Nenhuma análise encontrada para este arquivo")
+        
+        return AnalysisStatusResponse(
+            file_id=file_id,
+            status=job["status"],
+            progress=job["progress"],
+            result=job.get("result"),
+            error=job.get("error")
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao consultar status da análise: {str(e)}")
+
 @router.get("/{file_id}/quality")
 async def get_pdf_quality(file_id: str):
     """Retorna métricas de qualidade do PDF"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
-        quality_metrics = QualityEngine.analyze_pdf_quality(file_path)
+        quality_metrics = await asyncio.to_thread(QualityEngine.analyze_pdf_quality, file_path)
         
         return {
             "file_id": file_id,
@@ -47,50 +109,145 @@ async def get_pdf_quality(file_id: str):
     except Exception as e:
         raise HTTPException(500, f"Erro ao analisar qualidade: {str(e)}")
 
-@router.get("/{file_id}/content")
-async def get_pdf_content(file_id: str):
-    """Analisa o conteúdo do PDF (texto, imagens, tabelas)"""
-    try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-        if not os.path.exists(file_path):
-            raise HTTPException(404, "Arquivo não encontrado")
-        
-        import fitz
-        doc = fitz.open(file_path)
-        
+def _content_analysis(file_path: str) -> dict:
+    """Texto, imagens e indício de tabelas por página"""
+    with DocumentCache.open(file_path) as doc:
         content_analysis = {
             "total_pages": len(doc),
             "pages": []
         }
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            images = page.get_images()
+        for features in PageFeatures.iter_document(doc):
+            text = features.text
             
             page_analysis = {
-                "page_number": page_num + 1,
-                "word_count": len(text.split()),
-                "image_count": len(images),
+                "page_number": features.page_number,
+                "word_count": features.word_count,
+                "image_count": features.image_count,
                 "has_tables": len(text.split('\n')) > 10 and '  ' in text,
                 "preview_text": text[:200] + "..." if len(text) > 200 else text
             }
             
             content_analysis["pages"].append(page_analysis)
+    return content_analysis
+
+@router.get("/{file_id}/content")
+async def get_pdf_content(file_id: str):
+    """Analisa o conteúdo do PDF (texto, imagens, tabelas)"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
         
-        doc.close()
-        return content_analysis
+        # Documento em cache lido fora do loop de eventos (o lock do documento é de thread)
+        return await asyncio.to_thread(_content_analysis, file_path)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(500, f"Erro ao analisar conteúdo: {str(e)}")
 
+def _detect_tables(file_id: str, file_path: str, pages: Optional[str], include_cells: bool) -> dict:
+    """Tabelas das páginas pedidas (todas se pages for None)"""
+    with DocumentCache.open(file_path) as doc:
+        total_pages = len(doc)
+        
+        # Processar parâmetro de páginas
+        page_list = list(range(1, total_pages + 1))
+        if pages:
+            if '-' in pages:
+                start, end = map(int, pages.split('-'))
+                page_list = list(range(start, end + 1))
+            else:
+                page_list = [int(p) for p in pages.split(',')]
+        
+        result = {"file_id": file_id, "total_pages": total_pages, "total_tables": 0, "pages": []}
+        for page_number in page_list:
+            if not 1 <= page_number <= total_pages:
+                continue
+            page = doc[page_number - 1]
+            tables = QualityEngine.detect_tables_in_page(page, include_cells=include_cells)
+            result["total_tables"] += len(tables)
+            result["pages"].append({"page_number": page_number, "tables": tables})
+    return result
+
+@router.get("/{file_id}/tables")
+async def get_pdf_tables(
+    file_id: str,
+    pages: Optional[str] = Query(None, description="Páginas para analisar (ex: 1,2,3 ou 1-5)"),
+    include_cells: bool = Query(True, description="Incluir a grade de células de cada tabela")
+):
+    """Detecta as tabelas de cada página com caixa delimitadora e grade de células"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        return await asyncio.to_thread(_detect_tables, file_id, file_path, pages, include_cells)
+        
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(400, "Parâmetro de páginas inválido")
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao detectar tabelas: {str(e)}")
+
+@router.get("/{file_id}/resources")
+async def get_pdf_resources(
+    file_id: str,
+    placements: bool = Query(True, description="Calcular o DPI efetivo de cada imagem (lê o conteúdo das páginas)")
+):
+    """Inventário de imagens e fontes do PDF sem decodificar os streams"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        inventory = await asyncio.to_thread(ResourceInventory.for_file, file_path, placements)
+        return {"file_id": file_id, **inventory}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao inventariar recursos: {str(e)}")
+
+@router.get("/{file_id}/duplicates")
+async def get_duplicate_pages(file_id: str):
+    """Grupos de páginas duplicadas ou quase duplicadas dentro do PDF"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        duplicates = await asyncio.to_thread(DuplicatePages.find_in_document, file_path)
+        return {"file_id": file_id, **duplicates}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao buscar páginas duplicadas: {str(e)}")
+
+@router.get("/{file_id}/duplicates/uploads")
+async def get_duplicate_pages_across_uploads(file_id: str):
+    """Páginas do PDF que aparecem (iguais ou quase iguais) em outros uploads"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        duplicates = await asyncio.to_thread(DuplicatePages.find_across_uploads, file_path)
+        return {"file_id": file_id, **duplicates}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao buscar páginas duplicadas: {str(e)}")
+
 @router.get("/{file_id}/ocr-check")
 async def check_ocr_need(file_id: str):
     """Verifica se o PDF precisa de OCR"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
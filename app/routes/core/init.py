@@ -5,5 +5,6 @@ Core routes for PDFGo API
 from app.routes.core.upload import router as upload_router
 from app.routes.core.analyze import router as analyze_router
 from app.routes.core.preview import router as preview_router
+from app.routes.core.search import router as search_router
 
-__all__ = ["upload_router", "analyze_router", "preview_router"]
\ No newline at end of file
+__all__ = ["upload_router", "analyze_router", "preview_router", "search_router"]
\ No newline at end of file
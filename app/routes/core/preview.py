@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import os
+import json
+import asyncio
 from typing import List, Optional
 from app.services.core.preview_service import PreviewService
+from app.services.core.text_extraction import TextExtractor
 from app.services.operations.page_editor_service import PageEditorService
 from app.models.schemas import PreviewResponse, PageThumbnailsResponse
-from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_registry import FileRegistry
+from app.utils.storage_backend import StorageBackend
+from app.utils.file_response import FileResponder
+from app.utils.zip_stream import ZipStreamer
+from app.utils.document_cache import DocumentCache
 
 router = APIRouter(prefix="/preview", tags=["PDF Preview"])
 
@@ -17,7 +25,7 @@ async def get_pdf_preview(
 ):
     """Gera pré-visualização em imagem das páginas do PDF"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
@@ -53,7 +61,7 @@ async def get_text_preview(
 ):
     """Extrai pré-visualização de texto do PDF"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
@@ -77,21 +85,76 @@ async def get_text_preview(
     except Exception as e:
         raise HTTPException(500, f"Erro ao extrair pré-visualização de texto: {str(e)}")
 
+@router.get("/{file_id}/text/pages")
+async def get_text_pages(
+    file_id: str,
+    mode: str = Query("plain", regex="^(plain|blocks|words|reading_order)$"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em next_cursor pela chamada anterior"),
+    page_size: int = Query(10, ge=1, le=100, description="Páginas por resposta")
+):
+    """Texto completo paginado por páginas (sem limite de caracteres)"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        result = await asyncio.to_thread(TextExtractor.extract_pages, file_path, mode, cursor, page_size)
+        return {"file_id": file_id, **result}
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao extrair texto: {str(e)}")
+
+@router.get("/{file_id}/text/stream")
+async def stream_text_pages(
+    file_id: str,
+    mode: str = Query("plain", regex="^(plain|blocks|words|reading_order)$"),
+    start_page: int = Query(1, ge=1, description="Página inicial (para retomar o consumo)")
+):
+    """Texto completo em NDJSON, uma linha por página, com memória constante"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        records = TextExtractor.iter_pages(file_path, mode, start_page)
+        body = (json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        
+        # Gerador síncrono: o Starlette o consome em thread, sem travar o event loop
+        return StreamingResponse(body, media_type="application/x-ndjson", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao extrair texto: {str(e)}")
+
 @router.post("/{file_id}/export-images")
 async def export_pages_as_images(
     file_id: str,
     pages: List[int],
     format: str = Query("png", regex="^(png|jpg|jpeg)$"),
-    dpi: int = Query(150, ge=72, le=300)
+    dpi: int = Query(150, ge=72, le=300),
+    bundle: bool = Query(False, description="Retornar as imagens em um único ZIP (streaming)")
 ):
     """Exporta páginas específicas como imagens"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
         page_images = await PreviewService.generate_page_images(file_path, pages, format, dpi)
         
+        if bundle:
+            return ZipStreamer.response(
+                [(f"page_{img['page_number']}.{format}", img["file_path"]) for img in page_images],
+                f"{file_id}_pages.zip"
+            )
+        
         # Se for apenas uma imagem, retorna diretamente
         if len(page_images) == 1:
             image_path = page_images[0]["file_path"]
@@ -115,24 +178,26 @@ async def export_pages_as_images(
     except Exception as e:
         raise HTTPException(500, f"Erro ao exportar páginas como imagens: {str(e)}")
 
+def _resolve_image(image_id: str):
+    """Registro e hash de conteúdo de uma imagem gerada (I/O do backend: rodar em thread)"""
+    # Busca indexada no registro de arquivos
+    record = FileRegistry.get(image_id, kind="image")
+    if not record or not StorageBackend.get_backend().ensure_local(record["path"]):
+        raise HTTPException(404, "Imagem não encontrada")
+    FileRegistry.touch(image_id)
+    return record, FileRegistry.get_content_hash(record)
+
 @router.get("/download/{image_id}")
-async def download_image(image_id: str):
-    """Download de imagem gerada da pré-visualização"""
+async def download_image(image_id: str, request: Request):
+    """Download de imagem gerada da pré-visualização (suporta ETag, 304 e Range)"""
     try:
-        # Procurar arquivo de imagem
-        import glob
-        image_files = glob.glob(f"{settings.TEMP_DIR}/{image_id}.*")
-        
-        if not image_files:
-            raise HTTPException(404, "Imagem não encontrada")
+        record, content_hash = await asyncio.to_thread(_resolve_image, image_id)
         
-        image_path = image_files[0]
+        image_path = record["path"]
         format = image_path.split('.')[-1]
         
-        return FileResponse(
-            path=image_path,
-            filename=f"preview_{image_id}.{format}",
-            media_type=f"image/{format}"
+        return FileResponder.respond(
+            request, image_path, content_hash, record["media_type"], f"preview_{image_id}.{format}"
         )
         
     except HTTPException:
@@ -144,7 +209,7 @@ async def download_image(image_id: str):
 async def get_pdf_thumbnail(file_id: str):
     """Gera thumbnail da primeira página do PDF"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
@@ -162,24 +227,11 @@ async def get_pdf_thumbnail(file_id: str):
     except Exception as e:
         raise HTTPException(500, f"Erro ao gerar thumbnail: {str(e)}")
 
-@router.get("/{file_id}/minimal-editor")
-async def get_minimal_editor_data(file_id: str):
-    """Obtém todos os dados necessários para o editor minimalista"""
-    try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-        if not os.path.exists(file_path):
-            raise HTTPException(404, "Arquivo não encontrado")
-        
-        import fitz
-        doc = fitz.open(file_path)
-        total_pages = len(doc)
-        
-        # Obter thumbnails pequenas
-        thumbnails = await PageEditorService.get_page_thumbnails(file_id)
-        
-        # Obter análise básica de cada página
-        page_analysis = []
-        for page_num in range(total_pages):
+def _editor_page_analysis(file_path: str) -> list:
+    """Presença de texto e contagem de imagens de cada página"""
+    page_analysis = []
+    with DocumentCache.open(file_path) as doc:
+        for page_num in range(len(doc)):
             page = doc[page_num]
             text = page.get_text()
             images = page.get_images()
@@ -190,8 +242,22 @@ async def get_minimal_editor_data(file_id: str):
                 "image_count": len(images),
                 "is_mostly_images": len(images) >= 3 and len(text.strip()) < 100
             })
+    return page_analysis
+
+@router.get("/{file_id}/minimal-editor")
+async def get_minimal_editor_data(file_id: str):
+    """Obtém todos os dados necessários para o editor minimalista"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        # Obter thumbnails pequenas
+        thumbnails = await PageEditorService.get_page_thumbnails(file_id)
         
-        doc.close()
+        # Obter análise básica de cada página (fora do loop de eventos)
+        page_analysis = await asyncio.to_thread(_editor_page_analysis, file_path)
+        total_pages = len(page_analysis)
         
         return {
             "file_id": file_id,
@@ -208,22 +274,14 @@ async def get_minimal_editor_data(file_id: str):
     except Exception as e:
         raise HTTPException(500, f"Erro ao obter dados do editor: {str(e)}")
 
-@router.get("/{file_id}/page-previews")
-async def get_individual_page_previews(file_id: str, pages: str):
-    """Obtém pré-visualizações individuais de páginas específicas"""
-    try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-        if not os.path.exists(file_path):
-            raise HTTPException(404, "Arquivo não encontrado")
-        
-        # Processar lista de páginas
-        page_list = [int(p) for p in pages.split(',')]
-        
-        import fitz
-        doc = fitz.open(file_path)
+def _render_page_previews(file_path: str, page_list: list) -> list:
+    """PNG em base64 e texto inicial das páginas pedidas"""
+    import fitz
+    import base64
+    previews = []
+    with DocumentCache.open(file_path) as doc:
         total_pages = len(doc)
         
-        previews = []
         for page_num in page_list:
             if 1 <= page_num <= total_pages:
                 page = doc[page_num - 1]
@@ -232,7 +290,6 @@ async def get_individual_page_previews(file_id: str, pages: str):
                 mat = fitz.Matrix(1.5, 1.5)
                 pix = page.get_pixmap(matrix=mat)
                 
-                import base64
                 img_base64 = base64.b64encode(pix.tobytes("png")).decode('utf-8')
                 
                 # Extrair texto de preview
@@ -246,8 +303,21 @@ async def get_individual_page_previews(file_id: str, pages: str):
                     "width": pix.width,
                     "height": pix.height
                 })
+    return previews
+
+@router.get("/{file_id}/page-previews")
+async def get_individual_page_previews(file_id: str, pages: str):
+    """Obtém pré-visualizações individuais de páginas específicas"""
+    try:
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+        
+        # Processar lista de páginas
+        page_list = [int(p) for p in pages.split(',')]
         
-        doc.close()
+        # Renderização fora do loop de eventos
+        previews = await asyncio.to_thread(_render_page_previews, file_path, page_list)
         
         return {
             "file_id": file_id,
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Query, Header
+from typing import Optional
+import os
+import asyncio
+from app.services.core.text_search import TextSearch
+from app.utils.file_registry import FileRegistry
+from app.utils.storage_layout import StorageLayout
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("")
+async def search_text(
+    q: str = Query(..., min_length=1, description="Termos a buscar (todos obrigatórios)"),
+    file_id: Optional[str] = Query(None, description="Buscar apenas neste documento"),
+    limit: int = Query(20, ge=1, le=100),
+    include_bbox: bool = Query(True, description="Localizar as caixas dos termos nas páginas encontradas"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-ID", description="Inquilino dono dos documentos")
+):
+    """Busca de texto por página em um documento ou em todos os documentos do inquilino"""
+    try:
+        if file_id:
+            record = await asyncio.to_thread(FileRegistry.get, file_id, "upload")
+            if not record or (tenant_id is not None and record["tenant_id"] != tenant_id):
+                raise HTTPException(404, "Arquivo não encontrado")
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+            if not os.path.exists(file_path):
+                raise HTTPException(404, "Arquivo não encontrado")
+            content_hash = await asyncio.to_thread(FileRegistry.get_content_hash, record)
+            documents = [{"file_id": file_id, "content_hash": content_hash}]
+        else:
+            tenant_files = await asyncio.to_thread(FileRegistry.list_by_tenant, tenant_id)
+            documents = [doc for doc in tenant_files if doc["content_hash"]]
+
+        return await asyncio.to_thread(
+            TextSearch.search, q, documents, StorageLayout.fetch_upload, limit, include_bbox
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Erro na busca de texto: {str(e)}")
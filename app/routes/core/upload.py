@@ -1,18 +1,88 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Query, Header
 import os
+import asyncio
 import aiofiles
 import uuid
+from typing import Optional
 from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.services.core.analysis_jobs import AnalysisJobs
+from app.services.core.duplicate_pages import DuplicatePages
+from app.services.core.text_search import TextSearch
 from app.utils.file_processor import FileProcessor
-from app.models.schemas import PDFUploadResponse, ErrorResponse
-from app.config import settings
+from app.utils.content_store import ContentStore
+from app.utils.file_registry import FileRegistry
+from app.utils.upload_sessions import UploadSessionManager
+from app.models.schemas import (
+    PDFUploadResponse, ErrorResponse, UploadSessionRequest, UploadSessionResponse
+)
+from app.utils.storage_layout import StorageLayout
+from app.utils.storage_backend import StorageBackend
+from app.utils.file_response import FileResponder
 
 router = APIRouter(prefix="/upload", tags=["File Upload"])
 
+async def _complete_upload(file_data: dict, wait_for_analysis: bool = False,
+                           tenant_id: Optional[str] = None) -> PDFUploadResponse:
+    """Monta a resposta de upload e agenda a análise em segundo plano"""
+    file_path = file_data["file_path"]
+    file_id = file_data["file_id"]
+    try:
+        await asyncio.to_thread(
+            FileRegistry.register, file_id, "upload", file_path, operation="upload",
+            content_hash=file_data.get("sha256"), tenant_id=tenant_id
+        )
+        
+        # Hashes das páginas para a busca de duplicatas e texto para a busca (uma vez por conteúdo)
+        DuplicatePages.schedule(file_path, file_data["sha256"])
+        TextSearch.schedule(file_path, file_data["sha256"])
+        
+        # Reutilizar a análise quando o mesmo conteúdo já foi analisado antes
+        analysis = PDFAnalyzer.get_cached_analysis(file_data["sha256"])
+        
+        if analysis is None and wait_for_analysis:
+            analysis = await PDFAnalyzer.comprehensive_analysis(file_path, file_data["sha256"])
+        
+        if analysis is not None:
+            return PDFUploadResponse(
+                message="PDF carregado com sucesso",
+                file_id=file_id,
+                filename=file_data["filename"],
+                pages=analysis["basic_info"]["pages"],
+                file_size=analysis["basic_info"]["file_size"],
+                duplicate=file_data["duplicate"],
+                analysis=analysis,
+                analysis_status="completed"
+            )
+        
+        # Responder assim que os bytes estão salvos e o número de páginas é conhecido
+        file_info = await asyncio.to_thread(FileProcessor.get_file_info, file_path)
+        await AnalysisJobs.schedule(file_id, file_path, file_data["sha256"], file_info["pages"])
+        
+        return PDFUploadResponse(
+            message="PDF carregado com sucesso - análise em andamento",
+            file_id=file_id,
+            filename=file_data["filename"],
+            pages=file_info["pages"],
+            file_size=file_data["file_size"],
+            duplicate=file_data["duplicate"],
+            analysis_status="pending",
+            analysis_status_url=f"/api/v1/analyze/{file_id}/status"
+        )
+    except Exception:
+        # Limpar arquivo em caso de erro
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            await asyncio.to_thread(ContentStore.release, file_id)
+        await asyncio.to_thread(FileRegistry.forget, [file_id])
+        raise
+
 @router.post("/pdf", response_model=PDFUploadResponse)
-async def upload_pdf(file: UploadFile = File(...)):
-    """Faz upload de um arquivo PDF e realiza análise inicial"""
+async def upload_pdf(
+    file: UploadFile = File(...),
+    wait_for_analysis: bool = Query(False, description="Aguardar a análise completa antes de responder"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-ID", description="Inquilino dono do upload")
+):
+    """Faz upload de um arquivo PDF e agenda a análise inicial"""
     try:
         # Verificar se é PDF
         if not file.filename.lower().endswith('.pdf'):
@@ -20,76 +90,140 @@ async def upload_pdf(file: UploadFile = File(...)):
         
         # Salvar arquivo
         file_data = await FileProcessor.save_uploaded_file(file)
-        file_path = file_data["file_path"]
-        
-        # Realizar análise inicial
-        analysis = await PDFAnalyzer.comprehensive_analysis(file_path)
         
-        return PDFUploadResponse(
-            message="PDF carregado com sucesso",
-            file_id=file_data["file_id"],
-            filename=file.filename,
-            pages=analysis["basic_info"]["pages"],
-            file_size=analysis["basic_info"]["file_size"],
-            analysis=analysis
-        )
+        return await _complete_upload(file_data, wait_for_analysis, tenant_id)
         
     except HTTPException:
         raise
     except Exception as e:
-        # Limpar arquivo em caso de erro
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(500, f"Erro ao processar arquivo: {str(e)}")
 
+@router.post("/sessions", response_model=UploadSessionResponse)
+async def create_upload_session(request: UploadSessionRequest):
+    """Cria uma sessão de upload retomável"""
+    try:
+        return UploadSessionManager.create_session(request.filename, request.total_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao criar sessão de upload: {str(e)}")
+
+@router.put("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def upload_session_chunk(
+    session_id: str,
+    request: Request,
+    offset: Optional[int] = Query(None, ge=0, description="Offset do bloco (alternativa ao Content-Range)")
+):
+    """Envia um intervalo de bytes para a sessão (Content-Range: bytes início-fim/total)"""
+    try:
+        start = offset
+        content_range = request.headers.get("content-range")
+        if content_range:
+            try:
+                start = int(content_range.split()[1].split("-")[0])
+            except (IndexError, ValueError):
+                raise HTTPException(400, "Cabeçalho Content-Range inválido")
+        
+        if start is None:
+            raise HTTPException(400, "Informe o offset via Content-Range ou parâmetro 'offset'")
+        
+        return await UploadSessionManager.append_chunk(session_id, start, request.stream())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao receber bloco: {str(e)}")
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(session_id: str):
+    """Consulta o offset atual da sessão para retomar o envio"""
+    try:
+        return UploadSessionManager.get_status(session_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao consultar sessão de upload: {str(e)}")
+
+@router.post("/sessions/{session_id}/complete", response_model=PDFUploadResponse)
+async def complete_upload_session(
+    session_id: str,
+    wait_for_analysis: bool = Query(False, description="Aguardar a análise completa antes de responder"),
+    tenant_id: Optional[str] = Header(None, alias="X-Tenant-ID", description="Inquilino dono do upload")
+):
+    """Finaliza a sessão e segue o fluxo normal de file_id"""
+    try:
+        file_data = await UploadSessionManager.finalize(session_id)
+        return await _complete_upload(file_data, wait_for_analysis, tenant_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao finalizar upload: {str(e)}")
+
+@router.delete("/sessions/{session_id}")
+async def cancel_upload_session(session_id: str):
+    """Cancela a sessão e descarta os bytes recebidos"""
+    try:
+        UploadSessionManager.discard(session_id)
+        return {"message": "Sessão de upload cancelada"}
+    except Exception as e:
+        raise HTTPException(500, f"Erro ao cancelar sessão de upload: {str(e)}")
+
+def _resolve_download(file_id: str):
+    """Caminho local e hash de conteúdo de uma saída ou upload (I/O do backend: rodar em thread)"""
+    # Busca indexada no registro (saídas e uploads)
+    record = FileRegistry.get(file_id)
+    if record and record["kind"] == "output" and StorageBackend.get_backend().ensure_local(record["path"]):
+        file_path = record["path"]
+        FileRegistry.touch(file_id)
+    else:
+        # Uploads (restaurados a partir do blob se necessário)
+        file_path = StorageLayout.fetch_upload(file_id)
+        if not os.path.exists(file_path):
+            raise HTTPException(404, "Arquivo não encontrado")
+    
+    if record:
+        content_hash = FileRegistry.get_content_hash(record)
+    else:
+        content_hash = ContentStore.get_hash(file_id) or FileRegistry.hash_file(file_path)
+    return file_path, content_hash
+
 @router.get("/download/{file_id}")
-async def download_file(file_id: str):
-    """Download de um arquivo processado"""
+async def download_file(file_id: str, request: Request):
+    """Download de um arquivo processado (suporta ETag, 304 e Range)"""
     try:
-        # Procurar arquivo nos outputs
-        import glob
-        output_files = glob.glob(f"{settings.OUTPUT_DIR}/*{file_id}*.pdf")
-        
-        if not output_files:
-            # Tentar encontrar no uploads
-            upload_file = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-            if os.path.exists(upload_file):
-                output_files = [upload_file]
-            else:
-                raise HTTPException(404, "Arquivo não encontrado")
-        
-        file_path = output_files[0]
+        file_path, content_hash = await asyncio.to_thread(_resolve_download, file_id)
+        
         filename = os.path.basename(file_path)
         
-        return FileResponse(
-            path=file_path,
-            filename=filename,
-            media_type='application/pdf'
-        )
+        return FileResponder.respond(request, file_path, content_hash, 'application/pdf', filename)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(500, f"Erro ao baixar arquivo: {str(e)}")
 
+def _delete_with_derived(file_id: str) -> list:
+    """Remove o arquivo, seus derivados e os blobs sem referência (I/O do backend: rodar em thread)"""
+    deleted_files = []
+    
+    # Remover arquivo e derivados registrados
+    for record in FileRegistry.delete(file_id, cascade=True):
+        deleted_files.append(record["kind"])
+        if record["kind"] == "upload":
+            ContentStore.release(record["file_id"], record["content_hash"])
+    
+    # Uploads anteriores ao registro
+    upload_path = StorageLayout.upload_path(file_id)
+    if os.path.exists(upload_path):
+        os.remove(upload_path)
+        deleted_files.append("upload")
+    ContentStore.release(file_id)
+    return deleted_files
+
 @router.delete("/{file_id}")
 async def delete_file(file_id: str):
-    """Remove arquivos temporários"""
+    """Remove o arquivo e, em cascata, todas as saídas derivadas dele"""
     try:
-        deleted_files = []
-        
-        # Remover do uploads
-        upload_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-        if os.path.exists(upload_path):
-            os.remove(upload_path)
-            deleted_files.append("upload")
-        
-        # Remover dos outputs
-        import glob
-        output_files = glob.glob(f"{settings.OUTPUT_DIR}/*{file_id}*.pdf")
-        for output_file in output_files:
-            os.remove(output_file)
-            deleted_files.append("output")
+        deleted_files = await asyncio.to_thread(_delete_with_derived, file_id)
         
         return {
             "message": "Arquivos removidos com sucesso",
@@ -103,7 +237,7 @@ async def delete_file(file_id: str):
 async def cleanup_files():
     """Limpa arquivos temporários antigos"""
     try:
-        await FileProcessor.cleanup_old_files(max_age_hours=1)
-        return {"message": "Limpeza de arquivos temporários concluída"}
+        result = await FileProcessor.cleanup_old_files(max_age_hours=1)
+        return {"message": "Limpeza de arquivos temporários concluída", **result}
     except Exception as e:
         raise HTTPException(500, f"Erro na limpeza de arquivos: {str(e)}")
\ No newline at end of file
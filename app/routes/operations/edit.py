@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException
 from app.services.operations.pdf_editor import PDFEditor
 from app.models.schemas import EditRequest, OperationResponse
 import os
-from app.config import settings
+import asyncio
+from app.utils.storage_layout import StorageLayout
 
 router = APIRouter(prefix="/edit", tags=["Edit PDF"])
 
@@ -100,7 +101,7 @@ async def compress_pdf(request: EditRequest):
         download_url = f"/api/v1/upload/download/{os.path.basename(output_file).split('.')[0]}"
         
         # Calcular métricas de compressão
-        original_path = f"{settings.UPLOAD_DIR}/{request.file_id}.pdf"
+        original_path = await asyncio.to_thread(StorageLayout.fetch_upload, request.file_id)
         original_size = os.path.getsize(original_path)
         compressed_size = os.path.getsize(output_file)
         
@@ -180,7 +181,7 @@ async def enhance_pdf_quality(file_id: str, quality: str = "high"):
         download_url = f"/api/v1/upload/download/{os.path.basename(output_file).split('.')[0]}"
         
         # Calcular métricas
-        original_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        original_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         original_size = os.path.getsize(original_path)
         enhanced_size = os.path.getsize(output_file)
         
@@ -12,7 +12,7 @@ async def merge_pdfs_simple(request: MergeRequest):
     """Junta múltiplos PDFs em ordem sequencial"""
     try:
         output_file = await PDFMerger.merge_pdfs(
-            request.file_ids, request.output_filename
+            request.file_ids, request.output_filename, request.drop_duplicates
         )
         
         download_url = f"/api/v1/upload/download/{os.path.basename(output_file).split('.')[0]}"
@@ -61,7 +61,7 @@ async def merge_pdfs_optimized(request: MergeRequest):
     try:
         # Primeiro mesclar normalmente
         output_file = await PDFMerger.merge_pdfs(
-            request.file_ids, request.output_filename
+            request.file_ids, request.output_filename, request.drop_duplicates
         )
         
         # Aplicar compressão
@@ -97,7 +97,7 @@ async def batch_merge_operations(requests: list[MergeRequest]):
         for request in requests:
             try:
                 output_file = await PDFMerger.merge_pdfs(
-                    request.file_ids, request.output_filename
+                    request.file_ids, request.output_filename, request.drop_duplicates
                 )
                 
                 download_url = f"/api/v1/upload/download/{os.path.basename(output_file).split('.')[0]}"
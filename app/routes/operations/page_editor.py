@@ -7,7 +7,8 @@ from app.models.schemas import (
     OperationResponse
 )
 import os
-from app.config import settings
+import asyncio
+from app.utils.storage_layout import StorageLayout
 
 router = APIRouter(prefix="/editor", tags=["Page Editor"])
 
@@ -152,20 +153,15 @@ async def rotate_specific_pages(request: PageRotateSpecificRequest):
 async def get_page_thumbnails(file_id: str):
     """Obtém thumbnails pequenas de todas as páginas para interface minimalista"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
         if not os.path.exists(file_path):
             raise HTTPException(404, "Arquivo não encontrado")
         
-        import fitz
-        doc = fitz.open(file_path)
-        total_pages = len(doc)
-        doc.close()
-        
         thumbnails = await PageEditorService.get_page_thumbnails(file_id)
         
         return PageThumbnailsResponse(
             file_id=file_id,
-            total_pages=total_pages,
+            total_pages=len(thumbnails),
             thumbnails=thumbnails
         )
         
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.operations.pdf_splitter import PDFSplitter
 from app.models.schemas import SplitRequest, OperationResponse
 import os
-from app.config import settings
+import asyncio
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
+from app.utils.zip_stream import ZipStreamer
+from app.utils.document_cache import DocumentCache
 
 router = APIRouter(prefix="/split", tags=["Split PDF"])
 
 @router.post("/page-range", response_model=OperationResponse)
-async def split_by_page_range(request: SplitRequest):
+async def split_by_page_range(
+    request: SplitRequest,
+    bundle: bool = Query(False, description="Retornar todas as partes em um único ZIP (streaming)")
+):
     """Divide PDF por ranges de páginas específicos"""
     try:
         page_ranges = request.parameters.get("ranges", [])
@@ -18,6 +25,9 @@ async def split_by_page_range(request: SplitRequest):
             request.file_id, page_ranges
         )
         
+        if bundle:
+            return ZipStreamer.response(ZipStreamer.entries_for(output_files), f"{request.file_id}_split.zip")
+        
         # Gerar URLs de download
         download_urls = [
             f"/api/v1/upload/download/{os.path.basename(f).split('.')[0]}"
@@ -37,7 +47,10 @@ async def split_by_page_range(request: SplitRequest):
         raise HTTPException(500, f"Erro ao dividir PDF: {str(e)}")
 
 @router.post("/every-n-pages", response_model=OperationResponse)
-async def split_by_every_n_pages(request: SplitRequest):
+async def split_by_every_n_pages(
+    request: SplitRequest,
+    bundle: bool = Query(False, description="Retornar todas as partes em um único ZIP (streaming)")
+):
     """Divide PDF a cada N páginas"""
     try:
         n = request.parameters.get("n", 1)
@@ -45,11 +58,8 @@ async def split_by_every_n_pages(request: SplitRequest):
             raise HTTPException(400, "N deve ser um número inteiro positivo")
         
         # Usar a função de range com páginas sequenciais
-        file_path = f"{settings.UPLOAD_DIR}/{request.file_id}.pdf"
-        import fitz
-        doc = fitz.open(file_path)
-        total_pages = len(doc)
-        doc.close()
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, request.file_id)
+        total_pages = await asyncio.to_thread(DocumentCache.page_count, file_path)
         
         page_ranges = []
         for start in range(1, total_pages + 1, n):
@@ -58,6 +68,9 @@ async def split_by_every_n_pages(request: SplitRequest):
         
         output_files = await PDFSplitter.split_by_page_range(request.file_id, page_ranges)
         
+        if bundle:
+            return ZipStreamer.response(ZipStreamer.entries_for(output_files), f"{request.file_id}_split.zip")
+        
         download_urls = [
             f"/api/v1/upload/download/{os.path.basename(f).split('.')[0]}"
             for f in output_files
@@ -76,10 +89,13 @@ async def split_by_every_n_pages(request: SplitRequest):
         raise HTTPException(500, f"Erro ao dividir PDF: {str(e)}")
 
 @router.post("/bookmarks", response_model=OperationResponse)
-async def split_by_bookmarks(request: SplitRequest):
+async def split_by_bookmarks(
+    request: SplitRequest,
+    bundle: bool = Query(False, description="Retornar todas as partes em um único ZIP (streaming)")
+):
     """Divide PDF por bookmarks (tópicos)"""
     try:
-        file_path = f"{settings.UPLOAD_DIR}/{request.file_id}.pdf"
+        file_path = await asyncio.to_thread(StorageLayout.fetch_upload, request.file_id)
         doc = fitz.open(file_path)
         
         # Extrair bookmarks
@@ -100,14 +116,19 @@ async def split_by_bookmarks(request: SplitRequest):
             
             import uuid
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_{safe_title}.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_{safe_title}")
             new_doc.save(output_path)
             new_doc.close()
             
-            output_files.append(output_path)
+            output_files.append(await asyncio.to_thread(
+                FileProcessor.register_output, output_path, request.file_id, "split_bookmarks"
+            ))
         
         doc.close()
         
+        if bundle:
+            return ZipStreamer.response(ZipStreamer.entries_for(output_files), f"{request.file_id}_split.zip")
+        
         download_urls = [
             f"/api/v1/upload/download/{os.path.basename(f).split('.')[0]}"
             for f in output_files
@@ -126,13 +147,19 @@ async def split_by_bookmarks(request: SplitRequest):
         raise HTTPException(500, f"Erro ao dividir PDF por bookmarks: {str(e)}")
 
 @router.post("/content-analysis", response_model=OperationResponse)
-async def split_by_content_analysis(request: SplitRequest):
+async def split_by_content_analysis(
+    request: SplitRequest,
+    bundle: bool = Query(False, description="Retornar todas as partes em um único ZIP (streaming)")
+):
     """Divide PDF baseado em análise inteligente de conteúdo"""
     try:
         output_files = await PDFSplitter.split_by_content_analysis(
             request.file_id, request.parameters
         )
         
+        if bundle:
+            return ZipStreamer.response(ZipStreamer.entries_for(output_files), f"{request.file_id}_split.zip")
+        
         download_urls = [
             f"/api/v1/upload/download/{os.path.basename(f).split('.')[0]}"
             for f in output_files
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.utils.content_store import ContentStore
+from app.utils.storage_backend import StorageBackend
+
+class AnalysisJobs:
+    """Agenda a análise completa em segundo plano e acompanha o progresso"""
+
+    _jobs: Dict[str, Dict[str, Any]] = {}
+    _tasks: set = set()
+
+    # Fração aproximada do tempo total gasta em cada etapa
+    STAGE_WEIGHTS = {"content": (0.0, 0.7), "quality": (0.7, 0.3), "done": (1.0, 0.0)}
+
+    @staticmethod
+    def _job_path(file_id: str) -> str:
+        return os.path.join(settings.ANALYSIS_JOBS_DIR, f"{file_id}.json")
+
+    @staticmethod
+    def _persist(job: Dict[str, Any]):
+        """Grava o estado do job para que outros workers (e nós, no backend remoto) possam consultá-lo"""
+        job_path = AnalysisJobs._job_path(job["file_id"])
+        temp_path = f"{job_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(job, f, default=str)
+        os.replace(temp_path, job_path)
+        StorageBackend.get_backend().put(StorageBackend.key_for(job_path), job_path)
+
+    @staticmethod
+    async def schedule(file_id: str, file_path: str, sha256: Optional[str] = None,
+                       total_pages: int = 0) -> Dict[str, Any]:
+        """Cria o job e dispara a análise sem bloquear a resposta"""
+        job = {
+            "file_id": file_id,
+            "status": "pending",
+            "progress": {"stage": "pending", "pages_done": 0, "total_pages": total_pages, "percent": 0.0},
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time()
+        }
+        AnalysisJobs._jobs[file_id] = job
+        await asyncio.to_thread(AnalysisJobs._persist, job)
+
+        task = asyncio.create_task(AnalysisJobs._run(file_id, file_path, sha256))
+        AnalysisJobs._tasks.add(task)
+        task.add_done_callback(AnalysisJobs._tasks.discard)
+        return job
+
+    @staticmethod
+    async def _run(file_id: str, file_path: str, sha256: Optional[str]):
+        """Executa a análise em thread separada para não travar o event loop"""
+        job = AnalysisJobs._jobs[file_id]
+        job["status"] = "running"
+        await asyncio.to_thread(AnalysisJobs._persist, job)
+
+        def on_progress(stage: str, pages_done: int, total_pages: int):
+            start, weight = AnalysisJobs.STAGE_WEIGHTS.get(stage, (0.0, 0.0))
+            fraction = pages_done / total_pages if total_pages else 1.0
+            stage_changed = job["progress"]["stage"] != stage
+            job["progress"] = {
+                "stage": stage,
+                "pages_done": pages_done,
+                "total_pages": total_pages,
+                "percent": round((start + weight * fraction) * 100, 1)
+            }
+            job["updated_at"] = time.time()
+            # Persistir apenas em mudanças de etapa e a cada 25 páginas
+            if stage_changed or pages_done % 25 == 0:
+                AnalysisJobs._persist(job)
+
+        try:
+            analysis = await asyncio.to_thread(PDFAnalyzer.analyze_document, file_path, on_progress)
+            if sha256:
+                PDFAnalyzer.save_analysis(sha256, analysis)
+            job["status"] = "completed"
+            job["result"] = analysis
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["updated_at"] = time.time()
+            await asyncio.to_thread(AnalysisJobs._persist, job)
+            # Resultado fica em disco; manter apenas jobs ativos em memória
+            AnalysisJobs._jobs.pop(file_id, None)
+
+    @staticmethod
+    def get_status(file_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o estado do job (memória, armazenamento ou análise já existente)"""
+        job = AnalysisJobs._jobs.get(file_id)
+        if job:
+            return job
+
+        # Estado gravado por outro worker (ou outro nó, no backend remoto)
+        job = StorageBackend.get_backend().get_json(StorageBackend.key_for(AnalysisJobs._job_path(file_id)))
+        if job:
+            return job
+
+        # Upload duplicado: análise reaproveitada sem job
+        sha256 = ContentStore.get_hash(file_id)
+        analysis = PDFAnalyzer.get_cached_analysis(sha256) if sha256 else None
+        if analysis:
+            total_pages = analysis["basic_info"]["pages"]
+            return {
+                "file_id": file_id,
+                "status": "completed",
+                "progress": {"stage": "done", "pages_done": total_pages, "total_pages": total_pages, "percent": 100.0},
+                "result": analysis,
+                "error": None
+            }
+
+        return None
@@ -0,0 +1,83 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Any, Iterator
+from app.config import settings
+
+class AnalysisPool:
+    """Distribui a análise por faixas de páginas entre processos
+
+    Cada tarefa recebe (file_path, page_numbers) e abre seu próprio handle do
+    fitz no processo filho, devolvendo uma lista de resultados por página na
+    mesma ordem de page_numbers. Documentos pequenos rodam no próprio processo.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def worker_count() -> int:
+        return settings.ANALYSIS_PROCESS_WORKERS or os.cpu_count() or 1
+
+    @staticmethod
+    def should_shard(total_pages: int) -> bool:
+        """Vale a pena dividir o documento entre processos?"""
+        return AnalysisPool.worker_count() > 1 and total_pages >= settings.ANALYSIS_PARALLEL_MIN_PAGES
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        # "spawn" evita herdar threads e handles abertos do processo da API
+        if AnalysisPool._executor is None:
+            AnalysisPool._executor = ProcessPoolExecutor(
+                max_workers=AnalysisPool.worker_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return AnalysisPool._executor
+
+    @staticmethod
+    def imap_pages(task: Callable[[str, List[int]], List[Any]], file_path: str,
+                   page_numbers: List[int]) -> Iterator[Any]:
+        """Executa a tarefa em lotes de páginas e entrega os resultados na ordem original
+
+        Apenas alguns lotes ficam em andamento por vez, então quem consome devagar
+        (ex: uma resposta em streaming) não acumula o documento inteiro em memória.
+        """
+        shard_size = settings.ANALYSIS_SHARD_PAGES
+        shards = deque(page_numbers[i:i + shard_size] for i in range(0, len(page_numbers), shard_size))
+        window = AnalysisPool.worker_count() * 2
+        pending = deque()
+
+        try:
+            executor = AnalysisPool._get_executor()
+            while shards or pending:
+                while shards and len(pending) < window:
+                    future = executor.submit(task, file_path, shards[0])
+                    pending.append((shards.popleft(), future))
+                shard, future = pending[0]
+                results = future.result()
+                pending.popleft()
+                yield from results
+        except BrokenProcessPool:
+            # Processo filho morreu (ex: falta de memória): terminar no próprio processo
+            AnalysisPool.shutdown()
+            for shard, _ in pending:
+                yield from task(file_path, shard)
+            for shard in shards:
+                yield from task(file_path, shard)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    @staticmethod
+    def map_pages(task: Callable[[str, List[int]], List[Any]], file_path: str,
+                  page_numbers: List[int]) -> List[Any]:
+        """Resultados de todas as páginas em uma lista"""
+        return list(AnalysisPool.imap_pages(task, file_path, page_numbers))
+
+    @staticmethod
+    def shutdown():
+        """Encerra os processos do pool"""
+        if AnalysisPool._executor is not None:
+            AnalysisPool._executor.shutdown(wait=False, cancel_futures=True)
+            AnalysisPool._executor = None
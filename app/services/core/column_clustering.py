@@ -0,0 +1,46 @@
+import numpy as np
+from typing import List, Sequence
+
+# Posições x mais próximas que isso (em pontos) pertencem ao mesmo alinhamento
+COLUMN_GAP_TOLERANCE = 1.0
+
+class ColumnClustering:
+    """Agrupamento 1-D determinístico de posições horizontais de texto
+
+    Em uma dimensão, a partição que o KMeans busca é obtida ordenando as
+    posições e cortando nas maiores lacunas entre vizinhas, sem iterações
+    nem sementes aleatórias.
+    """
+
+    @staticmethod
+    def cluster_positions(positions: Sequence[float], max_clusters: int,
+                          min_gap: float = COLUMN_GAP_TOLERANCE) -> List[float]:
+        """Centros (médias) dos grupos, em ordem crescente
+
+        Lacunas de até min_gap não separam grupos; das restantes, apenas as
+        max_clusters - 1 maiores viram cortes.
+        """
+        values = np.sort(np.asarray(positions, dtype=float))
+        if values.size == 0 or max_clusters < 1:
+            return []
+
+        gaps = np.diff(values)
+        cuts = np.flatnonzero(gaps > min_gap)
+        if cuts.size > max_clusters - 1:
+            # Maiores lacunas primeiro; empates resolvidos pela posição
+            largest = np.argsort(-gaps[cuts], kind="stable")[:max_clusters - 1]
+            cuts = np.sort(cuts[largest])
+
+        starts = np.concatenate(([0], cuts + 1))
+        sums = np.add.reduceat(values, starts)
+        counts = np.diff(np.append(starts, values.size))
+        return (sums / counts).tolist()
+
+    @staticmethod
+    def count_clusters(positions: Sequence[float], max_clusters: int,
+                       min_gap: float = COLUMN_GAP_TOLERANCE) -> int:
+        """Número de grupos sem calcular os centros"""
+        values = np.sort(np.asarray(positions, dtype=float))
+        if values.size == 0:
+            return 0
+        return int(min(max_clusters, np.count_nonzero(np.diff(values) > min_gap) + 1))
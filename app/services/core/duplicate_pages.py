@@ -0,0 +1,197 @@
+import fitz
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.core.analysis_pool import AnalysisPool
+from app.services.core.page_fingerprint import PageFingerprint
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.file_registry import FileRegistry
+from app.utils.page_hash_index import PageHashIndex
+
+MAX_DHASH_DISTANCE = 6       # Bits de diferença no dhash aceitos como quase duplicata
+MAX_SIMHASH_DISTANCE = 6     # Idem para o simhash do texto, quando as duas páginas têm texto
+MAX_MATCHES_PER_PAGE = 50
+
+class DuplicatePages:
+    """Duplicatas e quase duplicatas de páginas no documento e entre uploads
+
+    Os hashes de cada página (PageFingerprint) são calculados uma vez por
+    conteúdo, logo após o upload, e guardados no PageHashIndex. As buscas
+    consultam apenas os baldes das faixas do dhash e confirmam cada candidata
+    pela distância de Hamming.
+    """
+
+    # Incrementar ao mudar o cálculo dos hashes (reindexa os documentos)
+    VERSION = "1"
+
+    _tasks: set = set()
+
+    @staticmethod
+    def schedule(file_path: str, sha256: str):
+        """Indexa as páginas do upload em segundo plano"""
+        task = asyncio.create_task(asyncio.to_thread(DuplicatePages._index_quietly, file_path, sha256))
+        DuplicatePages._tasks.add(task)
+        task.add_done_callback(DuplicatePages._tasks.discard)
+
+    @staticmethod
+    def _index_quietly(file_path: str, sha256: str):
+        try:
+            DuplicatePages.ensure_indexed(file_path, sha256)
+        except Exception:
+            pass  # Indexado sob demanda na primeira consulta
+
+    @staticmethod
+    def ensure_indexed(file_path: str, sha256: Optional[str] = None) -> str:
+        """Calcula e grava os hashes das páginas se o conteúdo ainda não estiver indexado"""
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        if not PageHashIndex.has(sha256, DuplicatePages.VERSION):
+            PageHashIndex.put(sha256, DuplicatePages.VERSION, DuplicatePages.fingerprint_document(file_path))
+        return sha256
+
+    @staticmethod
+    def fingerprint_document(file_path: str) -> List[Dict[str, Any]]:
+        """Hashes de todas as páginas (em processos separados para documentos grandes)
+
+        Usa um handle próprio: a indexação roda em segundo plano, renderizando
+        todas as páginas, e não deve bloquear as requisições que usam o
+        documento em cache.
+        """
+        with fitz.open(file_path) as doc:
+            page_numbers = list(range(len(doc)))
+            if not AnalysisPool.should_shard(len(page_numbers)):
+                return list(PageFingerprint.iter_document(doc, page_numbers))
+        return AnalysisPool.map_pages(DuplicatePages._fingerprint_range, file_path, page_numbers)
+
+    @staticmethod
+    def _fingerprint_range(file_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+        """Tarefa do pool de processos: abre o próprio handle do documento"""
+        with fitz.open(file_path) as doc:
+            return list(PageFingerprint.iter_document(doc, page_numbers))
+
+    @staticmethod
+    def compare(a: Dict[str, Any], b: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Distâncias entre duas páginas, ou None se não forem quase duplicatas
+
+        Páginas com texto nas duas versões precisam coincidir também no simhash;
+        se alguma não tem texto (ex: digitalizada), vale só a imagem.
+        """
+        image_distance = PageFingerprint.hamming(a["dhash"], b["dhash"])
+        if image_distance > MAX_DHASH_DISTANCE:
+            return None
+        text_distance = None
+        if a["simhash"] is not None and b["simhash"] is not None:
+            text_distance = PageFingerprint.hamming(a["simhash"], b["simhash"])
+            if text_distance > MAX_SIMHASH_DISTANCE:
+                return None
+        return {
+            "image_distance": image_distance,
+            "text_distance": text_distance,
+            "exact": a["dhash"] == b["dhash"] and a["simhash"] == b["simhash"]
+        }
+
+    @staticmethod
+    def find_in_document(file_path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Grupos de páginas duplicadas dentro do documento"""
+        sha256 = DuplicatePages.ensure_indexed(file_path, sha256)
+        pages = PageHashIndex.get(sha256)
+
+        matcher = PageMatcher()
+        parent = list(range(len(pages)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, page in enumerate(pages):
+            matches = matcher.matches(page)
+            for j, _ in matches:
+                parent[find(i)] = find(j)
+            # Cópias idênticas já estão representadas no índice
+            if not any(comparison["exact"] for _, comparison in matches):
+                matcher.add(i, page)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(pages)):
+            groups.setdefault(find(i), []).append(i)
+
+        duplicate_groups = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            duplicate_groups.append({
+                "pages": [pages[i]["page"] for i in members],
+                "exact": len({(pages[i]["dhash"], pages[i]["simhash"]) for i in members}) == 1
+            })
+        duplicate_groups.sort(key=lambda group: group["pages"][0])
+
+        return {
+            "total_pages": len(pages),
+            "duplicate_pages": sum(len(group["pages"]) - 1 for group in duplicate_groups),
+            "groups": duplicate_groups
+        }
+
+    @staticmethod
+    def find_across_uploads(file_path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Páginas do documento que aparecem em outros uploads"""
+        sha256 = DuplicatePages.ensure_indexed(file_path, sha256)
+        file_ids: Dict[str, List[str]] = {}
+        result_pages = []
+
+        for page in PageHashIndex.get(sha256):
+            probes = PageFingerprint.probe_bands(page["dhash"], MAX_DHASH_DISTANCE)
+            matches = []
+            for candidate in PageHashIndex.candidates(probes, exclude_sha256=sha256):
+                comparison = DuplicatePages.compare(page, candidate)
+                if comparison is None:
+                    continue
+                # Conteúdos sem upload ativo (ex: expirados) não são reportados
+                if candidate["sha256"] not in file_ids:
+                    file_ids[candidate["sha256"]] = FileRegistry.find_by_content_hash(candidate["sha256"])
+                for file_id in file_ids[candidate["sha256"]]:
+                    matches.append({"file_id": file_id, "page": candidate["page"], **comparison})
+
+            if matches:
+                matches.sort(key=lambda match: (match["image_distance"], match["text_distance"] or 0))
+                result_pages.append({
+                    "page": page["page"],
+                    "total_matches": len(matches),
+                    "matches": matches[:MAX_MATCHES_PER_PAGE]
+                })
+
+        return {
+            "pages_with_matches": len(result_pages),
+            "documents_with_matches": sum(1 for ids in file_ids.values() if ids),
+            "pages": result_pages
+        }
+
+class PageMatcher:
+    """Índice em memória por faixas do dhash para comparar páginas sem varrer todas
+
+    Usado dentro de um documento e na junção com remoção de duplicatas.
+    """
+
+    def __init__(self, max_distance: int = MAX_DHASH_DISTANCE):
+        self.max_distance = max_distance
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        self.items: Dict[int, Dict[str, Any]] = {}
+
+    def add(self, key: int, fingerprint: Dict[str, Any]):
+        self.items[key] = fingerprint
+        for band, value in enumerate(PageFingerprint.bands(fingerprint["dhash"])):
+            self.buckets.setdefault((band, value), []).append(key)
+
+    def matches(self, fingerprint: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Itens já adicionados que são quase duplicatas da página"""
+        seen = set()
+        found = []
+        for band, values in enumerate(PageFingerprint.probe_bands(fingerprint["dhash"], self.max_distance)):
+            for value in values:
+                for key in self.buckets.get((band, value), ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    comparison = DuplicatePages.compare(fingerprint, self.items[key])
+                    if comparison is not None:
+                        found.append((key, comparison))
+        return found
@@ -0,0 +1,168 @@
+import fitz
+import numpy as np
+from collections import Counter
+from functools import partial
+from typing import Dict, Any, List, Optional, Sequence
+from app.services.core.analysis_pool import AnalysisPool
+from app.services.core.resource_inventory import ResourceInventory
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+
+MIN_TEXT_GLYPHS = 50         # Glifos a partir dos quais a página tem camada de texto útil
+FULL_PAGE_COVERAGE = 0.5     # Fração da página coberta por imagens que indica digitalização
+PARTIAL_COVERAGE = 0.2       # Imagens menores que isso não justificam OCR da página
+PROBE_DPI = 12               # Resolução da renderização usada para medir a variação de pixels
+BLANK_STDDEV = 2.0           # Desvio padrão (0-255) abaixo do qual a página está em branco
+
+# Modo de renderização 3 do PDF: texto invisível (camada de OCR sobre a imagem)
+INVISIBLE_TEXT = 3
+
+class OCRClassifier:
+    """Classificação por página da necessidade de OCR a partir de sinais baratos
+
+    Para cada página: glifos visíveis e invisíveis da camada de texto
+    (get_texttrace, sem montar o texto), cobertura da página por imagens e,
+    só quando a camada de texto não decide, a variação de pixels de uma
+    renderização em escala de cinza a PROBE_DPI. O inventário de recursos
+    indica quais páginas têm imagens, evitando ler as posições nas demais.
+
+    Classes: text, ocr_layer (já tem OCR invisível), blank, scanned, image e
+    graphics; apenas scanned e image com cobertura relevante precisam de OCR.
+    """
+
+    VERSION = "2"
+
+    @staticmethod
+    def classify_document(file_path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Classificação de todas as páginas com o resumo do documento (cache pelo hash)"""
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        cache_key = f"{sha256}:{OCRClassifier.VERSION}"
+        result = SharedCache.get_json("ocr_classes", cache_key)
+        if result is not None:
+            return result
+
+        inventory = ResourceInventory.for_file(file_path, placements=False, sha256=sha256)
+        image_pages = sorted({
+            page for image in inventory["images"] if not image["is_mask"] for page in image["pages"]
+        })
+
+        page_numbers = list(range(DocumentCache.page_count(file_path)))
+        if AnalysisPool.should_shard(len(page_numbers)):
+            # Os processos do pool abrem o próprio handle: o documento em cache fica livre
+            task = partial(OCRClassifier._classify_range, image_pages=image_pages)
+            pages = AnalysisPool.map_pages(task, file_path, page_numbers)
+        else:
+            with DocumentCache.open(file_path) as doc:
+                pages = OCRClassifier._classify_pages(doc, page_numbers, image_pages)
+
+        result = OCRClassifier.summarize(pages)
+        SharedCache.set_json("ocr_classes", cache_key, result)
+        return result
+
+    @staticmethod
+    def summarize(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resumo do documento a partir das classificações por página"""
+        pages_needing_ocr = [page["page_number"] for page in pages if page["needs_ocr"]]
+        return {
+            "needs_ocr": bool(pages_needing_ocr),
+            "confidence": round(sum(page["confidence"] for page in pages) / len(pages), 2) if pages else 0,
+            "pages_analyzed": len(pages),
+            "pages_needing_ocr": pages_needing_ocr,
+            "page_classes": dict(Counter(page["class"] for page in pages)),
+            "pages": pages
+        }
+
+    @staticmethod
+    def classify_page(page, page_num: int, images: Optional[Sequence[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Classe, necessidade de OCR e sinais de uma página
+
+        images são as posições das imagens (com "bbox"), como em PageFeatures;
+        se None, são lidas de get_image_info().
+        """
+        visible = invisible = 0
+        for span in page.get_texttrace():
+            glyphs = len(span["chars"])
+            if span["type"] == INVISIBLE_TEXT or span.get("opacity", 1) == 0:
+                invisible += glyphs
+            else:
+                visible += glyphs
+
+        if images is None:
+            images = page.get_image_info()
+        return OCRClassifier._classify(page, page_num, visible, invisible, OCRClassifier.image_coverage(page.rect, images))
+
+    @staticmethod
+    def classify_features(page, features) -> Dict[str, Any]:
+        """Classe da página a partir das PageFeatures já extraídas (análise do documento)
+
+        Os glifos vêm dos spans de PageFeatures, sem nova leitura do conteúdo.
+        Só páginas cobertas por uma imagem vão para classify_page: ali o texto
+        pode ser uma camada de OCR invisível, que get_text() não distingue.
+        """
+        coverage = OCRClassifier.image_coverage(page.rect, features.images)
+        if coverage >= FULL_PAGE_COVERAGE:
+            return OCRClassifier.classify_page(page, features.page_number - 1, features.images)
+        glyphs = sum(len("".join(span["text"].split())) for span in features.spans)
+        return OCRClassifier._classify(page, features.page_number - 1, glyphs, 0, coverage)
+
+    @staticmethod
+    def _classify(page, page_num: int, visible: int, invisible: int, coverage: float) -> Dict[str, Any]:
+        result = {
+            "page_number": page_num + 1,
+            "visible_glyphs": visible,
+            "invisible_glyphs": invisible,
+            "image_coverage": round(coverage, 3)
+        }
+
+        if visible >= MIN_TEXT_GLYPHS:
+            return {**result, "class": "text", "needs_ocr": False, "confidence": 0.95}
+        if invisible >= MIN_TEXT_GLYPHS:
+            return {**result, "class": "ocr_layer", "needs_ocr": False, "confidence": 0.9}
+
+        if visible == 0:
+            # Nada visível na camada de texto: medir se há algo desenhado na página
+            stddev = OCRClassifier.pixel_stddev(page)
+            result["pixel_stddev"] = round(stddev, 2)
+            if stddev < BLANK_STDDEV:
+                return {**result, "class": "blank", "needs_ocr": False, "confidence": 0.9}
+        if coverage >= FULL_PAGE_COVERAGE:
+            return {**result, "class": "scanned", "needs_ocr": True, "confidence": 0.9 if visible == 0 else 0.75}
+        if coverage > 0:
+            return {**result, "class": "image", "needs_ocr": coverage >= PARTIAL_COVERAGE, "confidence": 0.6}
+        # Só desenhos vetoriais ou pouco texto (ex: texto convertido em curvas, diagramas, formulários)
+        return {**result, "class": "graphics", "needs_ocr": False, "confidence": 0.5}
+
+    @staticmethod
+    def image_coverage(page_rect, images: Sequence[Dict[str, Any]]) -> float:
+        """Fração da página coberta por imagens (recortadas à página, limitada a 1)"""
+        area = page_rect.width * page_rect.height
+        if not images or area <= 0:
+            return 0.0
+        covered = sum(abs(fitz.Rect(image["bbox"]) & page_rect) for image in images)
+        return min(1.0, covered / area)
+
+    @staticmethod
+    def pixel_stddev(page) -> float:
+        """Desvio padrão dos pixels de uma renderização minúscula em escala de cinza"""
+        zoom = PROBE_DPI / 72
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        if not pixmap.width or not pixmap.height:
+            return 0.0
+        samples = np.frombuffer(pixmap.samples, dtype=np.uint8)
+        return float(samples.std())
+
+    @staticmethod
+    def _classify_pages(doc, page_numbers: List[int], image_pages: Sequence[int]) -> List[Dict[str, Any]]:
+        with_images = set(image_pages)
+        return [
+            # Páginas sem imagens no inventário não precisam de get_image_info()
+            OCRClassifier.classify_page(doc[page_num], page_num, None if page_num + 1 in with_images else [])
+            for page_num in page_numbers
+        ]
+
+    @staticmethod
+    def _classify_range(file_path: str, page_numbers: List[int], image_pages: Sequence[int] = ()) -> List[Dict[str, Any]]:
+        """Tarefa do pool de processos: abre o próprio handle do documento"""
+        with fitz.open(file_path) as doc:
+            return OCRClassifier._classify_pages(doc, page_numbers, image_pages)
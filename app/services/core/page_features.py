@@ -0,0 +1,86 @@
+import fitz
+from typing import Dict, Any, List, Iterator
+
+# Extração de texto sem copiar os bytes das imagens para o dicionário
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+class PageFeatures:
+    """Características de uma página extraídas em uma única passada de texto
+
+    Uma chamada a get_text("dict") alimenta texto, blocos, spans e contagem de
+    palavras; as imagens vêm de get_image_info(), que lê apenas metadados
+    (posição, dimensões, resolução) sem decodificar os dados.
+
+    images tem uma entrada por posicionamento (o mesmo logotipo em dois lugares
+    aparece duas vezes), mas image_count conta imagens distintas pelos xrefs de
+    get_images(), lidos dos recursos da página. get_image_info(xrefs=True) não
+    é usado: ele decodifica cada imagem para descobrir o xref.
+    """
+
+    __slots__ = (
+        "page_number", "width", "height", "rotation",
+        "text", "blocks", "spans", "images", "image_xrefs", "word_count"
+    )
+
+    def __init__(self, page, page_num: int):
+        self.page_number = page_num + 1
+        self.width = page.rect.width
+        self.height = page.rect.height
+        self.rotation = page.rotation
+
+        text_dict = page.get_text("dict", flags=TEXT_FLAGS)
+        self.blocks: List[Dict[str, Any]] = []
+        self.spans: List[Dict[str, Any]] = []
+        text_parts = []
+
+        for block in text_dict["blocks"]:
+            if block["type"] != 0:
+                continue
+            block_lines = []
+            for line in block["lines"]:
+                line_text = "".join(span["text"] for span in line["spans"])
+                block_lines.append(line_text + "\n")
+                for span in line["spans"]:
+                    self.spans.append({
+                        "text": span["text"],
+                        "bbox": span["bbox"],
+                        "size": span["size"],
+                        "font": span["font"],
+                        "flags": span["flags"]
+                    })
+            block_text = "".join(block_lines)
+            text_parts.append(block_text)
+            self.blocks.append({"bbox": block["bbox"], "text": block_text})
+
+        # Mesmo resultado de page.get_text()
+        self.text = "".join(text_parts)
+        self.word_count = len(self.text.split())
+
+        self.images: List[Dict[str, Any]] = [
+            {
+                "bbox": info["bbox"],
+                "transform": info["transform"],
+                "width": info["width"],
+                "height": info["height"],
+                "xres": info.get("xres", 0),
+                "yres": info.get("yres", 0),
+                "size": info.get("size", 0)
+            }
+            for info in page.get_image_info()
+        ]
+        self.image_xrefs: List[int] = sorted({image[0] for image in page.get_images()})
+
+    @property
+    def text_block_count(self) -> int:
+        return len(self.blocks)
+
+    @property
+    def image_count(self) -> int:
+        # Imagens inline não têm xref: sem nenhum xref, conta os posicionamentos
+        return len(self.image_xrefs) or len(self.images)
+
+    @staticmethod
+    def iter_document(doc) -> Iterator["PageFeatures"]:
+        """Gera as características página a página, sem manter todas em memória"""
+        for page_num in range(len(doc)):
+            yield PageFeatures(doc[page_num], page_num)
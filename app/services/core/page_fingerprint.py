@@ -0,0 +1,99 @@
+import re
+import hashlib
+import fitz
+import numpy as np
+from typing import Dict, Any, Optional, List, Iterator
+
+HASH_BITS = 64
+BANDS = 4                   # Faixas de 16 bits usadas como baldes de busca
+BAND_BITS = HASH_BITS // BANDS
+RENDER_WIDTH = 64           # Largura (px) da renderização usada no hash perceptual
+SHINGLE_WORDS = 3
+FLAT_TOLERANCE = 2.0        # Diferença mínima de cinza (0-255) entre blocos vizinhos para o bit valer 1
+
+WORD_PATTERN = re.compile(r"\w+")
+
+class PageFingerprint:
+    """Impressões digitais de página para detectar duplicatas
+
+    dhash: hash perceptual de 64 bits de uma renderização minúscula em escala
+    de cinza (reduzida a 9x8 e comparando vizinhos na horizontal). simhash:
+    hash de 64 bits dos shingles de palavras da camada de texto (None se a
+    página não tem texto). Páginas parecidas têm hashes a poucos bits de
+    distância (Hamming).
+    """
+
+    @staticmethod
+    def fingerprint(page) -> Dict[str, Any]:
+        return {
+            "dhash": PageFingerprint.dhash(page),
+            "simhash": PageFingerprint.simhash(page.get_text())
+        }
+
+    @staticmethod
+    def dhash(page) -> int:
+        """Hash perceptual da página renderizada com RENDER_WIDTH pixels de largura"""
+        zoom = RENDER_WIDTH / max(page.rect.width, 1)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+        pixels = pixels.astype(np.float64)
+
+        # Média por área em uma grade de 8 linhas x 9 colunas
+        row_edges = np.linspace(0, pixmap.height, 9).astype(int)[:-1]
+        col_edges = np.linspace(0, pixmap.width, 10).astype(int)[:-1]
+        sums = np.add.reduceat(np.add.reduceat(pixels, row_edges, axis=0), col_edges, axis=1)
+        counts = np.outer(np.diff(np.append(row_edges, pixmap.height)), np.diff(np.append(col_edges, pixmap.width)))
+        grid = sums / np.maximum(counts, 1)
+
+        # Regiões lisas (ex: margens brancas) valem 0 mesmo com ruído de digitalização
+        bits = grid[:, 1:] - grid[:, :-1] > FLAT_TOLERANCE
+        return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+    @staticmethod
+    def simhash(text: str) -> Optional[int]:
+        """Simhash dos shingles de SHINGLE_WORDS palavras (None para páginas sem texto)"""
+        words = WORD_PATTERN.findall(text.lower())
+        if not words:
+            return None
+        size = min(SHINGLE_WORDS, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+        digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+        bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+        # Cada bit vota +1/-1 por shingle; o sinal da soma define o bit do simhash
+        majority = bits.sum(axis=0) * 2 > len(shingles)
+        return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+    @staticmethod
+    def hamming(a: int, b: int) -> int:
+        return (a ^ b).bit_count()
+
+    @staticmethod
+    def bands(value: int) -> List[int]:
+        """Faixas de BAND_BITS bits do hash, da mais significativa para a menos"""
+        mask = (1 << BAND_BITS) - 1
+        return [(value >> (BAND_BITS * (BANDS - 1 - i))) & mask for i in range(BANDS)]
+
+    @staticmethod
+    def probe_bands(value: int, max_distance: int) -> List[List[int]]:
+        """Valores de cada faixa a consultar para achar hashes a até max_distance bits
+
+        Se dois hashes diferem em até max_distance bits, alguma das BANDS faixas
+        difere em no máximo max_distance // BANDS bits (princípio da casa dos
+        pombos), então basta consultar cada faixa e seus vizinhos a esse raio.
+        """
+        radius = max_distance // BANDS
+        probes = []
+        for band in PageFingerprint.bands(value):
+            values = [band]
+            if radius >= 1:
+                values += [band ^ (1 << i) for i in range(BAND_BITS)]
+            if radius >= 2:
+                values += [band ^ (1 << i) ^ (1 << j) for i in range(BAND_BITS) for j in range(i + 1, BAND_BITS)]
+            probes.append(values)
+        return probes
+
+    @staticmethod
+    def iter_document(doc, page_numbers: List[int]) -> Iterator[Dict[str, Any]]:
+        for page_num in page_numbers:
+            yield {"page": page_num + 1, **PageFingerprint.fingerprint(doc[page_num])}
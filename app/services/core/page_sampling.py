@@ -0,0 +1,60 @@
+import math
+import random
+from typing import Dict, Any, List
+
+# Valor z para intervalos de confiança de 95%
+Z_95 = 1.96
+
+class PageSampler:
+    """Amostragem estratificada de páginas para documentos grandes
+
+    A primeira e a última página entram sempre; as demais são divididas em
+    estratos de tamanho igual e uma página de cada estrato é sorteada com
+    semente fixa, para que o mesmo documento gere sempre a mesma amostra.
+    """
+
+    @staticmethod
+    def select(total_pages: int, sample_size: int, seed: int = 0) -> List[int]:
+        """Índices (base 0) das páginas da amostra, em ordem crescente"""
+        if total_pages <= sample_size:
+            return list(range(total_pages))
+
+        interior = total_pages - 2
+        strata = max(1, sample_size - 2)
+        rng = random.Random(f"{seed}:{total_pages}")
+        pages = [0]
+        for stratum in range(strata):
+            start = 1 + stratum * interior // strata
+            end = 1 + (stratum + 1) * interior // strata
+            pages.append(rng.randrange(start, end))
+        pages.append(total_pages - 1)
+        return pages
+
+    @staticmethod
+    def estimate_total(fixed_values: List[float], sampled_values: List[float],
+                       population: int, upper_bound: float = math.inf) -> Dict[str, Any]:
+        """Estimativa do total com intervalo de confiança de 95%
+
+        fixed_values vêm das páginas sempre analisadas (contadas como estão);
+        sampled_values são expandidos para as population páginas restantes. A
+        variância usa a fórmula da amostra aleatória simples com correção de
+        população finita, conservadora para a amostra estratificada.
+        """
+        fixed = sum(fixed_values)
+        n = len(sampled_values)
+        if n == 0 or population == 0:
+            return {"estimate": round(fixed), "ci_low": round(fixed), "ci_high": round(fixed)}
+
+        mean = sum(sampled_values) / n
+        estimate = fixed + population * mean
+        if n > 1:
+            variance = sum((value - mean) ** 2 for value in sampled_values) / (n - 1)
+            margin = Z_95 * population * math.sqrt(variance / n * (1 - n / population))
+        else:
+            margin = population * mean
+
+        return {
+            "estimate": round(estimate),
+            "ci_low": max(round(fixed), math.floor(estimate - margin)),
+            "ci_high": min(upper_bound, math.ceil(estimate + margin))
+        }
@@ -1,45 +1,291 @@
 import fitz
 import os
-from typing import Dict, Any, List, Tuple
+import asyncio
+from typing import Dict, Any, List, Tuple, Optional, Callable, Iterator
 from app.services.core.quality_engine import QualityEngine
+from app.services.core.page_features import PageFeatures
+from app.services.core.column_clustering import ColumnClustering
+from app.services.core.analysis_pool import AnalysisPool
+from app.services.core.page_sampling import PageSampler
+from app.services.core.resource_inventory import ResourceInventory
+from app.services.core.ocr_classifier import OCRClassifier
+from app.utils.document_cache import DocumentCache
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.shared_cache import SharedCache
+from app.utils.file_registry import FileRegistry
 from app.config import settings
 
 class PDFAnalyzer:
     """Serviço avançado de análise de PDFs"""
     
+    # Incrementar ao mudar o formato ou os critérios da análise (invalida o cache)
+    ANALYZER_VERSION = "9"
+    
+    # Semente da amostragem de páginas (mesma amostra para o mesmo documento)
+    SAMPLE_SEED = 0
+    
+    @staticmethod
+    async def comprehensive_analysis(file_path: str, sha256: Optional[str] = None,
+                                     full: bool = False) -> Dict[str, Any]:
+        """Realiza análise completa do PDF (reaproveitando o cache por hash do conteúdo)
+        
+        Documentos com mais de MAX_PAGES_FOR_ANALYSIS páginas são analisados por
+        amostragem, a menos que full=True.
+        """
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        analysis = PDFAnalyzer.get_cached_analysis(sha256, full)
+        if analysis is None:
+            analysis = await asyncio.to_thread(PDFAnalyzer.analyze_document, file_path, None, full)
+            PDFAnalyzer.save_analysis(sha256, analysis)
+        return analysis
+    
+    @staticmethod
+    def _cache_options(sampled: bool) -> Optional[Dict[str, Any]]:
+        """Opções que entram na chave do cache (análises por amostragem dependem do limite)"""
+        return {"sample_pages": settings.MAX_PAGES_FOR_ANALYSIS} if sampled else None
+    
+    @staticmethod
+    def get_cached_analysis(sha256: str, full: bool = False) -> Optional[Dict[str, Any]]:
+        """Análise já calculada para o conteúdo com a versão atual do analisador
+        
+        Consulta primeiro o cache compartilhado entre workers e depois o cache em disco.
+        Sem full, uma análise completa já existente também serve.
+        """
+        for sampled in ([False] if full else [True, False]):
+            options = PDFAnalyzer._cache_options(sampled)
+            cache_key = AnalysisCache.make_key(sha256, PDFAnalyzer.ANALYZER_VERSION, options)
+            analysis = SharedCache.get_json("analysis", cache_key)
+            if analysis is None:
+                analysis = AnalysisCache.get(sha256, PDFAnalyzer.ANALYZER_VERSION, options)
+                if analysis is not None:
+                    SharedCache.set_json("analysis", cache_key, analysis)
+            if analysis is not None:
+                return analysis
+        return None
+    
+    @staticmethod
+    def save_analysis(sha256: str, analysis: Dict[str, Any]):
+        """Guarda a análise no cache em disco e no cache compartilhado"""
+        options = PDFAnalyzer._cache_options(analysis.get("sampled", False))
+        AnalysisCache.put(sha256, PDFAnalyzer.ANALYZER_VERSION, analysis, options)
+        SharedCache.set_json("analysis", AnalysisCache.make_key(sha256, PDFAnalyzer.ANALYZER_VERSION, options), analysis)
+    
     @staticmethod
-    async def comprehensive_analysis(file_path: str) -> Dict[str, Any]:
-        """Realiza análise completa do PDF"""
+    def analyze_document(file_path: str, progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                         full: bool = False) -> Dict[str, Any]:
+        """Análise síncrona, com callback opcional de progresso (etapa, feito, total)
+        
+        Acima de MAX_PAGES_FOR_ANALYSIS páginas (e sem full) analisa a primeira e a
+        última página mais uma amostra estratificada e extrapola as contagens.
+        """
         try:
-            doc = fitz.open(file_path)
-            analysis = {
-                "basic_info": {},
-                "content_analysis": {},
-                "structure_analysis": {},
-                "quality_assessment": {},
-                "recommendations": []
-            }
-            
-            # Informações básicas
-            analysis["basic_info"] = PDFAnalyzer._get_basic_info(doc, file_path)
-            
-            # Análise de conteúdo
-            analysis["content_analysis"] = PDFAnalyzer._analyze_content(doc)
+            derived = PDFAnalyzer.derive_analysis(file_path)
+            if derived is not None:
+                return derived
             
-            # Análise estrutural
-            analysis["structure_analysis"] = PDFAnalyzer._analyze_structure(doc)
+            with fitz.open(file_path) as doc:
+                for record in PDFAnalyzer._iter_analysis(doc, file_path, full, progress_callback):
+                    if record["type"] == "summary":
+                        return record["analysis"]
             
-            # Avaliação de qualidade
-            analysis["quality_assessment"] = QualityEngine.analyze_pdf_quality(file_path)
+        except Exception as e:
+            raise Exception(f"Erro na análise do PDF: {str(e)}")
+    
+    @staticmethod
+    def iter_analysis(file_path: str, full: bool = False, sha256: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Análise em fluxo: um registro "start", um "page" por página e um "summary" final
+        
+        O resumo traz as mesmas seções da análise completa, mas sem as listas por
+        página (já enviadas), então a memória não cresce com o tamanho do documento.
+        O documento é aberto com um handle próprio: o do DocumentCache ficaria
+        bloqueado para as outras requisições enquanto o cliente lê a resposta.
+        Uma análise já em cache é reproduzida no mesmo formato. Erros viram um
+        registro "error", pois a resposta já começou a ser enviada.
+        """
+        try:
+            sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+            cached = PDFAnalyzer.get_cached_analysis(sha256, full)
+            if cached is None:
+                cached = PDFAnalyzer.derive_analysis(file_path, sha256)
+                if cached is not None:
+                    PDFAnalyzer.save_analysis(sha256, cached)
+            if cached is not None:
+                yield from PDFAnalyzer._replay_analysis(cached)
+                return
             
-            # Recomendações
-            analysis["recommendations"] = PDFAnalyzer._generate_recommendations(analysis)
+            with fitz.open(file_path) as doc:
+                yield from PDFAnalyzer._iter_analysis(doc, file_path, full, keep_details=False)
+        except Exception as e:
+            yield {"type": "error", "detail": f"Erro na análise do PDF: {str(e)}"}
+    
+    @staticmethod
+    def _iter_analysis(doc, file_path: str, full: bool = False,
+                       progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                       keep_details: bool = True) -> Iterator[Dict[str, Any]]:
+        """Núcleo da análise: gera os registros por página e, por último, a análise consolidada"""
+        total_pages = len(doc)
+        
+        # Documentos grandes: primeira e última página mais uma amostra estratificada
+        sampled = not full and total_pages > settings.MAX_PAGES_FOR_ANALYSIS
+        if sampled:
+            page_numbers = PageSampler.select(total_pages, settings.MAX_PAGES_FOR_ANALYSIS, PDFAnalyzer.SAMPLE_SEED)
+        else:
+            page_numbers = list(range(total_pages))
+        
+        yield {"type": "start", "total_pages": total_pages, "pages_to_analyze": len(page_numbers), "sampled": sampled}
+        
+        # Uma passada por página alimenta conteúdo, estrutura e qualidade
+        content_analysis = PDFAnalyzer._empty_content_analysis()
+        structure = PDFAnalyzer._analyze_structure(doc)
+        # Sem os detalhes, as métricas de cada página entram só nos totais
+        page_metrics = [] if keep_details else None
+        page_totals = QualityEngine.empty_page_totals()
+        sampled_pages = []
+        
+        for done, record in enumerate(PDFAnalyzer._iter_page_records(doc, file_path, page_numbers), 1):
+            PDFAnalyzer._add_page_content(content_analysis, record["content"], keep_details)
+            PDFAnalyzer._add_page_structure(structure, record, keep_details)
+            QualityEngine.add_page_metrics(page_totals, record["metrics"])
+            if keep_details:
+                page_metrics.append(record["metrics"])
+            if sampled:
+                sampled_pages.append(record["content"])
+            if progress_callback:
+                progress_callback("content", done, len(page_numbers))
+            yield {"type": "page", "page_number": record["content"]["page_number"], **record}
+        
+        if sampled:
+            PDFAnalyzer._extrapolate_content(content_analysis, sampled_pages, total_pages)
+        
+        if progress_callback:
+            progress_callback("quality", 0, total_pages)
+        analysis = PDFAnalyzer._assemble_analysis(
+            doc, file_path, content_analysis, structure, page_metrics, sampled, page_totals
+        )
+        
+        if progress_callback:
+            progress_callback("done", total_pages, total_pages)
+        
+        yield {"type": "summary", "analysis": analysis}
+    
+    @staticmethod
+    def _assemble_analysis(doc, file_path: str, content_analysis: Dict[str, Any], structure: Dict[str, Any],
+                           page_metrics: Optional[List[Dict[str, Any]]], sampled: bool,
+                           page_totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Monta a análise do documento a partir das partes consolidadas por página
+        
+        Sem page_metrics (análise em fluxo), a qualidade vem só dos totais.
+        """
+        analysis = {
+            "basic_info": PDFAnalyzer._get_basic_info(doc, file_path),
+            "content_analysis": content_analysis,
+            "structure_analysis": structure,
+            "quality_assessment": {},
+            "resources": ResourceInventory.build(doc, placements=False)["summary"],
+            "recommendations": [],
+            "sampled": sampled
+        }
+        
+        # Avaliação de qualidade
+        analysis["quality_assessment"] = QualityEngine.analyze_pdf_quality(
+            file_path, doc, page_metrics, len(doc), page_totals
+        )
+        
+        # Recomendações
+        analysis["recommendations"] = PDFAnalyzer._generate_recommendations(analysis)
+        return analysis
+    
+    @staticmethod
+    def derive_analysis(file_path: str, sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Análise de uma saída de edição de páginas a partir da análise do documento de origem
+        
+        Saídas de excluir, reordenar, extrair e duplicar páginas guardam no registro
+        o hash da origem e a página de origem de cada página. Se a origem tiver uma
+        análise completa em cache, os resultados por página são remapeados e apenas
+        os agregados do documento são recalculados.
+        """
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        page_map = FileRegistry.find_page_map(sha256)
+        if not page_map:
+            return None
+        
+        source = PDFAnalyzer.get_cached_analysis(page_map["source_hash"], full=True)
+        if source is None or source.get("sampled"):
+            return None
+        
+        details = source["content_analysis"]["page_details"]
+        layouts = source["structure_analysis"]["page_layouts"]
+        metrics = source["quality_assessment"]["content_analysis"]
+        pages = page_map["pages"]
+        if any(not 0 <= page < len(details) for page in pages):
+            return None
+        
+        with fitz.open(file_path) as doc:
+            if len(doc) != len(pages):
+                return None
             
-            doc.close()
-            return analysis
+            content_analysis = PDFAnalyzer._empty_content_analysis()
+            structure = PDFAnalyzer._analyze_structure(doc)
+            page_metrics = []
+            for page_num, source_page in enumerate(pages):
+                page = doc[page_num]
+                record = {
+                    "content": {**details[source_page], "page_number": page_num + 1},
+                    "metrics": {**metrics[source_page], "page_number": page_num + 1},
+                    "layout": {**layouts[source_page], "page": page_num + 1},
+                    # Links e anotações dependem do que foi copiado para a saída
+                    "has_links": bool(page.get_links()),
+                    "has_annotations": page.first_annot is not None
+                }
+                PDFAnalyzer._add_page_content(content_analysis, record["content"])
+                PDFAnalyzer._add_page_structure(structure, record)
+                page_metrics.append(record["metrics"])
             
-        except Exception as e:
-            raise Exception(f"Erro na análise do PDF: {str(e)}")
+            analysis = PDFAnalyzer._assemble_analysis(doc, file_path, content_analysis, structure, page_metrics, False)
+        
+        analysis["derived_from"] = page_map["source_hash"]
+        return analysis
+    
+    @staticmethod
+    def _iter_page_records(doc, file_path: str, page_numbers: List[int]) -> Iterator[Dict[str, Any]]:
+        """Resultados por página na ordem; documentos grandes em lotes entre processos"""
+        if AnalysisPool.should_shard(len(page_numbers)):
+            yield from AnalysisPool.imap_pages(PDFAnalyzer._analyze_page_range, file_path, page_numbers)
+        else:
+            for page_num in page_numbers:
+                yield PDFAnalyzer._analyze_page(doc[page_num], page_num)
+    
+    @staticmethod
+    def _replay_analysis(analysis: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Reproduz uma análise em cache no formato de fluxo"""
+        content = dict(analysis["content_analysis"])
+        structure = dict(analysis["structure_analysis"])
+        quality = dict(analysis["quality_assessment"])
+        page_details = content.pop("page_details", [])
+        layouts = {layout["page"]: layout for layout in structure.pop("page_layouts", [])}
+        metrics = {metric["page_number"]: metric for metric in quality.pop("content_analysis", [])}
+        quality.pop("page_sizes", None)
+        structure["page_layouts"] = []
+        content["page_details"] = []
+        
+        yield {
+            "type": "start",
+            "total_pages": analysis["basic_info"]["pages"],
+            "pages_to_analyze": len(page_details),
+            "sampled": analysis.get("sampled", False)
+        }
+        for page in page_details:
+            yield {
+                "type": "page",
+                "page_number": page["page_number"],
+                "content": page,
+                "metrics": metrics.get(page["page_number"]),
+                "layout": layouts.get(page["page_number"])
+            }
+        yield {
+            "type": "summary",
+            "analysis": {**analysis, "content_analysis": content, "structure_analysis": structure, "quality_assessment": quality}
+        }
     
     @staticmethod
     def _get_basic_info(doc, file_path: str) -> Dict[str, Any]:
@@ -59,9 +305,31 @@ class PDFAnalyzer:
         }
     
     @staticmethod
-    def _analyze_content(doc) -> Dict[str, Any]:
-        """Analisa o conteúdo do PDF"""
-        content_analysis = {
+    def _analyze_page(page, page_num: int) -> Dict[str, Any]:
+        """Resultados de uma página para as análises de conteúdo, estrutura e qualidade"""
+        features = PageFeatures(page, page_num)
+        return {
+            "content": PDFAnalyzer._analyze_page_content(page, page_num, features),
+            "metrics": QualityEngine.analyze_page_features(features),
+            "layout": {
+                "page": page_num + 1,
+                "width": features.width,
+                "height": features.height,
+                "rotation": features.rotation
+            },
+            "has_links": bool(page.get_links()),
+            "has_annotations": page.first_annot is not None
+        }
+    
+    @staticmethod
+    def _analyze_page_range(file_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+        """Tarefa do pool de processos: abre o próprio handle do documento"""
+        with fitz.open(file_path) as doc:
+            return [PDFAnalyzer._analyze_page(doc[page_num], page_num) for page_num in page_numbers]
+    
+    @staticmethod
+    def _empty_content_analysis() -> Dict[str, Any]:
+        return {
             "text_pages": 0,
             "image_pages": 0,
             "mixed_pages": 0,
@@ -69,65 +337,107 @@ class PDFAnalyzer:
             "tables_detected": 0,
             "page_details": []
         }
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            page_analysis = PDFAnalyzer._analyze_page_content(page, page_num)
+    
+    @staticmethod
+    def _add_page_content(content_analysis: Dict[str, Any], page_analysis: Dict[str, Any],
+                          keep_details: bool = True):
+        """Soma uma página à análise de conteúdo"""
+        if keep_details:
             content_analysis["page_details"].append(page_analysis)
-            
-            # Contar tipos de página
-            if page_analysis["content_type"] == "text":
-                content_analysis["text_pages"] += 1
-            elif page_analysis["content_type"] == "image":
-                content_analysis["image_pages"] += 1
-            else:
-                content_analysis["mixed_pages"] += 1
-            
-            content_analysis["tables_detected"] += page_analysis["tables_count"]
-            content_analysis["forms_detected"] += page_analysis["forms_count"]
         
-        return content_analysis
+        # Contar tipos de página
+        if page_analysis["content_type"] == "text":
+            content_analysis["text_pages"] += 1
+        elif page_analysis["content_type"] == "image":
+            content_analysis["image_pages"] += 1
+        else:
+            content_analysis["mixed_pages"] += 1
+        
+        content_analysis["tables_detected"] += page_analysis["tables_count"]
+        content_analysis["forms_detected"] += page_analysis["forms_count"]
     
     @staticmethod
-    def _analyze_page_content(page, page_num: int) -> Dict[str, Any]:
-        """Analisa o conteúdo de uma página específica"""
-        # Extrair texto
-        text = page.get_text()
-        text_blocks = page.get_text("blocks")
+    def _extrapolate_content(content_analysis: Dict[str, Any], pages: List[Dict[str, Any]],
+                             total_pages: int):
+        """Substitui as contagens da amostra por estimativas para o documento inteiro
+        
+        A primeira e a última página são contadas como estão; as demais páginas da
+        amostra representam o restante do documento. Cada estimativa leva um
+        intervalo de confiança de 95% em content_analysis["sampling"].
+        """
+        fixed, sampled = [pages[0], pages[-1]], pages[1:-1]
+        population = total_pages - len(fixed)
         
-        # Extrair imagens
-        image_list = page.get_images()
+        indicators = {
+            "text_pages": (lambda page: page["content_type"] == "text", total_pages),
+            "image_pages": (lambda page: page["content_type"] == "image", total_pages),
+            "mixed_pages": (lambda page: page["content_type"] not in ("text", "image"), total_pages),
+            "tables_detected": (lambda page: page["tables_count"], float("inf")),
+            "forms_detected": (lambda page: page["forms_count"], float("inf"))
+        }
+        
+        estimates = {}
+        for key, (value, upper_bound) in indicators.items():
+            estimates[key] = PageSampler.estimate_total(
+                [float(value(page)) for page in fixed],
+                [float(value(page)) for page in sampled],
+                population, upper_bound
+            )
+            content_analysis[key] = estimates[key]["estimate"]
+        
+        content_analysis["sampling"] = {
+            "method": "stratified",
+            "total_pages": total_pages,
+            "pages_analyzed": len(pages),
+            "analyzed_pages": [page["page_number"] for page in pages],
+            "confidence_level": 0.95,
+            "estimates": estimates
+        }
+    
+    @staticmethod
+    def _analyze_page_content(page, page_num: int, features: Optional[PageFeatures] = None) -> Dict[str, Any]:
+        """Analisa o conteúdo de uma página específica"""
+        if features is None:
+            features = PageFeatures(page, page_num)
         
         # Detectar tabelas
-        tables = QualityEngine.detect_tables_in_page(page)
+        tables = QualityEngine.detect_tables_in_page(page, features)
+        
+        # Classe da camada de texto (texto corrido, digitalizada, em branco...)
+        ocr = OCRClassifier.classify_features(page, features)
         
         # Determinar tipo de conteúdo
         content_type = PDFAnalyzer._determine_content_type(
-            len(text_blocks), len(image_list), len(tables), len(text)
+            features.text_block_count, features.image_count, len(tables), len(features.text), ocr["class"]
         )
         
         return {
             "page_number": page_num + 1,
             "content_type": content_type,
-            "text_blocks": len(text_blocks),
-            "images": len(image_list),
+            "ocr_class": ocr["class"],
+            "text_blocks": features.text_block_count,
+            "images": features.image_count,
             "tables_count": len(tables),
             "forms_count": PDFAnalyzer._count_form_elements(page),
-            "has_headers": PDFAnalyzer._detect_headers_footers(page, "header"),
-            "has_footers": PDFAnalyzer._detect_headers_footers(page, "footer"),
-            "word_count": len(text.split()),
+            "has_headers": PDFAnalyzer._detect_headers_footers(features, "header"),
+            "has_footers": PDFAnalyzer._detect_headers_footers(features, "footer"),
+            "word_count": features.word_count,
             "table_details": tables
         }
     
     @staticmethod
-    def _determine_content_type(text_blocks: int, images: int, tables: int, text_length: int) -> str:
+    def _determine_content_type(text_blocks: int, images: int, tables: int, text_length: int,
+                                ocr_class: Optional[str] = None) -> str:
         """Determina o tipo predominante de conteúdo na página"""
         if text_blocks > 10 and text_length > 500:
             return "text"
-        elif images >= 3 and text_blocks < 5:
+        elif ocr_class == "scanned" or (images >= 3 and text_blocks < 5):
             return "image"
         elif tables >= 1:
             return "table"
+        elif ocr_class == "text" and images <= 1:
+            # Poucos blocos, mas com camada de texto real (ex: parágrafos longos)
+            return "text"
         elif text_blocks <= 2 and images <= 1:
             return "form"
         else:
@@ -143,13 +453,12 @@ class PDFAnalyzer:
             return 0
     
     @staticmethod
-    def _detect_headers_footers(page, element_type: str) -> bool:
+    def _detect_headers_footers(features: PageFeatures, element_type: str) -> bool:
         """Detecta cabeçalhos ou rodapés na página"""
-        text_blocks = page.get_text("blocks")
-        page_height = page.rect.height
+        page_height = features.height
         
-        for block in text_blocks:
-            y_position = block[1]  # Coordenada y do bloco
+        for block in features.blocks:
+            y_position = block["bbox"][1]  # Coordenada y do bloco
             
             if element_type == "header" and y_position < 100:  # Topo da página
                 return True
@@ -160,7 +469,7 @@ class PDFAnalyzer:
     
     @staticmethod
     def _analyze_structure(doc) -> Dict[str, Any]:
-        """Analisa a estrutura do documento"""
+        """Estrutura do documento (sumário); as páginas entram com _add_page_structure"""
         structure = {
             "has_bookmarks": False,
             "has_links": False,
@@ -175,27 +484,18 @@ class PDFAnalyzer:
             structure["has_bookmarks"] = True
             structure["outline"] = toc
         
-        # Analisar layout das páginas
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            structure["page_layouts"].append({
-                "page": page_num + 1,
-                "width": page.rect.width,
-                "height": page.rect.height,
-                "rotation": page.rotation
-            })
-            
-            # Verificar links e anotações
-            links = page.get_links()
-            annotations = page.annots()
-            
-            if links:
-                structure["has_links"] = True
-            if annotations:
-                structure["has_annotations"] = True
-        
         return structure
     
+    @staticmethod
+    def _add_page_structure(structure: Dict[str, Any], record: Dict[str, Any], keep_details: bool = True):
+        """Layout da página, links e anotações"""
+        if keep_details:
+            structure["page_layouts"].append(record["layout"])
+        if record["has_links"]:
+            structure["has_links"] = True
+        if record["has_annotations"]:
+            structure["has_annotations"] = True
+    
     @staticmethod
     def _generate_recommendations(analysis: Dict[str, Any]) -> List[str]:
         """Gera recomendações baseadas na análise"""
@@ -212,6 +512,14 @@ class PDFAnalyzer:
         if content_analysis["image_pages"] > content_analysis["text_pages"]:
             recommendations.append("Documento com muitas imagens - use compressão para otimizar tamanho")
         
+        resources = analysis["resources"]
+        if basic_info["file_size"] and resources["image_bytes"] > basic_info["file_size"] * 0.5:
+            share = resources["image_bytes"] / basic_info["file_size"]
+            recommendations.append(f"Imagens ocupam {share:.0%} do arquivo - use compressão para reduzir o tamanho")
+        
+        if resources["fonts_not_embedded"]:
+            recommendations.append("Fontes não incorporadas - a exibição pode variar entre leitores; incorpore as fontes")
+        
         if content_analysis["tables_detected"] > 0:
             recommendations.append("Tabelas detectadas - use extração específica para melhor qualidade")
         
@@ -228,66 +536,80 @@ class PDFAnalyzer:
     async def enhanced_content_analysis(file_path: str) -> Dict[str, Any]:
         """Análise MUITO mais precisa do conteúdo"""
         try:
-            doc = fitz.open(file_path)
-            analysis = {
-                "content_types": [],
-                "needs_ocr": False,
-                "layout_complexity": "simple",
-                "recommended_processing": "standard"
-            }
+            # O lock do documento em cache é de thread: o percurso inteiro roda fora do loop
+            return await asyncio.to_thread(PDFAnalyzer._enhanced_content_analysis_file, file_path)
+        except Exception as e:
+            raise Exception(f"Erro na análise avançada: {str(e)}")
+    
+    @staticmethod
+    def _enhanced_content_analysis_file(file_path: str) -> Dict[str, Any]:
+        with DocumentCache.open(file_path) as doc:
+            return PDFAnalyzer._enhanced_content_analysis(doc)
+    
+    @staticmethod
+    def _enhanced_content_analysis(doc) -> Dict[str, Any]:
+        """Percorre as páginas do documento aberto para a análise avançada"""
+        analysis = {
+            "content_types": [],
+            "needs_ocr": False,
+            "pages_needing_ocr": [],
+            "layout_complexity": "simple",
+            "recommended_processing": "standard"
+        }
+        
+        for page_num in range(len(doc)):
+            page = doc[page_num]
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Análise AVANÇADA da página
-                page_analysis = await PDFAnalyzer._advanced_page_analysis(page, page_num)
-                analysis["content_types"].append(page_analysis)
-                
-                # Detectar se precisa de OCR
-                if page_analysis["text_quality"] < 0.3 and page_analysis["image_density"] > 0.5:
-                    analysis["needs_ocr"] = True
-                    analysis["recommended_processing"] = "ocr_enhanced"
-                
-                # Avaliar complexidade do layout
-                if page_analysis["table_count"] > 0 or page_analysis["column_count"] > 1:
-                    analysis["layout_complexity"] = "complex"
-                    analysis["recommended_processing"] = "layout_preservation"
+            # Análise AVANÇADA da página
+            page_analysis = PDFAnalyzer._advanced_page_analysis(page, page_num)
+            analysis["content_types"].append(page_analysis)
             
-            doc.close()
-            return analysis
+            # Detectar se precisa de OCR
+            if page_analysis["needs_ocr"]:
+                analysis["needs_ocr"] = True
+                analysis["pages_needing_ocr"].append(page_num + 1)
+                analysis["recommended_processing"] = "ocr_enhanced"
             
-        except Exception as e:
-            raise Exception(f"Erro na análise avançada: {str(e)}")
+            # Avaliar complexidade do layout
+            if page_analysis["table_count"] > 0 or page_analysis["column_count"] > 1:
+                analysis["layout_complexity"] = "complex"
+                analysis["recommended_processing"] = "layout_preservation"
+        
+        return analysis
     
     @staticmethod
-    async def _advanced_page_analysis(page, page_num: int) -> Dict[str, Any]:
+    def _advanced_page_analysis(page, page_num: int) -> Dict[str, Any]:
         """Análise MUITO detalhada de cada página"""
-        # Extrair texto com diferentes métodos
-        raw_text = page.get_text()
-        dict_text = page.get_text("dict")
+        # Uma única extração de texto alimenta todas as métricas da página
+        features = PageFeatures(page, page_num)
+        raw_text = features.text
         
         # Calcular qualidade do texto
-        text_quality = PDFAnalyzer._calculate_text_quality(raw_text, dict_text)
+        text_quality = PDFAnalyzer._calculate_text_quality(raw_text)
         
         # Detectar colunas
-        column_count = PDFAnalyzer._detect_columns(dict_text)
+        column_count = PDFAnalyzer._detect_columns(features.spans)
         
         # Analisar imagens
-        image_analysis = PDFAnalyzer._analyze_images(page.get_images())
+        image_analysis = PDFAnalyzer._analyze_images(features.images, features.width * features.height)
+        
+        # Classificar a necessidade de OCR
+        ocr = OCRClassifier.classify_features(page, features)
         
         return {
             "page_number": page_num + 1,
             "text_quality": text_quality,
-            "word_count": len(raw_text.split()),
+            "word_count": features.word_count,
             "column_count": column_count,
             "image_density": image_analysis["density"],
-            "table_count": len(QualityEngine.detect_tables_in_page(page)),
-            "needs_ocr": text_quality < 0.5,
+            "table_count": len(QualityEngine.detect_tables_in_page(page, features)),
+            "needs_ocr": ocr["needs_ocr"],
+            "ocr_class": ocr["class"],
             "recommended_dpi": 300 if image_analysis["needs_quality"] else 150
         }
     
     @staticmethod
-    def _calculate_text_quality(raw_text: str, dict_text: Dict) -> float:
+    def _calculate_text_quality(raw_text: str) -> float:
         """Calcula a qualidade do texto extraído"""
         if not raw_text.strip():
             return 0.0
@@ -309,44 +631,44 @@ class PDFAnalyzer:
         return max(0.0, min(1.0, quality))
     
     @staticmethod
-    def _detect_columns(text_dict: Dict) -> int:
+    def _detect_columns(spans: List[Dict[str, Any]]) -> int:
         """Detecta número de colunas no texto"""
         try:
-            blocks = text_dict.get("blocks", [])
-            x_positions = []
-            
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            x_positions.append(span["bbox"][0])  # Posição x
+            x_positions = [span["bbox"][0] for span in spans]  # Posição x
             
             if not x_positions:
                 return 1
             
-            # Agrupar posições x para detectar colunas
-            import numpy as np
-            from sklearn.cluster import KMeans
-            
-            x_array = np.array(x_positions).reshape(-1, 1)
-            kmeans = KMeans(n_clusters=min(3, len(set(x_positions))), random_state=42)
-            kmeans.fit(x_array)
-            
-            return len(set(kmeans.labels_))
+            # Agrupar posições x para detectar colunas (até 3)
+            return ColumnClustering.count_clusters(x_positions, max_clusters=3)
         except:
             return 1
     
     @staticmethod
-    def _analyze_images(images: List) -> Dict[str, Any]:
-        """Analisa as imagens do PDF"""
-        if not images:
-            return {"density": 0.0, "needs_quality": False}
+    def _analyze_images(images: List, page_area: float) -> Dict[str, Any]:
+        """Analisa as imagens da página (área coberta e resolução efetiva)"""
+        if not images or page_area <= 0:
+            return {"density": 0.0, "needs_quality": False, "total_images": 0, "max_dpi": 0.0}
         
-        total_size = sum(img[2] for img in images)  # Tamanho estimado
-        density = min(1.0, total_size / (1024 * 1024))  # Normalizar para 0-1
+        # Fração da página coberta por imagens (sobreposições contadas uma vez por imagem)
+        covered = sum(
+            max(0.0, img["bbox"][2] - img["bbox"][0]) * max(0.0, img["bbox"][3] - img["bbox"][1])
+            for img in images
+        )
+        density = min(1.0, covered / page_area)
+        
+        # DPI efetivo: pixels da imagem pelo tamanho desenhado em polegadas
+        max_dpi = max(
+            ResourceInventory.effective_dpi(
+                img["width"], img["height"],
+                (img["bbox"][2] - img["bbox"][0], 0, 0, img["bbox"][3] - img["bbox"][1])
+            )
+            for img in images
+        )
         
         return {
             "density": density,
-            "needs_quality": density > 0.5,  # Muitas imagens precisam de qualidade
-            "total_images": len(images)
+            "needs_quality": max_dpi >= 200,  # Imagens com detalhe que vale preservar
+            "total_images": len(images),
+            "max_dpi": round(max_dpi, 1)
         }
\ No newline at end of file
@@ -6,7 +6,12 @@ from typing import List, Dict, Any
 from fastapi import HTTPException
 from PIL import Image
 import io
-from app.config import settings
+import asyncio
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+from app.utils.analysis_cache import AnalysisCache
 
 class PreviewService:
     """Serviço para geração de pré-visualizações de PDFs"""
@@ -16,7 +21,16 @@ class PreviewService:
                              quality: str = "medium") -> Dict[str, Any]:
         """Gera pré-visualizações das páginas do PDF"""
         try:
-            doc = fitz.open(file_path)
+            # Documento em cache lido fora do loop de eventos (o lock do documento é de thread)
+            return await asyncio.to_thread(PreviewService._render_preview, file_path, pages, quality)
+        except Exception as e:
+            raise HTTPException(500, f"Erro ao gerar pré-visualização: {str(e)}")
+    
+    @staticmethod
+    def _render_preview(file_path: str, pages: List[int] = None, 
+                        quality: str = "medium") -> Dict[str, Any]:
+        """Renderiza as páginas e miniaturas (executar em thread)"""
+        with DocumentCache.open(file_path) as doc:
             total_pages = len(doc)
             
             # Definir páginas para pré-visualização
@@ -66,20 +80,15 @@ class PreviewService:
                 
                 # Gerar thumbnail (menor)
                 if len(preview_data["thumbnails"]) < 3:  # Máximo 3 thumbnails
-                    thumb_base64 = await PreviewService._generate_thumbnail(page)
+                    thumb_base64 = PreviewService._generate_thumbnail(page)
                     preview_data["thumbnails"].append({
                         "page": page_num + 1,
                         "thumbnail_url": f"data:image/png;base64,{thumb_base64}"
                     })
-            
-            doc.close()
-            return preview_data
-            
-        except Exception as e:
-            raise HTTPException(500, f"Erro ao gerar pré-visualização: {str(e)}")
+        return preview_data
     
     @staticmethod
-    async def _generate_thumbnail(page, size: tuple = (150, 200)) -> str:
+    def _generate_thumbnail(page, size: tuple = (150, 200)) -> str:
         """Gera thumbnail menor para a página"""
         try:
             # Matriz para thumbnail (zoom menor)
@@ -128,7 +137,16 @@ class PreviewService:
                                  format: str = "png", dpi: int = 150) -> List[Dict[str, Any]]:
         """Gera imagens de páginas específicas para download"""
         try:
-            doc = fitz.open(file_path)
+            return await asyncio.to_thread(PreviewService._render_page_images, file_path, pages, format, dpi)
+        except Exception as e:
+            raise HTTPException(500, f"Erro ao gerar imagens das páginas: {str(e)}")
+    
+    @staticmethod
+    def _render_page_images(file_path: str, pages: List[int], 
+                            format: str = "png", dpi: int = 150) -> List[Dict[str, Any]]:
+        """Renderiza e registra as imagens das páginas (executar em thread)"""
+        with DocumentCache.open(file_path) as doc:
+            parent_id = os.path.basename(file_path).split('.')[0]
             page_images = []
             
             for page_num in pages:
@@ -144,11 +162,15 @@ class PreviewService:
                     
                     # Salvar imagem temporariamente
                     image_id = str(uuid.uuid4())
-                    image_path = f"{settings.TEMP_DIR}/{image_id}.{format}"
+                    image_path = StorageLayout.temp_path(image_id, format)
                     
                     with open(image_path, "wb") as f:
                         f.write(img_data)
                     
+                    FileProcessor.register_output(
+                        image_path, parent_id, "export_image", kind="image", media_type=f"image/{format}"
+                    )
+                    
                     page_images.append({
                         "page_number": page_num,
                         "image_id": image_id,
@@ -156,19 +178,23 @@ class PreviewService:
                         "file_path": image_path,
                         "file_size": len(img_data)
                     })
-            
-            doc.close()
-            return page_images
-            
-        except Exception as e:
-            raise HTTPException(500, f"Erro ao gerar imagens das páginas: {str(e)}")
+        return page_images
     
     @staticmethod
     async def extract_text_preview(file_path: str, pages: List[int] = None, 
                                  max_chars: int = 1000) -> Dict[str, Any]:
         """Extrai pré-visualização de texto das páginas"""
         try:
-            doc = fitz.open(file_path)
+            return await asyncio.to_thread(PreviewService._read_text_preview, file_path, pages, max_chars)
+        except Exception as e:
+            raise HTTPException(500, f"Erro ao extrair pré-visualização de texto: {str(e)}")
+    
+    @staticmethod
+    def _read_text_preview(file_path: str, pages: List[int] = None, 
+                           max_chars: int = 1000) -> Dict[str, Any]:
+        """Lê o texto das páginas (executar em thread)"""
+        sha256 = AnalysisCache.content_hash_for(file_path)
+        with DocumentCache.open(file_path) as doc:
             total_pages = len(doc)
             
             if not pages:
@@ -183,8 +209,14 @@ class PreviewService:
             }
             
             for page_num in pages:
-                page = doc[page_num]
-                text = page.get_text()
+                # Texto da página compartilhado entre workers pelo hash do conteúdo
+                text_key = f"{sha256}:{page_num}"
+                cached_text = SharedCache.get("text", text_key)
+                if cached_text is not None:
+                    text = cached_text.decode("utf-8")
+                else:
+                    text = doc[page_num].get_text()
+                    SharedCache.set("text", text_key, text.encode("utf-8"))
                 
                 # Limitar tamanho do texto
                 preview_text = text[:max_chars] + "..." if len(text) > max_chars else text
@@ -200,12 +232,7 @@ class PreviewService:
                     "line_count": len(lines),
                     "has_tables": PreviewService._detect_tables_in_text(text)
                 })
-            
-            doc.close()
-            return text_preview
-            
-        except Exception as e:
-            raise HTTPException(500, f"Erro ao extrair pré-visualização de texto: {str(e)}")
+        return text_preview
     
     @staticmethod
     def _detect_tables_in_text(text: str) -> bool:
@@ -1,82 +1,121 @@
 import fitz
 import os
 import cv2
-import numpy as np
 from PIL import Image
 import io
-from typing import Dict, Any, List, Tuple
-from sklearn.cluster import KMeans
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Optional
 import pytesseract
 from app.config import settings
+from app.services.core.page_features import PageFeatures
+from app.services.core.table_detector import TableDetector
+from app.services.core.analysis_pool import AnalysisPool
+from app.utils.document_cache import DocumentCache
 
 class QualityEngine:
     """Motor de análise de qualidade para garantir conversões precisas"""
     
     @staticmethod
-    def analyze_pdf_quality(file_path: str) -> Dict[str, Any]:
-        """Analisa a qualidade do PDF e retorna métricas detalhadas"""
+    def analyze_pdf_quality(file_path: str, doc=None,
+                            page_metrics: Optional[List[Dict[str, Any]]] = None,
+                            total_pages: Optional[int] = None,
+                            page_totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisa a qualidade do PDF e retorna métricas detalhadas
+
+        Quem já percorreu as páginas (ex: PDFAnalyzer) passa o documento aberto
+        e as métricas de analyze_page_features, evitando reabrir o arquivo.
+        Com métricas de apenas uma amostra, total_pages informa o total real.
+        Na análise em fluxo, page_totals (somas de add_page_metrics) substitui a
+        lista de métricas e o resultado sai sem as listas por página.
+        """
         try:
-            doc = fitz.open(file_path)
-            metrics = {
-                "total_pages": len(doc),
-                "file_size": os.path.getsize(file_path),
-                "page_sizes": [],
-                "content_analysis": [],
-                "text_density": 0,
-                "image_count": 0,
-                "table_count": 0,
-                "form_count": 0,
-                "quality_score": 0
-            }
+            if page_metrics is None and page_totals is None:
+                if doc is None:
+                    with DocumentCache.open(file_path) as cached_doc:
+                        total_pages = len(cached_doc)
+                        if not AnalysisPool.should_shard(total_pages):
+                            return QualityEngine.analyze_pdf_quality(file_path, cached_doc)
+                    # Documentos grandes: métricas calculadas em lotes entre processos
+                    page_metrics = AnalysisPool.map_pages(
+                        QualityEngine._page_metrics_range, file_path, list(range(total_pages))
+                    )
+                else:
+                    page_metrics = [
+                        QualityEngine.analyze_page_features(features)
+                        for features in PageFeatures.iter_document(doc)
+                    ]
             
-            total_text_blocks = 0
-            total_images = 0
+            if page_totals is None:
+                page_totals = QualityEngine.empty_page_totals()
+                for page_metric in page_metrics:
+                    QualityEngine.add_page_metrics(page_totals, page_metric)
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_metrics = QualityEngine._analyze_page(page, page_num)
-                metrics["content_analysis"].append(page_metrics)
-                metrics["page_sizes"].append({
-                    "width": page.rect.width,
-                    "height": page.rect.height
-                })
-                total_text_blocks += page_metrics["text_blocks"]
-                total_images += page_metrics["images"]
+            metrics = {
+                "total_pages": total_pages or page_totals["pages"],
+                "file_size": os.path.getsize(file_path)
+            }
+            if page_metrics is not None:
+                metrics["page_sizes"] = [
+                    {"width": page_metric["width"], "height": page_metric["height"]}
+                    for page_metric in page_metrics
+                ]
+                metrics["content_analysis"] = list(page_metrics)
             
             # Calcular métricas gerais
-            metrics["text_density"] = total_text_blocks / len(doc) if doc else 0
-            metrics["image_count"] = total_images
-            metrics["quality_score"] = QualityEngine._calculate_quality_score(metrics)
+            metrics.update({
+                "page_size_counts": [
+                    {"width": width, "height": height, "pages": pages}
+                    for (width, height), pages in page_totals["page_sizes"].items()
+                ],
+                "text_density": page_totals["text_blocks"] / page_totals["pages"] if page_totals["pages"] else 0,
+                "image_count": page_totals["images"],
+                "table_count": 0,
+                "form_count": 0
+            })
+            metrics["quality_score"] = QualityEngine._calculate_quality_score(metrics, page_totals["page_sizes"])
             
-            doc.close()
             return metrics
             
         except Exception as e:
             raise Exception(f"Erro na análise de qualidade: {str(e)}")
     
     @staticmethod
-    def _analyze_page(page, page_num: int) -> Dict[str, Any]:
-        """Analisa uma página individual do PDF"""
+    def empty_page_totals() -> Dict[str, Any]:
+        """Somas das métricas por página, com memória constante no número de páginas"""
+        return {"pages": 0, "text_blocks": 0, "images": 0, "page_sizes": Counter()}
+    
+    @staticmethod
+    def add_page_metrics(page_totals: Dict[str, Any], page_metric: Dict[str, Any]):
+        """Soma as métricas de uma página (de analyze_page_features) aos totais"""
+        page_totals["pages"] += 1
+        page_totals["text_blocks"] += page_metric["text_blocks"]
+        page_totals["images"] += page_metric["images"]
+        page_totals["page_sizes"][(page_metric["width"], page_metric["height"])] += 1
+    
+    @staticmethod
+    def _page_metrics_range(file_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+        """Tarefa do pool de processos: métricas das páginas com handle próprio do documento"""
+        with fitz.open(file_path) as doc:
+            return [
+                QualityEngine.analyze_page_features(PageFeatures(doc[page_num], page_num))
+                for page_num in page_numbers
+            ]
+    
+    @staticmethod
+    def analyze_page_features(features: PageFeatures) -> Dict[str, Any]:
+        """Analisa uma página individual a partir das características já extraídas"""
         page_metrics = {
-            "page_number": page_num + 1,
-            "text_blocks": 0,
-            "images": 0,
+            "page_number": features.page_number,
+            "width": features.width,
+            "height": features.height,
+            "text_blocks": features.text_block_count,
+            "images": features.image_count,
             "tables": 0,
             "forms": 0,
             "resolution": 0,
             "content_type": "unknown"
         }
         
-        # Extrair texto
-        text = page.get_text()
-        blocks = page.get_text("dict")["blocks"]
-        
-        for block in blocks:
-            if block["type"] == 0:  # Text block
-                page_metrics["text_blocks"] += 1
-            elif block["type"] == 1:  # Image block
-                page_metrics["images"] += 1
-        
         # Determinar tipo de conteúdo predominante
         if page_metrics["text_blocks"] > 5 and page_metrics["images"] < 3:
             page_metrics["content_type"] = "text_document"
@@ -88,8 +127,12 @@ class QualityEngine:
         return page_metrics
     
     @staticmethod
-    def _calculate_quality_score(metrics: Dict[str, Any]) -> float:
-        """Calcula score de qualidade baseado em múltiplos fatores"""
+    def _calculate_quality_score(metrics: Dict[str, Any], page_sizes: Counter) -> float:
+        """Calcula score de qualidade baseado em múltiplos fatores
+
+        page_sizes conta as páginas por (largura, altura), na ordem em que cada
+        tamanho apareceu; o primeiro é o da primeira página.
+        """
         score = 100.0
         
         # Penalizar por poucas páginas (possível documento vazio)
@@ -101,107 +144,27 @@ class QualityEngine:
             score -= 20
         
         # Verificar consistência de tamanho de página
-        page_sizes = metrics["page_sizes"]
-        if len(page_sizes) > 1:
-            first_size = page_sizes[0]
-            for size in page_sizes[1:]:
-                if abs(size["width"] - first_size["width"]) > 50 or abs(size["height"] - first_size["height"]) > 50:
-                    score -= 10
+        if page_sizes:
+            first_width, first_height = next(iter(page_sizes))
+            for (width, height), pages in page_sizes.items():
+                if abs(width - first_width) > 50 or abs(height - first_height) > 50:
+                    score -= 10 * pages
         
         return max(0, min(100, score))
     
     @staticmethod
-    def detect_tables_in_page(page) -> List[Dict[str, Any]]:
-        """Detecta tabelas em uma página usando análise de layout"""
+    def detect_tables_in_page(page, features: Optional[PageFeatures] = None,
+                              include_cells: bool = False) -> List[Dict[str, Any]]:
+        """Detecta tabelas na página (várias regiões, com caixa e, opcionalmente, células)"""
         try:
-            tables = []
-            text_blocks = page.get_text("dict")["blocks"]
-            
-            # Agrupar blocos de texto que podem formar tabelas
-            text_elements = []
-            for block in text_blocks:
-                if block["type"] == 0:  # Text block
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            text_elements.append({
-                                "text": span["text"],
-                                "bbox": span["bbox"],
-                                "font_size": span["size"]
-                            })
-            
-            # Análise de padrões tabulares
-            table_candidates = QualityEngine._find_table_candidates(text_elements)
-            tables.extend(table_candidates)
+            if features is None:
+                features = PageFeatures(page, page.number)
             
-            return tables
+            return TableDetector.detect(features.spans, include_cells)
             
         except Exception as e:
             return []
     
-    @staticmethod
-    def _find_table_candidates(text_elements: List[Dict]) -> List[Dict]:
-        """Encontra candidatos a tabelas baseado em alinhamento e padrões"""
-        if len(text_elements) < 4:
-            return []
-        
-        # Agrupar por linhas baseado na coordenada y
-        y_coords = sorted(list(set([elem["bbox"][1] for elem in text_elements])))
-        row_tolerance = 5  # pixels
-        
-        rows = []
-        current_row = []
-        current_y = y_coords[0]
-        
-        for elem in sorted(text_elements, key=lambda x: x["bbox"][1]):
-            if abs(elem["bbox"][1] - current_y) <= row_tolerance:
-                current_row.append(elem)
-            else:
-                if current_row:
-                    rows.append(sorted(current_row, key=lambda x: x["bbox"][0]))
-                    current_row = [elem]
-                    current_y = elem["bbox"][1]
-        
-        if current_row:
-            rows.append(sorted(current_row, key=lambda x: x["bbox"][0]))
-        
-        # Verificar padrões tabulares (múltiplas linhas com elementos alinhados)
-        tables = []
-        if len(rows) >= 3:  # Mínimo de 3 linhas para considerar como tabela
-            # Verificar alinhamento vertical consistente
-            column_positions = QualityEngine._detect_columns(rows)
-            if len(column_positions) >= 2:
-                tables.append({
-                    "rows": len(rows),
-                    "columns": len(column_positions),
-                    "confidence": 0.8
-                })
-        
-        return tables
-    
-    @staticmethod
-    def _detect_columns(rows: List[List[Dict]]) -> List[float]:
-        """Detecta posições de colunas baseado no alinhamento do texto"""
-        all_x_positions = []
-        for row in rows:
-            for elem in row:
-                all_x_positions.append(elem["bbox"][0])
-        
-        if not all_x_positions:
-            return []
-        
-        # Usar K-means para agrupar posições x similares
-        positions_array = np.array(all_x_positions).reshape(-1, 1)
-        n_clusters = min(10, len(set(all_x_positions)))
-        
-        if n_clusters < 2:
-            return []
-        
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        kmeans.fit(positions_array)
-        
-        # Retornar centros dos clusters ordenados
-        return sorted([float(center[0]) for center in kmeans.cluster_centers_])
-    
     @staticmethod
     async def enhance_text_quality(text: str) -> str:
         """Melhora qualidade do texto extraído"""
@@ -0,0 +1,237 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+
+# Faixas de resolução efetiva (DPI na página) usadas no resumo
+LOW_DPI = 150
+HIGH_DPI = 300
+
+NAME_PATTERN = re.compile(r"/([^\s/\[\]<>()]+)")
+REF_PATTERN = re.compile(r"(\d+)\s+0\s+R")
+SUBSET_PATTERN = re.compile(r"^[A-Z]{6}\+")
+
+# Fontes descendentes de Type0 aparecem no resumo pela fonte composta
+DESCENDANT_FONT_TYPES = {"CIDFontType0", "CIDFontType2"}
+
+class ResourceInventory:
+    """Inventário de imagens e fontes do documento lido da tabela de xrefs
+
+    Cada objeto é visitado uma vez e apenas as chaves do dicionário são lidas
+    (dimensões, bpc, espaço de cor, filtro, /Length, descritor da fonte); nenhum
+    stream é decodificado. As páginas de cada recurso vêm dos dicionários de
+    recursos. A resolução efetiva exige a posição da imagem na página, por isso
+    só é calculada com placements=True, que interpreta o conteúdo das páginas
+    (mas continua sem decodificar as imagens).
+    """
+
+    VERSION = "1"
+
+    @staticmethod
+    def for_file(file_path: str, placements: bool = True,
+                 sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Inventário do arquivo, reaproveitado pelo hash do conteúdo"""
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        cache_key = f"{sha256}:{ResourceInventory.VERSION}:{int(placements)}"
+        inventory = SharedCache.get_json("inventory", cache_key)
+        if inventory is None:
+            with DocumentCache.open(file_path) as doc:
+                inventory = ResourceInventory.build(doc, placements)
+            SharedCache.set_json("inventory", cache_key, inventory)
+        return inventory
+
+    @staticmethod
+    def build(doc, placements: bool = True) -> Dict[str, Any]:
+        """Imagens e fontes do documento aberto, com um resumo para decisões rápidas"""
+        images: Dict[int, Dict[str, Any]] = {}
+        fonts: Dict[int, Dict[str, Any]] = {}
+
+        for xref in range(1, doc.xref_length()):
+            subtype = ResourceInventory._name(doc, xref, "Subtype")
+            if subtype == "Image":
+                images[xref] = ResourceInventory._image_entry(doc, xref)
+            elif ResourceInventory._name(doc, xref, "Type") == "Font" and subtype not in DESCENDANT_FONT_TYPES:
+                fonts[xref] = ResourceInventory._font_entry(doc, xref, subtype)
+
+        image_pages: Dict[int, set] = {}
+        font_pages: Dict[int, set] = {}
+        page_images: List[List[tuple]] = []
+        for page_num in range(len(doc)):
+            page_images.append(doc.get_page_images(page_num))
+            for item in page_images[-1]:
+                image_pages.setdefault(item[0], set()).add(page_num + 1)
+                # Máscaras (SMask) são imagens, mas não são desenhadas sozinhas
+                if item[1]:
+                    images.get(item[1], {})["is_mask"] = True
+            for item in doc.get_page_fonts(page_num):
+                font_pages.setdefault(item[0], set()).add(page_num + 1)
+
+        for xref, entry in images.items():
+            entry["pages"] = sorted(image_pages.get(xref, ()))
+        for xref, entry in fonts.items():
+            entry["pages"] = sorted(font_pages.get(xref, ()))
+
+        if placements:
+            ResourceInventory._add_placements(doc, images, page_images)
+
+        image_list = [images[xref] for xref in sorted(images)]
+        font_list = [fonts[xref] for xref in sorted(fonts)]
+        return {
+            "images": image_list,
+            "fonts": font_list,
+            "summary": ResourceInventory._summarize(doc, image_list, font_list, image_pages, font_pages, placements)
+        }
+
+    @staticmethod
+    def effective_dpi(width: int, height: int, transform: Tuple[float, ...]) -> float:
+        """Resolução efetiva da imagem como desenhada (menor entre os dois eixos)
+
+        A matriz de transformação leva o quadrado unitário da imagem para a
+        página; o comprimento de cada eixo é o tamanho desenhado em pontos.
+        """
+        a, b, c, d = transform[:4]
+        placed_width = math.hypot(a, b) / 72
+        placed_height = math.hypot(c, d) / 72
+        if placed_width <= 0 or placed_height <= 0:
+            return 0.0
+        return min(width / placed_width, height / placed_height)
+
+    @staticmethod
+    def _image_entry(doc, xref: int) -> Dict[str, Any]:
+        """Metadados da imagem a partir do dicionário do stream"""
+        return {
+            "xref": xref,
+            "width": ResourceInventory._int(doc, xref, "Width"),
+            "height": ResourceInventory._int(doc, xref, "Height"),
+            "bpc": ResourceInventory._int(doc, xref, "BitsPerComponent"),
+            "colorspace": ResourceInventory._colorspace(doc, xref),
+            "filters": ResourceInventory._names(doc, xref, "Filter"),
+            "stream_length": ResourceInventory._int(doc, xref, "Length"),
+            "has_mask": doc.xref_get_key(xref, "SMask")[0] != "null" or doc.xref_get_key(xref, "Mask")[0] != "null",
+            "is_mask": doc.xref_get_key(xref, "ImageMask")[1] == "true"
+        }
+
+    @staticmethod
+    def _font_entry(doc, xref: int, subtype: Optional[str]) -> Dict[str, Any]:
+        """Tipo, nome e incorporação da fonte (via descritor ou fonte descendente)"""
+        base_font = ResourceInventory._name(doc, xref, "BaseFont") or ""
+        descriptor_owner = xref
+        if subtype == "Type0":
+            descendants = ResourceInventory._resolve(doc, doc.xref_get_key(xref, "DescendantFonts"))
+            refs = REF_PATTERN.findall(descendants[1])
+            if refs:
+                descriptor_owner = int(refs[0])
+
+        return {
+            "xref": xref,
+            "name": base_font,
+            "type": subtype,
+            # Type3 define os glifos no próprio PDF
+            "embedded": subtype == "Type3" or ResourceInventory._has_font_file(doc, descriptor_owner),
+            "subset": bool(SUBSET_PATTERN.match(base_font))
+        }
+
+    @staticmethod
+    def _has_font_file(doc, xref: int) -> bool:
+        kind, value = doc.xref_get_key(xref, "FontDescriptor")
+        if kind != "xref":
+            return False
+        descriptor = int(value.split()[0])
+        return any(doc.xref_get_key(descriptor, key)[0] != "null" for key in ("FontFile", "FontFile2", "FontFile3"))
+
+    @staticmethod
+    def _add_placements(doc, images: Dict[int, Dict[str, Any]], page_images: List[List[tuple]]):
+        """Número de posicionamentos e faixa de DPI efetivo de cada imagem
+
+        get_image_info(xrefs=True) decodifica as imagens para identificá-las, então
+        cada posicionamento é associado ao xref da página com as mesmas dimensões
+        em pixels. Entre imagens de mesmas dimensões a escolha não altera o DPI.
+        """
+        for entry in images.values():
+            entry["placements"] = 0
+            entry["min_dpi"] = entry["max_dpi"] = None
+
+        for page_num, items in enumerate(page_images):
+            if not items:
+                continue
+            by_size: Dict[Tuple[int, int], List[int]] = {}
+            for item in items:
+                by_size.setdefault((item[2], item[3]), []).append(item[0])
+            seen: Counter = Counter()
+
+            for info in doc[page_num].get_image_info():
+                size = (info["width"], info["height"])
+                candidates = by_size.get(size)
+                if not candidates:
+                    # Imagens inline não têm xref
+                    continue
+                entry = images.get(candidates[seen[size] % len(candidates)])
+                seen[size] += 1
+                if entry is None:
+                    continue
+                dpi = round(ResourceInventory.effective_dpi(info["width"], info["height"], info["transform"]), 1)
+                entry["placements"] += 1
+                entry["min_dpi"] = dpi if entry["min_dpi"] is None else min(entry["min_dpi"], dpi)
+                entry["max_dpi"] = dpi if entry["max_dpi"] is None else max(entry["max_dpi"], dpi)
+
+    @staticmethod
+    def _summarize(doc, images: List[Dict[str, Any]], fonts: List[Dict[str, Any]],
+                   image_pages: Dict[int, set], font_pages: Dict[int, set], placements: bool) -> Dict[str, Any]:
+        """Totais usados pelas decisões de compressão, OCR e qualidade"""
+        drawn = [image for image in images if not image.get("is_mask")]
+        pages_with_images = set().union(*image_pages.values()) if image_pages else set()
+        pages_with_fonts = set().union(*font_pages.values()) if font_pages else set()
+
+        summary = {
+            "image_count": len(drawn),
+            "image_bytes": sum(image["stream_length"] or 0 for image in images),
+            "image_filters": dict(Counter(f for image in drawn for f in image["filters"] or ["none"])),
+            "pages_with_images": len(pages_with_images),
+            # Páginas com imagens e sem nenhuma fonte: candidatas a digitalização
+            "image_only_pages": sorted(pages_with_images - pages_with_fonts),
+            "font_count": len(fonts),
+            "fonts_embedded": sum(1 for font in fonts if font["embedded"]),
+            "fonts_not_embedded": [font["name"] for font in fonts if not font["embedded"]],
+            "fonts_subset": sum(1 for font in fonts if font["subset"]),
+            "font_types": dict(Counter(font["type"] or "unknown" for font in fonts))
+        }
+        if placements:
+            placed = [image for image in drawn if image["placements"]]
+            summary["low_dpi_images"] = sum(1 for image in placed if image["min_dpi"] < LOW_DPI)
+            summary["high_dpi_images"] = sum(1 for image in placed if image["min_dpi"] > HIGH_DPI)
+        return summary
+
+    @staticmethod
+    def _resolve(doc, item: Tuple[str, str]) -> Tuple[str, str]:
+        """Segue uma referência indireta (ex: /Length 12 0 R) até o valor"""
+        kind, value = item
+        if kind == "xref":
+            return "object", doc.xref_object(int(value.split()[0]), compressed=True).strip()
+        return kind, value
+
+    @staticmethod
+    def _int(doc, xref: int, key: str) -> Optional[int]:
+        kind, value = ResourceInventory._resolve(doc, doc.xref_get_key(xref, key))
+        try:
+            return int(float(value)) if kind != "null" else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _names(doc, xref: int, key: str) -> List[str]:
+        kind, value = ResourceInventory._resolve(doc, doc.xref_get_key(xref, key))
+        return NAME_PATTERN.findall(value) if kind != "null" else []
+
+    @staticmethod
+    def _name(doc, xref: int, key: str) -> Optional[str]:
+        kind, value = doc.xref_get_key(xref, key)
+        return value[1:] if kind == "name" else None
+
+    @staticmethod
+    def _colorspace(doc, xref: int) -> Optional[str]:
+        """Família do espaço de cor (ex: DeviceRGB, ICCBased, Indexed)"""
+        names = ResourceInventory._names(doc, xref, "ColorSpace")
+        return names[0] if names else None
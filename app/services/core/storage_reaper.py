@@ -0,0 +1,183 @@
+import os
+import time
+import fcntl
+import asyncio
+from typing import Dict, Any, List, Optional
+from app.config import settings
+from app.utils.file_registry import FileRegistry
+from app.utils.content_store import ContentStore
+from app.utils.upload_sessions import UploadSessionManager
+
+class StorageReaper:
+    """Limpeza contínua em segundo plano: expiração pelo índice do registro e cota de disco com LRU
+
+    Cada worker do uvicorn inicia o loop, mas só o que obtém a trava do
+    arquivo REAPER_LOCK_FILE (flock) executa os ciclos; se ele morrer, o
+    sistema libera a trava e outro worker assume no intervalo seguinte.
+    """
+
+    # Saídas derivadas podem ser regeneradas: são despejadas antes dos uploads
+    EVICTION_ORDER = ["image", "output", "upload"]
+
+    _task: Optional[asyncio.Task] = None
+    _lease_fd: Optional[int] = None
+    _last_run: Dict[str, Any] = {}
+
+    @staticmethod
+    def _remove(records: List[Dict[str, Any]]):
+        """Apaga os arquivos e libera os blobs dos uploads removidos"""
+        FileRegistry.purge(records)
+        for record in records:
+            if record["kind"] == "upload":
+                try:
+                    ContentStore.release(record["file_id"], record["content_hash"])
+                except Exception:
+                    pass  # Ignora erros na limpeza
+
+    @staticmethod
+    def reap_expired(max_batches: Optional[int] = None, max_age_hours: Optional[float] = None,
+                     pause: float = 0) -> int:
+        """Remove arquivos vencidos em lotes, na ordem de expiração"""
+        created_before = time.time() - max_age_hours * 3600 if max_age_hours else None
+        removed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            records = FileRegistry.expired(time.time(), settings.REAPER_BATCH_SIZE, created_before)
+            if not records:
+                break
+            StorageReaper._remove(records)
+            removed += len(records)
+            batches += 1
+            if pause:
+                time.sleep(pause)  # Cede I/O às requisições entre lotes
+        return removed
+
+    @staticmethod
+    def enforce_quota(quota_bytes: Optional[int] = None, pause: float = 0) -> int:
+        """Despeja os arquivos menos acessados até o total registrado caber na cota"""
+        quota_bytes = settings.STORAGE_QUOTA_BYTES if quota_bytes is None else quota_bytes
+        if not quota_bytes:
+            return 0
+
+        excess = FileRegistry.total_size() - quota_bytes
+        removed = 0
+        for kind in StorageReaper.EVICTION_ORDER:
+            while excess > 0:
+                records = FileRegistry.least_recently_used(kind, settings.REAPER_BATCH_SIZE)
+                if not records:
+                    break
+                # Apenas o necessário para voltar abaixo da cota
+                batch = []
+                for record in records:
+                    if excess <= 0:
+                        break
+                    batch.append(record)
+                    excess -= record["size"]
+                StorageReaper._remove(batch)
+                removed += len(batch)
+                # Aliases de deduplicação liberam espaço só com o último: medir de novo
+                excess = FileRegistry.total_size() - quota_bytes
+                if pause:
+                    time.sleep(pause)
+        return removed
+
+    @staticmethod
+    def sweep_stale_sessions(max_age_hours: Optional[float] = None) -> int:
+        """Remove sessões de upload e estados de análise abandonados"""
+        max_age_hours = settings.FILE_TTL_HOURS if max_age_hours is None else max_age_hours
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        if os.path.isdir(settings.UPLOAD_SESSION_DIR):
+            removed += UploadSessionManager.sweep_stale(cutoff)
+        if os.path.isdir(settings.ANALYSIS_JOBS_DIR):
+            with os.scandir(settings.ANALYSIS_JOBS_DIR) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                            removed += 1
+                    except OSError:
+                        pass  # Ignora erros na limpeza
+        return removed
+
+    @staticmethod
+    def run_once(max_batches: Optional[int] = None, max_age_hours: Optional[float] = None,
+                 pause: float = 0) -> Dict[str, Any]:
+        """Executa um ciclo completo de limpeza"""
+        started = time.time()
+        result = {
+            "expired_removed": StorageReaper.reap_expired(max_batches, max_age_hours, pause),
+            "evicted": StorageReaper.enforce_quota(pause=pause),
+            "stale_sessions_removed": StorageReaper.sweep_stale_sessions(max_age_hours),
+            "registered_bytes": FileRegistry.total_size(),
+            "quota_bytes": settings.STORAGE_QUOTA_BYTES or None,
+            "duration_seconds": round(time.time() - started, 3),
+            "finished_at": time.time()
+        }
+        StorageReaper._last_run = result
+        return result
+
+    @staticmethod
+    def _acquire_lease() -> bool:
+        """Tenta obter (ou confirma) a trava exclusiva do reaper entre workers"""
+        if StorageReaper._lease_fd is not None:
+            return True
+        fd = os.open(settings.REAPER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        StorageReaper._lease_fd = fd
+        return True
+
+    @staticmethod
+    def _release_lease():
+        """Libera a trava para outro worker assumir"""
+        fd = StorageReaper._lease_fd
+        StorageReaper._lease_fd = None
+        if fd is not None:
+            os.close(fd)  # Fechar o descritor libera a trava
+
+    @staticmethod
+    async def _loop():
+        """Ciclos periódicos fora do loop de eventos, em lotes com pausas"""
+        while True:
+            try:
+                if StorageReaper._acquire_lease():
+                    await asyncio.to_thread(
+                        StorageReaper.run_once, None, None, settings.REAPER_BATCH_PAUSE_SECONDS
+                    )
+            except Exception:
+                pass  # Um ciclo com falha não interrompe o reaper
+            await asyncio.sleep(settings.REAPER_INTERVAL_SECONDS)
+
+    @staticmethod
+    def start():
+        """Inicia o reaper em segundo plano (chamado no startup da aplicação)"""
+        if settings.REAPER_ENABLED and StorageReaper._task is None:
+            StorageReaper._task = asyncio.create_task(StorageReaper._loop())
+
+    @staticmethod
+    async def stop():
+        """Interrompe o reaper (chamado no shutdown da aplicação)"""
+        task = StorageReaper._task
+        StorageReaper._task = None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        StorageReaper._release_lease()
+
+    @staticmethod
+    def get_status() -> Dict[str, Any]:
+        """Estado do reaper e resultado do último ciclo"""
+        return {
+            "enabled": settings.REAPER_ENABLED,
+            "running": StorageReaper._task is not None and not StorageReaper._task.done(),
+            "leader": StorageReaper._lease_fd is not None,
+            "interval_seconds": settings.REAPER_INTERVAL_SECONDS,
+            "last_run": StorageReaper._last_run or None
+        }
@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Dict, Any, List, Sequence
+
+class TableDetector:
+    """Detecção de tabelas com operações vetorizadas sobre as caixas dos spans da página
+
+    Os spans viram arrays NumPy; linhas, células e colunas saem de ordenações,
+    diferenças e reduções por grupo, sem laços em Python por span. Uma página
+    pode ter várias regiões tabulares, cada uma com sua caixa e grade de células.
+    """
+
+    ROW_TOLERANCE = 5.0          # Salto máximo de y0 (pt) dentro da mesma linha
+    CELL_GAP = 8.0               # Espaço horizontal (pt) que separa duas células
+    REGION_GAP_FACTOR = 2.0      # Espaço entre linhas (em alturas de linha) que encerra a região
+    MIN_ROWS = 3
+    MIN_COLUMNS = 2
+    MAX_MEAN_CELL_CHARS = 40     # Células longas indicam colunas de texto corrido, não tabela
+
+    @staticmethod
+    def detect(spans: Sequence[Dict[str, Any]], include_cells: bool = False) -> List[Dict[str, Any]]:
+        """Regiões tabulares da página (linhas, colunas, confiança, caixa e, opcionalmente, células)"""
+        if len(spans) < 4:
+            return []
+
+        boxes = np.array([span["bbox"] for span in spans], dtype=float)
+        lengths = np.array([len(span["text"].strip()) for span in spans], dtype=float)
+        count = len(boxes)
+
+        # Linhas: ordenar por y0 e quebrar onde o salto vertical passa da tolerância
+        by_y = np.argsort(boxes[:, 1], kind="stable")
+        row_of = np.empty(count, dtype=np.int64)
+        row_of[by_y] = np.concatenate(([0], np.cumsum(np.diff(boxes[by_y, 1]) > TableDetector.ROW_TOLERANCE)))
+
+        # Células: dentro de cada linha, spans separados por mais de CELL_GAP
+        order = np.lexsort((boxes[:, 0], row_of))
+        rows_sorted = row_of[order]
+        x0, y0, x1, y1 = (boxes[order, i] for i in range(4))
+        # Máximo acumulado de x1 reiniciado a cada linha (deslocamento por linha)
+        offset = rows_sorted * 1e6
+        run_x1 = np.maximum.accumulate(x1 + offset) - offset
+        new_cell = np.ones(count, dtype=bool)
+        new_cell[1:] = (rows_sorted[1:] != rows_sorted[:-1]) | (x0[1:] - run_x1[:-1] > TableDetector.CELL_GAP)
+        cell_starts = np.flatnonzero(new_cell)
+
+        cells = {
+            "x0": np.minimum.reduceat(x0, cell_starts),
+            "y0": np.minimum.reduceat(y0, cell_starts),
+            "x1": np.maximum.reduceat(x1, cell_starts),
+            "y1": np.maximum.reduceat(y1, cell_starts),
+            "chars": np.add.reduceat(lengths[order], cell_starts),
+            "row": rows_sorted[cell_starts]
+        }
+
+        # Linhas com duas ou mais células, próximas umas das outras, formam regiões
+        row_starts = np.flatnonzero(np.diff(cells["row"], prepend=-1))
+        cells_per_row = np.diff(np.append(row_starts, len(cell_starts)))
+        row_top = np.minimum.reduceat(cells["y0"], row_starts)
+        row_bottom = np.maximum.reduceat(cells["y1"], row_starts)
+
+        candidate = cells_per_row >= TableDetector.MIN_COLUMNS
+        if candidate.sum() < TableDetector.MIN_ROWS:
+            return []
+
+        line_height = max(float(np.median((row_bottom - row_top)[candidate])), 1.0)
+        gap_before = np.concatenate(([np.inf], row_top[1:] - row_bottom[:-1]))
+        previous = np.concatenate(([False], candidate[:-1]))
+        region_start = candidate & (~previous | (gap_before > line_height * TableDetector.REGION_GAP_FACTOR))
+        region_of = np.where(candidate, np.cumsum(region_start) - 1, -1)
+
+        tables = []
+        for region in range(int(region_of.max()) + 1):
+            region_rows = np.flatnonzero(region_of == region)
+            if len(region_rows) < TableDetector.MIN_ROWS:
+                continue
+            table = TableDetector._build_table(
+                spans, order, cell_starts, cells, row_starts, cells_per_row,
+                row_top, row_bottom, region_rows, include_cells
+            )
+            if table:
+                tables.append(table)
+
+        return tables
+
+    @staticmethod
+    def _build_table(spans, order, cell_starts, cells, row_starts, cells_per_row,
+                     row_top, row_bottom, region_rows, include_cells) -> Dict[str, Any]:
+        """Grade de colunas e métricas de uma região tabular"""
+        first_row, last_row = region_rows[0], region_rows[-1]
+        lo = row_starts[first_row]
+        hi = row_starts[last_row + 1] if last_row + 1 < len(row_starts) else len(cell_starts)
+
+        x0, x1, chars = cells["x0"][lo:hi], cells["x1"][lo:hi], cells["chars"][lo:hi]
+        if chars.mean() > TableDetector.MAX_MEAN_CELL_CHARS:
+            return {}
+
+        # Colunas: faixas de x cobertas pelas linhas com o número de células mais comum;
+        # as calhas entre as faixas são os espaços que nenhuma dessas células ocupa
+        region_counts = cells_per_row[region_rows]
+        typical = np.bincount(region_counts).argmax()
+        reference = np.repeat(region_counts == typical, region_counts)
+        ref_x0, ref_x1 = x0[reference], x1[reference]
+        by_x = np.argsort(ref_x0, kind="stable")
+        ref_x0, ref_x1 = ref_x0[by_x], ref_x1[by_x]
+        covered = np.maximum.accumulate(ref_x1)
+        column_breaks = np.flatnonzero(ref_x0[1:] > covered[:-1]) + 1
+        column_x0 = ref_x0[np.concatenate(([0], column_breaks))]
+        if len(column_x0) < TableDetector.MIN_COLUMNS:
+            return {}
+
+        consistency = float(np.mean(region_counts == len(column_x0)))
+        table = {
+            "rows": int(len(region_rows)),
+            "columns": int(len(column_x0)),
+            "confidence": round(0.5 + 0.5 * consistency, 2),
+            "bbox": [
+                round(float(x0.min()), 2), round(float(row_top[first_row]), 2),
+                round(float(x1.max()), 2), round(float(row_bottom[last_row]), 2)
+            ],
+            "column_positions": [round(float(x), 2) for x in column_x0]
+        }
+
+        if include_cells:
+            centers = (x0 + x1) / 2
+            columns = np.clip(np.searchsorted(column_x0, centers, side="right") - 1, 0, len(column_x0) - 1)
+            grid_rows = cells["row"][lo:hi] - cells["row"][lo]
+            grid = [[""] * len(column_x0) for _ in range(len(region_rows))]
+            bounds = np.append(cell_starts, len(order))
+            for i, (grid_row, column) in enumerate(zip(grid_rows, columns)):
+                cell_spans = order[bounds[lo + i]:bounds[lo + i + 1]]
+                text = " ".join(spans[s]["text"].strip() for s in cell_spans).strip()
+                current = grid[grid_row][column]
+                grid[grid_row][column] = f"{current} {text}" if current else text
+            table["cells"] = grid
+
+        return table
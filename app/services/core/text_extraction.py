@@ -0,0 +1,179 @@
+import json
+import base64
+import binascii
+import fitz
+from typing import Dict, Any, List, Optional, Iterator
+from app.services.core.column_clustering import ColumnClustering
+from app.services.core.page_features import TEXT_FLAGS
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+
+MODES = ("plain", "blocks", "words", "reading_order")
+WORD_FIELDS = ["x0", "y0", "x1", "y1", "text", "block", "line", "word"]
+
+COLUMN_MIN_GAP = 50.0        # Diferença de x0 (pt) a partir da qual blocos ficam em colunas distintas
+SPANNING_FRACTION = 0.6      # Blocos mais largos que isso (fração da página) cruzam as colunas
+
+class TextExtractor:
+    """Extração do texto completo página a página, com cache por página e modo
+
+    Modos: plain (texto), blocks (blocos com caixa), words (palavras com caixa,
+    como listas na ordem de WORD_FIELDS) e reading_order (blocos e linhas na
+    ordem de leitura, coluna por coluna). O modo plain usa a mesma chave de
+    cache do texto da pré-visualização.
+    """
+
+    VERSION = "1"
+
+    @staticmethod
+    def extract_page(page, page_num: int, mode: str) -> Dict[str, Any]:
+        """Conteúdo de uma página no modo pedido"""
+        record = {"page_number": page_num + 1}
+        if mode == "plain":
+            record["text"] = page.get_text()
+        elif mode == "blocks":
+            record["blocks"] = [
+                {"bbox": TextExtractor._round_box(block[:4]), "text": block[4]}
+                for block in page.get_text("blocks", flags=TEXT_FLAGS) if block[6] == 0
+            ]
+        elif mode == "words":
+            record["words"] = [
+                [*TextExtractor._round_box(word[:4]), *word[4:8]]
+                for word in page.get_text("words", flags=TEXT_FLAGS)
+            ]
+        else:
+            record["blocks"] = TextExtractor._reading_order(page)
+        return record
+
+    @staticmethod
+    def get_page(doc, sha256: str, page_num: int, mode: str) -> Dict[str, Any]:
+        """Página do cache compartilhado ou extraída (e guardada) na hora"""
+        if mode == "plain":
+            # Mesma chave de PreviewService.extract_text_preview
+            cache_key = f"{sha256}:{page_num}"
+            cached = SharedCache.get("text", cache_key)
+            if cached is not None:
+                return {"page_number": page_num + 1, "text": cached.decode("utf-8")}
+            record = TextExtractor.extract_page(doc[page_num], page_num, mode)
+            SharedCache.set("text", cache_key, record["text"].encode("utf-8"))
+            return record
+
+        cache_key = f"{sha256}:{page_num}:{TextExtractor.VERSION}"
+        record = SharedCache.get_json(f"text_{mode}", cache_key)
+        if record is None:
+            record = TextExtractor.extract_page(doc[page_num], page_num, mode)
+            SharedCache.set_json(f"text_{mode}", cache_key, record)
+        return record
+
+    @staticmethod
+    def extract_pages(file_path: str, mode: str = "plain", cursor: Optional[str] = None,
+                      page_size: int = 10) -> Dict[str, Any]:
+        """Um lote de páginas a partir do cursor e o cursor do próximo lote (None no fim)"""
+        sha256 = AnalysisCache.content_hash_for(file_path)
+        start = TextExtractor.decode_cursor(cursor, sha256, mode) if cursor else 0
+
+        with DocumentCache.open(file_path) as doc:
+            total_pages = len(doc)
+            end = min(start + page_size, total_pages)
+            pages = [TextExtractor.get_page(doc, sha256, page_num, mode) for page_num in range(start, end)]
+
+        result = {
+            "mode": mode,
+            "total_pages": total_pages,
+            "pages": pages,
+            "next_cursor": TextExtractor.encode_cursor(end, sha256, mode) if end < total_pages else None
+        }
+        if mode == "words":
+            result["word_fields"] = WORD_FIELDS
+        return result
+
+    @staticmethod
+    def iter_pages(file_path: str, mode: str = "plain", start_page: int = 1) -> Iterator[Dict[str, Any]]:
+        """Extração em fluxo: "start", um "page" por página e "end"
+
+        Usa um handle próprio do documento (o do DocumentCache ficaria bloqueado
+        durante todo o envio) e mantém apenas uma página em memória. Erros viram
+        um registro "error", pois a resposta já começou a ser enviada.
+        """
+        try:
+            sha256 = AnalysisCache.content_hash_for(file_path)
+            with fitz.open(file_path) as doc:
+                total_pages = len(doc)
+                start = {"type": "start", "mode": mode, "total_pages": total_pages}
+                if mode == "words":
+                    start["word_fields"] = WORD_FIELDS
+                yield start
+                for page_num in range(max(start_page, 1) - 1, total_pages):
+                    yield {"type": "page", **TextExtractor.get_page(doc, sha256, page_num, mode)}
+            yield {"type": "end", "total_pages": total_pages}
+        except Exception as e:
+            yield {"type": "error", "detail": f"Erro na extração de texto: {str(e)}"}
+
+    @staticmethod
+    def encode_cursor(page_num: int, sha256: str, mode: str) -> str:
+        """Cursor opaco: próxima página, modo e prefixo do hash do conteúdo"""
+        raw = json.dumps({"p": page_num, "m": mode, "h": sha256[:16]}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sha256: str, mode: str) -> int:
+        """Página inicial do cursor (ValueError se for inválido ou de outro documento/modo)"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            page_num = int(data["p"])
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise ValueError("Cursor inválido")
+        if data.get("h") != sha256[:16] or data.get("m") != mode or page_num < 0:
+            raise ValueError("Cursor não corresponde a este documento e modo")
+        return page_num
+
+    @staticmethod
+    def _reading_order(page) -> List[Dict[str, Any]]:
+        """Blocos de texto ordenados por coluna dentro de cada faixa entre blocos largos"""
+        blocks = []
+        for block in page.get_text("dict", flags=TEXT_FLAGS)["blocks"]:
+            if block["type"] != 0:
+                continue
+            lines = [
+                {"bbox": TextExtractor._round_box(line["bbox"]), "text": "".join(span["text"] for span in line["spans"])}
+                for line in block["lines"]
+            ]
+            blocks.append({"bbox": TextExtractor._round_box(block["bbox"]), "lines": lines})
+        if not blocks:
+            return []
+
+        centers = ColumnClustering.cluster_positions(
+            [block["bbox"][0] for block in blocks], max_clusters=3, min_gap=COLUMN_MIN_GAP
+        )
+        spanning_width = page.rect.width * SPANNING_FRACTION
+        for block in blocks:
+            block["column"] = min(range(len(centers)), key=lambda i: abs(block["bbox"][0] - centers[i]))
+            block["spanning"] = len(centers) > 1 and block["bbox"][2] - block["bbox"][0] > spanning_width
+
+        # Um bloco largo (ex: título) encerra a faixa atual; dentro da faixa, coluna por coluna
+        ordered, section = [], []
+        for block in sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0])):
+            if block["spanning"]:
+                ordered.extend(sorted(section, key=lambda b: (b["column"], b["bbox"][1])))
+                ordered.append(block)
+                section = []
+            else:
+                section.append(block)
+        ordered.extend(sorted(section, key=lambda b: (b["column"], b["bbox"][1])))
+
+        return [
+            {
+                "order": index,
+                "bbox": block["bbox"],
+                "column": block["column"],
+                "text": "\n".join(line["text"] for line in block["lines"]),
+                "lines": block["lines"]
+            }
+            for index, block in enumerate(ordered)
+        ]
+
+    @staticmethod
+    def _round_box(box) -> List[float]:
+        return [round(float(value), 2) for value in box]
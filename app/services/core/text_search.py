@@ -0,0 +1,144 @@
+import re
+import fitz
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Callable
+from app.services.core.analysis_pool import AnalysisPool
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.document_cache import DocumentCache
+from app.utils.search_index import SearchIndex
+
+TERM_PATTERN = re.compile(r"\w+")
+MAX_RECTS_PER_HIT = 20
+
+class TextSearch:
+    """Busca de texto por página sobre o índice FTS5 dos uploads
+
+    O texto de cada conteúdo é extraído uma vez (em segundo plano após o upload
+    ou na primeira busca) e as consultas rodam só no índice. As caixas dos
+    termos encontrados são localizadas apenas nas páginas retornadas.
+    """
+
+    # Incrementar ao mudar a extração do texto (reindexa os documentos)
+    VERSION = "1"
+
+    _tasks: set = set()
+
+    @staticmethod
+    def schedule(file_path: str, sha256: str):
+        """Indexa o texto do upload em segundo plano"""
+        task = asyncio.create_task(asyncio.to_thread(TextSearch._index_quietly, file_path, sha256))
+        TextSearch._tasks.add(task)
+        task.add_done_callback(TextSearch._tasks.discard)
+
+    @staticmethod
+    def _index_quietly(file_path: str, sha256: str):
+        try:
+            TextSearch.ensure_indexed(file_path, sha256)
+        except Exception:
+            pass  # Indexado sob demanda na primeira busca
+
+    @staticmethod
+    def ensure_indexed(file_path: str, sha256: Optional[str] = None) -> str:
+        """Extrai e indexa o texto das páginas se o conteúdo ainda não estiver indexado"""
+        sha256 = sha256 or AnalysisCache.content_hash_for(file_path)
+        if sha256 not in SearchIndex.indexed([sha256], TextSearch.VERSION):
+            SearchIndex.put(sha256, TextSearch.VERSION, TextSearch.extract_pages(file_path))
+        return sha256
+
+    @staticmethod
+    def extract_pages(file_path: str) -> List[str]:
+        """Texto de cada página (em processos separados para documentos grandes)
+
+        A indexação percorre o documento inteiro em segundo plano, então usa um
+        handle próprio em vez de segurar o documento em cache das requisições.
+        """
+        with fitz.open(file_path) as doc:
+            page_numbers = list(range(len(doc)))
+            if not AnalysisPool.should_shard(len(page_numbers)):
+                return [doc[page_num].get_text() for page_num in page_numbers]
+        return AnalysisPool.map_pages(TextSearch._extract_range, file_path, page_numbers)
+
+    @staticmethod
+    def _extract_range(file_path: str, page_numbers: List[int]) -> List[str]:
+        """Tarefa do pool de processos: abre o próprio handle do documento"""
+        with fitz.open(file_path) as doc:
+            return [doc[page_num].get_text() for page_num in page_numbers]
+
+    @staticmethod
+    def parse_query(query: str) -> List[str]:
+        """Termos da consulta (palavras); operadores do FTS5 não são aceitos da entrada"""
+        return TERM_PATTERN.findall(query)
+
+    @staticmethod
+    def search(query: str, documents: List[Dict[str, Any]], resolve_path: Callable[[str], str],
+               limit: int = 20, include_bbox: bool = True) -> Dict[str, Any]:
+        """Páginas ranqueadas (bm25) que contêm todos os termos da consulta
+
+        documents: [{"file_id", "content_hash"}]; resolve_path devolve o caminho
+        local de um file_id e só é chamado para indexar conteúdos ainda fora do
+        índice e para localizar as caixas nas páginas retornadas. O score de cada
+        página é a relevância relativa ao melhor resultado (1.0).
+        """
+        start = time.perf_counter()
+        terms = TextSearch.parse_query(query)
+        if not terms:
+            raise ValueError("Consulta sem termos pesquisáveis")
+
+        file_ids: Dict[str, List[str]] = {}
+        for document in documents:
+            file_ids.setdefault(document["content_hash"], []).append(document["file_id"])
+
+        indexed = SearchIndex.indexed(list(file_ids), TextSearch.VERSION)
+        for sha256 in file_ids.keys() - indexed:
+            TextSearch.ensure_indexed(resolve_path(file_ids[sha256][0]), sha256)
+
+        # Termos entre aspas: todos obrigatórios, sem interpretar operadores
+        fts_query = " ".join('"{}"'.format(term) for term in terms)
+        rows = SearchIndex.search(fts_query, list(file_ids), limit)
+
+        # O bm25 absoluto fica perto de zero quando os termos aparecem em boa parte
+        # das páginas indexadas (o FTS5 limita o idf a 1e-6); a escala relativa não muda
+        best = rows[0]["score"] if rows else 0.0
+
+        # Cada linha é um conteúdo (sha256, página); cópias do mesmo conteúdo em
+        # vários file_ids repetem a linha, então a lista é cortada em limit
+        hits = []
+        for row in rows:
+            if len(hits) >= limit:
+                break
+            rects = None
+            if include_bbox:
+                rects = TextSearch._term_rects(resolve_path(file_ids[row["sha256"]][0]), row["page"], terms)
+            for file_id in file_ids[row["sha256"]][:limit - len(hits)]:
+                hit = {
+                    "file_id": file_id,
+                    "page": row["page"],
+                    "score": round(row["score"] / best, 4) if best else 0.0,
+                    "snippet": row["snippet"]
+                }
+                if include_bbox:
+                    hit["bbox"] = rects[0] if rects else None
+                    hit["rects"] = rects
+                hits.append(hit)
+
+        return {
+            "query": query,
+            "terms": terms,
+            "documents_searched": len(file_ids),
+            "hits": hits,
+            "took_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    @staticmethod
+    def _term_rects(file_path: str, page_number: int, terms: List[str]) -> List[List[float]]:
+        """Caixas das ocorrências dos termos na página (busca sem diferenciar maiúsculas)"""
+        rects = []
+        with DocumentCache.open(file_path) as doc:
+            page = doc[page_number - 1]
+            for term in terms:
+                for rect in page.search_for(term):
+                    rects.append([round(rect.x0, 2), round(rect.y0, 2), round(rect.x1, 2), round(rect.y1, 2)])
+                    if len(rects) >= MAX_RECTS_PER_HIT:
+                        return rects
+        return rects
@@ -6,7 +6,12 @@ from typing import List, Dict, Any, Optional
 from fastapi import HTTPException
 from PIL import Image
 import io
-from app.config import settings
+import asyncio
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
+from app.utils.document_cache import DocumentCache
+from app.utils.shared_cache import SharedCache
+from app.utils.analysis_cache import AnalysisCache
 
 class PageEditorService:
     """Serviço avançado para edição de páginas PDF"""
@@ -15,7 +20,7 @@ class PageEditorService:
     async def delete_pages(file_id: str, pages_to_delete: List[int]) -> str:
         """Exclui páginas específicas do PDF"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -26,20 +31,24 @@ class PageEditorService:
             
             # Criar novo documento excluindo as páginas
             new_doc = fitz.open()
+            page_map = []
             
             for page_num in range(1, total_pages + 1):
                 if page_num not in pages_to_delete:
                     new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
+                    page_map.append(page_num - 1)
             
             # Salvar arquivo editado
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_pages_removed.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_pages_removed")
             new_doc.save(output_path)
             
             doc.close()
             new_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "delete_pages", page_map=page_map
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao excluir páginas: {str(e)}")
@@ -48,7 +57,7 @@ class PageEditorService:
     async def reorder_pages(file_id: str, new_order: List[int]) -> str:
         """Reorganiza páginas em uma nova ordem"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -67,13 +76,16 @@ class PageEditorService:
             
             # Salvar arquivo reorganizado
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_reordered.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_reordered")
             new_doc.save(output_path)
             
             doc.close()
             new_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "reorder_pages",
+                page_map=[page_num - 1 for page_num in new_order]
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao reorganizar páginas: {str(e)}")
@@ -83,8 +95,8 @@ class PageEditorService:
                           insert_after_page: int, source_pages: Optional[List[int]] = None) -> str:
         """Insere páginas de outro PDF em uma posição específica"""
         try:
-            target_path = f"{settings.UPLOAD_DIR}/{target_file_id}.pdf"
-            source_path = f"{settings.UPLOAD_DIR}/{source_file_id}.pdf"
+            target_path = await asyncio.to_thread(StorageLayout.fetch_upload, target_file_id)
+            source_path = await asyncio.to_thread(StorageLayout.fetch_upload, source_file_id)
             
             target_doc = fitz.open(target_path)
             source_doc = fitz.open(source_path)
@@ -122,14 +134,17 @@ class PageEditorService:
             
             # Salvar arquivo com páginas inseridas
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_pages_inserted.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_pages_inserted")
             new_doc.save(output_path)
             
             target_doc.close()
             source_doc.close()
             new_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, target_file_id, "insert_pages",
+                parent_ids=[target_file_id, source_file_id]
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao inserir páginas: {str(e)}")
@@ -138,7 +153,7 @@ class PageEditorService:
     async def extract_pages(file_id: str, pages_to_extract: List[int]) -> str:
         """Extrai páginas específicas para um novo PDF"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -155,13 +170,16 @@ class PageEditorService:
             
             # Salvar arquivo extraído
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_extracted_pages.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_extracted_pages")
             new_doc.save(output_path)
             
             doc.close()
             new_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "extract_pages",
+                page_map=[page_num - 1 for page_num in pages_to_extract]
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao extrair páginas: {str(e)}")
@@ -170,7 +188,7 @@ class PageEditorService:
     async def duplicate_pages(file_id: str, pages_to_duplicate: List[int]) -> str:
         """Duplica páginas específicas no PDF"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -181,24 +199,29 @@ class PageEditorService:
             
             # Criar novo documento com páginas duplicadas
             new_doc = fitz.open()
+            page_map = []
             
             for page_num in range(1, total_pages + 1):
                 # Inserir página original
                 new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
+                page_map.append(page_num - 1)
                 
                 # Se esta página deve ser duplicada, inserir novamente
                 if page_num in pages_to_duplicate:
                     new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
+                    page_map.append(page_num - 1)
             
             # Salvar arquivo com páginas duplicadas
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_duplicated_pages.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_duplicated_pages")
             new_doc.save(output_path)
             
             doc.close()
             new_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "duplicate_pages", page_map=page_map
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao duplicar páginas: {str(e)}")
@@ -207,7 +230,7 @@ class PageEditorService:
     async def rotate_specific_pages(file_id: str, pages_rotation: Dict[int, int]) -> str:
         """Rotaciona páginas específicas com ângulos diferentes"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -225,11 +248,13 @@ class PageEditorService:
             
             # Salvar arquivo com rotações aplicadas
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_rotated_specific.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_rotated_specific")
             doc.save(output_path)
             doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "rotate_specific"
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao rotacionar páginas específicas: {str(e)}")
@@ -238,30 +263,40 @@ class PageEditorService:
     async def get_page_thumbnails(file_id: str, size: tuple = (100, 150)) -> List[Dict[str, Any]]:
         """Gera thumbnails pequenas para todas as páginas (interface minimalista)"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
-            doc = fitz.open(file_path)
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
+            return await asyncio.to_thread(PageEditorService._render_thumbnails, file_path)
             
+        except Exception as e:
+            raise HTTPException(500, f"Erro ao gerar thumbnails: {str(e)}")
+    
+    @staticmethod
+    def _render_thumbnails(file_path: str) -> List[Dict[str, Any]]:
+        """Renderiza as miniaturas a partir do documento em cache (executar em thread)"""
+        sha256 = AnalysisCache.content_hash_for(file_path)
+        with DocumentCache.open(file_path) as doc:
             thumbnails = []
             
             for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Gerar thumbnail pequena
-                mat = fitz.Matrix(0.3, 0.3)  # Zoom bem reduzido
-                pix = page.get_pixmap(matrix=mat)
+                # Miniaturas compartilhadas entre workers pelo hash do conteúdo
+                thumb_key = f"{sha256}:{page_num}:0.3"
+                thumbnail = SharedCache.get_json("thumbnail", thumb_key)
+                if thumbnail is None:
+                    page = doc[page_num]
+                    
+                    # Gerar thumbnail pequena
+                    mat = fitz.Matrix(0.3, 0.3)  # Zoom bem reduzido
+                    pix = page.get_pixmap(matrix=mat)
+                    
+                    # Converter para base64
+                    img_base64 = base64.b64encode(pix.tobytes("png")).decode('utf-8')
+                    
+                    thumbnail = {
+                        "page_number": page_num + 1,
+                        "thumbnail_url": f"data:image/png;base64,{img_base64}",
+                        "width": pix.width,
+                        "height": pix.height
+                    }
+                    SharedCache.set_json("thumbnail", thumb_key, thumbnail)
                 
-                # Converter para base64
-                img_base64 = base64.b64encode(pix.tobytes("png")).decode('utf-8')
-                
-                thumbnails.append({
-                    "page_number": page_num + 1,
-                    "thumbnail_url": f"data:image/png;base64,{img_base64}",
-                    "width": pix.width,
-                    "height": pix.height
-                })
-            
-            doc.close()
-            return thumbnails
-            
-        except Exception as e:
-            raise HTTPException(500, f"Erro ao gerar thumbnails: {str(e)}")
\ No newline at end of file
+                thumbnails.append(thumbnail)
+        return thumbnails
\ No newline at end of file
@@ -1,9 +1,11 @@
 import fitz
 import os
 import uuid
+import asyncio
 from typing import List, Dict, Any
 from fastapi import HTTPException
-from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
 
 class PDFEditor:
     """Serviço para edição avançada de PDFs"""
@@ -15,7 +17,7 @@ class PDFEditor:
             if rotation not in [0, 90, 180, 270]:
                 raise HTTPException(400, "Rotação deve ser 0, 90, 180 ou 270 graus")
             
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -30,11 +32,11 @@ class PDFEditor:
             
             # Salvar arquivo editado
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_rotated.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_rotated")
             doc.save(output_path)
             doc.close()
             
-            return output_path
+            return await asyncio.to_thread(FileProcessor.register_output, output_path, file_id, "rotate")
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao rotacionar páginas: {str(e)}")
@@ -47,7 +49,7 @@ class PDFEditor:
             if opacity < 0 or opacity > 1:
                 raise HTTPException(400, "Opacidade deve estar entre 0 e 1")
             
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             
             for page_num in range(len(doc)):
@@ -79,11 +81,11 @@ class PDFEditor:
                 )
             
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_watermarked.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_watermarked")
             doc.save(output_path)
             doc.close()
             
-            return output_path
+            return await asyncio.to_thread(FileProcessor.register_output, output_path, file_id, "watermark")
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao adicionar marca d'água: {str(e)}")
@@ -92,7 +94,7 @@ class PDFEditor:
     async def update_metadata(file_id: str, metadata: Dict[str, str]) -> str:
         """Atualiza metadados do PDF"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             
             # Atualizar metadados
@@ -101,11 +103,11 @@ class PDFEditor:
             
             # Salvar com novos metadados
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_updated.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_updated")
             doc.save(output_path, metadata=current_metadata)
             doc.close()
             
-            return output_path
+            return await asyncio.to_thread(FileProcessor.register_output, output_path, file_id, "metadata")
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao atualizar metadados: {str(e)}")
@@ -117,7 +119,7 @@ class PDFEditor:
             if quality not in ["low", "medium", "high"]:
                 raise HTTPException(400, "Qualidade deve ser low, medium ou high")
             
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             
             # Configurações de compressão baseadas na qualidade
@@ -130,7 +132,7 @@ class PDFEditor:
             settings_config = compress_settings[quality]
             
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_compressed.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_compressed")
             
             # Salvar com compressão
             doc.save(output_path, 
@@ -140,7 +142,7 @@ class PDFEditor:
                     dpi=settings_config["images"])
             
             doc.close()
-            return output_path
+            return await asyncio.to_thread(FileProcessor.register_output, output_path, file_id, "compress")
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao comprimir PDF: {str(e)}")
\ No newline at end of file
@@ -1,46 +1,77 @@
 import fitz
 import os
 import uuid
-from typing import List
+import asyncio
+from typing import List, Tuple
 from fastapi import HTTPException
-from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
+from app.utils.page_hash_index import PageHashIndex
+from app.services.core.duplicate_pages import DuplicatePages, PageMatcher
 
 class PDFMerger:
     """Serviço para junção de PDFs com otimização"""
     
     @staticmethod
-    async def merge_pdfs(file_ids: List[str], output_filename: str = "merged_document") -> str:
-        """Junta múltiplos PDFs em um único arquivo"""
+    async def merge_pdfs(file_ids: List[str], output_filename: str = "merged_document",
+                         drop_duplicates: bool = False) -> str:
+        """Junta múltiplos PDFs em um único arquivo
+        
+        Com drop_duplicates, páginas duplicadas ou quase duplicadas de uma página
+        já incluída (ex: a mesma folha de rosto em cada lote) são omitidas.
+        """
         try:
             if len(file_ids) < 2:
                 raise HTTPException(400, "É necessário pelo menos 2 arquivos para juntar")
             
             # Criar documento de saída
             merged_doc = fitz.open()
+            matcher = PageMatcher() if drop_duplicates else None
             
             # Adicionar páginas de cada arquivo
             for file_id in file_ids:
-                file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+                file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
                 if not os.path.exists(file_path):
                     raise HTTPException(404, f"Arquivo {file_id} não encontrado")
                 
                 doc = fitz.open(file_path)
-                merged_doc.insert_pdf(doc)
+                if matcher is None:
+                    merged_doc.insert_pdf(doc)
+                else:
+                    for start, end in PDFMerger._unique_page_runs(file_path, matcher):
+                        merged_doc.insert_pdf(doc, from_page=start, to_page=end)
                 doc.close()
             
             # Salvar arquivo mesclado
             output_id = str(uuid.uuid4())
             safe_filename = "".join(c for c in output_filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_{safe_filename}.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_{safe_filename}")
             
             merged_doc.save(output_path)
             merged_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_ids[0], "merge", parent_ids=file_ids
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao juntar PDFs: {str(e)}")
     
+    @staticmethod
+    def _unique_page_runs(file_path: str, matcher: PageMatcher) -> List[Tuple[int, int]]:
+        """Faixas contínuas (base 0) de páginas sem duplicata entre as já incluídas"""
+        runs = []
+        for fingerprint in PageHashIndex.get(DuplicatePages.ensure_indexed(file_path)):
+            if matcher.matches(fingerprint):
+                continue
+            matcher.add(len(matcher.items), fingerprint)
+            page_idx = fingerprint["page"] - 1
+            if runs and runs[-1][1] == page_idx - 1:
+                runs[-1] = (runs[-1][0], page_idx)
+            else:
+                runs.append((page_idx, page_idx))
+        return runs
+    
     @staticmethod
     async def merge_with_custom_order(file_ids: List[str], page_order: List[int], output_filename: str) -> str:
         """Junta PDFs com ordem personalizada de páginas"""
@@ -51,7 +82,7 @@ class PDFMerger:
             merged_doc = fitz.open()
             
             for file_id, page_indices in zip(file_ids, page_order):
-                file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+                file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
                 if not os.path.exists(file_path):
                     raise HTTPException(404, f"Arquivo {file_id} não encontrado")
                 
@@ -70,12 +101,14 @@ class PDFMerger:
             
             output_id = str(uuid.uuid4())
             safe_filename = "".join(c for c in output_filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_{safe_filename}.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_{safe_filename}")
             
             merged_doc.save(output_path)
             merged_doc.close()
             
-            return output_path
+            return await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_ids[0], "merge_custom_order", parent_ids=file_ids
+            )
             
         except Exception as e:
             raise HTTPException(500, f"Erro ao juntar PDFs com ordem personalizada: {str(e)}")
\ No newline at end of file
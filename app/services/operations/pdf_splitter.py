@@ -1,9 +1,11 @@
 import fitz
 import os
 import uuid
+import asyncio
 from typing import List, Dict, Any
 from fastapi import HTTPException
-from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_processor import FileProcessor
 from app.services.core.pdf_analyzer import PDFAnalyzer
 from app.services.core.quality_engine import QualityEngine
 
@@ -14,23 +16,24 @@ class PDFSplitter:
     async def split_by_content_analysis(file_id: str, parameters: Dict[str, Any]) -> List[str]:
         """Divide PDF baseado em análise inteligente de conteúdo"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
-            analysis = await PDFAnalyzer.comprehensive_analysis(file_path)
+            # Todas as páginas: a divisão precisa do detalhe de cada uma (sem amostragem)
+            analysis = await PDFAnalyzer.comprehensive_analysis(file_path, full=True)
             
             output_files = []
             
             # Estratégias de divisão baseadas no conteúdo
             if parameters.get("strategy") == "by_content_type":
-                output_files = await PDFSplitter._split_by_content_type(doc, analysis)
+                output_files = await PDFSplitter._split_by_content_type(doc, analysis, file_id)
             elif parameters.get("strategy") == "by_sections":
-                output_files = await PDFSplitter._split_by_sections(doc, analysis)
+                output_files = await PDFSplitter._split_by_sections(doc, analysis, file_id)
             elif parameters.get("strategy") == "auto_chapters":
                 output_files = await PDFSplitter._split_by_auto_chapters(doc, analysis)
             else:
                 # Divisão padrão por páginas com análise de conteúdo
                 page_ranges = parameters.get("ranges", ["1-"])
-                output_files = await PDFSplitter._split_by_smart_ranges(doc, page_ranges, analysis)
+                output_files = await PDFSplitter._split_by_smart_ranges(doc, page_ranges, analysis, file_id)
             
             doc.close()
             return output_files
@@ -39,7 +42,7 @@ class PDFSplitter:
             raise HTTPException(500, f"Erro na divisão inteligente: {str(e)}")
     
     @staticmethod
-    async def _split_by_content_type(doc, analysis: Dict[str, Any]) -> List[str]:
+    async def _split_by_content_type(doc, analysis: Dict[str, Any], file_id: str = None) -> List[str]:
         """Divide PDF agrupando páginas por tipo de conteúdo"""
         content_groups = {}
         
@@ -58,24 +61,27 @@ class PDFSplitter:
                 new_doc.insert_pdf(doc, from_page=min(pages), to_page=max(pages))
                 
                 output_id = str(uuid.uuid4())
-                output_path = f"{settings.OUTPUT_DIR}/{output_id}_{content_type}.pdf"
+                output_path = StorageLayout.output_path(f"{output_id}_{content_type}")
                 new_doc.save(output_path)
                 new_doc.close()
                 
-                output_files.append(output_path)
+                output_files.append(await asyncio.to_thread(
+                    FileProcessor.register_output, output_path, file_id, "split_content_type"
+                ))
         
         return output_files
     
     @staticmethod
-    async def _split_by_sections(doc, analysis: Dict[str, Any]) -> List[str]:
+    async def _split_by_sections(doc, analysis: Dict[str, Any], file_id: str = None) -> List[str]:
         """Divide PDF em seções baseado em mudanças de conteúdo"""
         sections = []
         current_section = []
         page_details = analysis["content_analysis"]["page_details"]
         
         for i, page_info in enumerate(page_details):
+            page_idx = page_info["page_number"] - 1
             if not current_section:
-                current_section.append(i)
+                current_section.append(page_idx)
                 continue
             
             # Verificar mudança significativa no conteúdo
@@ -90,9 +96,9 @@ class PDFSplitter:
             
             if content_changed and len(current_section) > 0:
                 sections.append(current_section)
-                current_section = [i]
+                current_section = [page_idx]
             else:
-                current_section.append(i)
+                current_section.append(page_idx)
         
         if current_section:
             sections.append(current_section)
@@ -105,16 +111,19 @@ class PDFSplitter:
                 new_doc.insert_pdf(doc, from_page=page_idx, to_page=page_idx)
             
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_section_{i+1}.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_section_{i+1}")
             new_doc.save(output_path)
             new_doc.close()
             
-            output_files.append(output_path)
+            output_files.append(await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "split_sections"
+            ))
         
         return output_files
     
     @staticmethod
-    async def _split_by_smart_ranges(doc, page_ranges: List[str], analysis: Dict[str, Any]) -> List[str]:
+    async def _split_by_smart_ranges(doc, page_ranges: List[str], analysis: Dict[str, Any],
+                                     file_id: str = None) -> List[str]:
         """Divide PDF com ranges inteligentes que consideram a estrutura do conteúdo"""
         output_files = []
         total_pages = len(doc)
@@ -134,21 +143,24 @@ class PDFSplitter:
             new_doc.insert_pdf(doc, from_page=start, to_page=end)
             
             output_id = str(uuid.uuid4())
-            output_path = f"{settings.OUTPUT_DIR}/{output_id}_pages_{start+1}-{end+1}.pdf"
+            output_path = StorageLayout.output_path(f"{output_id}_pages_{start+1}-{end+1}")
             new_doc.save(output_path)
             new_doc.close()
             
-            output_files.append(output_path)
+            output_files.append(await asyncio.to_thread(
+                FileProcessor.register_output, output_path, file_id, "split_smart_ranges"
+            ))
         
         return output_files
     
     @staticmethod
     def _adjust_range_to_content(start: int, end: int, analysis: Dict[str, Any]) -> tuple:
         """Ajusta o range de páginas para limites de conteúdo naturais"""
-        page_details = analysis["content_analysis"]["page_details"]
+        # Detalhes pelo número da página (índice 0-based), não pela posição na lista
+        page_details = {page["page_number"] - 1: page for page in analysis["content_analysis"]["page_details"]}
         
         # Expandir start para trás até encontrar início de seção
-        while start > 0:
+        while start - 1 in page_details and start in page_details:
             current_page = page_details[start]
             prev_page = page_details[start - 1]
             
@@ -159,7 +171,7 @@ class PDFSplitter:
             start -= 1
         
         # Expandir end para frente até encontrar fim de seção
-        while end < len(page_details) - 1:
+        while end in page_details and end + 1 in page_details:
             current_page = page_details[end]
             next_page = page_details[end + 1]
             
@@ -175,7 +187,7 @@ class PDFSplitter:
     async def split_by_page_range(file_id: str, page_ranges: List[str]) -> List[str]:
         """Divide PDF por ranges de páginas específicos"""
         try:
-            file_path = f"{settings.UPLOAD_DIR}/{file_id}.pdf"
+            file_path = await asyncio.to_thread(StorageLayout.fetch_upload, file_id)
             doc = fitz.open(file_path)
             total_pages = len(doc)
             
@@ -194,11 +206,13 @@ class PDFSplitter:
                 
                 # Salvar arquivo
                 output_id = str(uuid.uuid4())
-                output_path = f"{settings.OUTPUT_DIR}/{output_id}.pdf"
+                output_path = StorageLayout.output_path(f"{output_id}")
                 new_doc.save(output_path)
                 new_doc.close()
                 
-                output_files.append(output_path)
+                output_files.append(await asyncio.to_thread(
+                    FileProcessor.register_output, output_path, file_id, "split_page_range"
+                ))
             
             doc.close()
             return output_files
@@ -16,7 +16,10 @@ class IntelligentProcessor:
         
         # 3. Aplicar processamento específico
         if strategy == "ocr_enhanced":
-            return await IntelligentProcessor._process_with_ocr(file_path, parameters)
+            # OCR apenas nas páginas classificadas como digitalizadas
+            return await IntelligentProcessor._process_with_ocr(
+                file_path, {**parameters, "ocr_pages": analysis["pages_needing_ocr"]}
+            )
         elif strategy == "layout_preservation":
             return await IntelligentProcessor._process_preserving_layout(file_path, parameters)
         elif strategy == "high_quality_images":
@@ -1,6 +1,6 @@
 import pdf2image
 import pytesseract
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 from app.config import settings
 
@@ -8,17 +8,27 @@ class OCRService:
     """Serviço de OCR para PDFs digitalizados"""
     
     @staticmethod
-    async def extract_text_from_scanned_pdf(file_path: str) -> str:
-        """Usa Tesseract OCR para extrair texto de PDFs digitalizados"""
+    async def extract_text_from_scanned_pdf(file_path: str, pages: Optional[List[int]] = None) -> str:
+        """Usa Tesseract OCR para extrair texto de PDFs digitalizados
+        
+        pages (base 1) restringe o OCR às páginas indicadas, por exemplo as
+        pages_needing_ocr de detect_ocr_need.
+        """
         try:
             # Converter PDF para imagens
-            images = pdf2image.convert_from_path(file_path, dpi=300)
+            if pages is None:
+                numbered_images = enumerate(pdf2image.convert_from_path(file_path, dpi=300), start=1)
+            else:
+                numbered_images = (
+                    (page, pdf2image.convert_from_path(file_path, dpi=300, first_page=page, last_page=page)[0])
+                    for page in pages
+                )
             
             extracted_text = ""
-            for i, image in enumerate(images):
+            for page_number, image in numbered_images:
                 # OCR em cada página
                 text = pytesseract.image_to_string(image, lang='por+eng')
-                extracted_text += f"--- Página {i+1} ---\n{text}\n"
+                extracted_text += f"--- Página {page_number} ---\n{text}\n"
             
             return extracted_text
         except Exception as e:
@@ -61,37 +71,12 @@ class OCRService:
     
     @staticmethod
     async def detect_ocr_need(file_path: str) -> Dict[str, Any]:
-        """Detecta se o PDF precisa de OCR"""
+        """Detecta quais páginas do PDF precisam de OCR (classificação por página)"""
         try:
-            import fitz
+            import asyncio
+            from app.services.core.ocr_classifier import OCRClassifier
             
-            doc = fitz.open(file_path)
-            needs_ocr = False
-            confidence_scores = []
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                
-                # Se há pouquíssimo texto mas muitas imagens, provavelmente precisa de OCR
-                images = page.get_images()
-                text_ratio = len(text) / (page.rect.width * page.rect.height) if page.rect.width * page.rect.height > 0 else 0
-                
-                if len(text.strip()) < 100 and len(images) > 0 and text_ratio < 0.001:
-                    needs_ocr = True
-                    confidence_scores.append(0.9)
-                else:
-                    confidence_scores.append(0.1)
-            
-            doc.close()
-            
-            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-            
-            return {
-                "needs_ocr": needs_ocr,
-                "confidence": avg_confidence,
-                "pages_analyzed": len(confidence_scores)
-            }
+            return await asyncio.to_thread(OCRClassifier.classify_document, file_path)
             
         except Exception as e:
             raise Exception(f"Erro ao detectar necessidade de OCR: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.utils.content_store import ContentStore
+from app.utils.file_registry import FileRegistry
+
+class AnalysisCache:
+    """Cache em disco de resultados de análise por (hash do conteúdo, versão do analisador, opções)"""
+
+    _initialized = False
+
+    @staticmethod
+    @contextmanager
+    def _connect():
+        """Abre conexão com o banco do cache de análises"""
+        conn = sqlite3.connect(settings.ANALYSIS_CACHE_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not AnalysisCache._initialized:
+                AnalysisCache._create_schema(conn)
+                AnalysisCache._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn):
+        """Cria a tabela e os índices caso não existam"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                cache_key TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                analyzer_version TEXT NOT NULL,
+                options TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_sha256 ON analyses(sha256);
+            CREATE INDEX IF NOT EXISTS idx_analyses_lru ON analyses(last_accessed);
+        """)
+
+    @staticmethod
+    def _options_key(options: Optional[Dict[str, Any]]) -> str:
+        return json.dumps(options or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def make_key(sha256: str, analyzer_version: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Chave estável para o conteúdo, a versão do analisador e as opções"""
+        raw = f"{sha256}:{analyzer_version}:{AnalysisCache._options_key(options)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash_for(file_path: str) -> str:
+        """Hash do conteúdo do arquivo (índice de conteúdo, registro ou leitura do arquivo)"""
+        file_id = os.path.basename(file_path).split('.')[0]
+        sha256 = ContentStore.get_hash(file_id)
+        if sha256:
+            return sha256
+        record = FileRegistry.get(file_id)
+        if record and record["path"] == file_path:
+            return FileRegistry.get_content_hash(record)
+        return FileRegistry.hash_file(file_path)
+
+    @staticmethod
+    def get(sha256: str, analyzer_version: str,
+            options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Retorna a análise em cache, se houver para esta versão e opções"""
+        cache_key = AnalysisCache.make_key(sha256, analyzer_version, options)
+        with AnalysisCache._connect() as conn:
+            row = conn.execute("SELECT payload FROM analyses WHERE cache_key = ?", (cache_key,)).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE analyses SET last_accessed = ? WHERE cache_key = ?", (time.time(), cache_key))
+        return json.loads(zlib.decompress(row["payload"]))
+
+    @staticmethod
+    def put(sha256: str, analyzer_version: str, analysis: Dict[str, Any],
+            options: Optional[Dict[str, Any]] = None):
+        """Guarda a análise comprimida e aplica o limite de tamanho do cache"""
+        payload = zlib.compress(json.dumps(analysis, default=str).encode("utf-8"))
+        now = time.time()
+        with AnalysisCache._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO analyses
+                   (cache_key, sha256, analyzer_version, options, payload, size, created_at, last_accessed)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (AnalysisCache.make_key(sha256, analyzer_version, options), sha256, analyzer_version,
+                 AnalysisCache._options_key(options), payload, len(payload), now, now)
+            )
+            AnalysisCache._evict(conn, analyzer_version)
+
+    @staticmethod
+    def _evict(conn, analyzer_version: str):
+        """Remove entradas de versões antigas e depois as menos usadas até caber no limite"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total <= settings.ANALYSIS_CACHE_MAX_BYTES:
+            return
+        rows = conn.execute(
+            """SELECT cache_key, size FROM analyses
+               ORDER BY analyzer_version = ?, last_accessed""",
+            (analyzer_version,)
+        )
+        expired = []
+        for row in rows:
+            if total <= settings.ANALYSIS_CACHE_MAX_BYTES:
+                break
+            expired.append((row["cache_key"],))
+            total -= row["size"]
+        conn.executemany("DELETE FROM analyses WHERE cache_key = ?", expired)
+
+    @staticmethod
+    def invalidate(sha256: str):
+        """Remove todas as análises de um conteúdo"""
+        with AnalysisCache._connect() as conn:
+            conn.execute("DELETE FROM analyses WHERE sha256 = ?", (sha256,))
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Tamanho atual do cache"""
+        with AnalysisCache._connect() as conn:
+            row = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses").fetchone()
+        return {"entries": row[0], "bytes": row[1], "max_bytes": settings.ANALYSIS_CACHE_MAX_BYTES}
@@ -0,0 +1,191 @@
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.utils.storage_backend import StorageBackend
+from app.utils.file_registry import FileRegistry
+from app.utils.page_hash_index import PageHashIndex
+from app.utils.search_index import SearchIndex
+
+class ContentStore:
+    """Armazenamento endereçado por conteúdo (SHA-256) com detecção de duplicatas"""
+
+    _initialized = False
+
+    @staticmethod
+    @contextmanager
+    def _connect():
+        """Abre conexão com o índice de conteúdo"""
+        conn = sqlite3.connect(settings.CONTENT_INDEX_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not ContentStore._initialized:
+                ContentStore._create_schema(conn)
+                ContentStore._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn):
+        """Cria as tabelas do índice caso não existam"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                blob_path TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                file_id TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+                filename TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_aliases_sha256 ON aliases(sha256);
+        """)
+
+    @staticmethod
+    def blob_path(sha256: str) -> str:
+        """Caminho do blob para um hash de conteúdo"""
+        return os.path.join(settings.BLOB_DIR, sha256[:2], f"{sha256}.pdf")
+
+    @staticmethod
+    def store(temp_path: str, sha256: str, file_size: int,
+              file_id: str, file_path: str, filename: str = None) -> Dict[str, Any]:
+        """Move o arquivo para o blob do hash e cria o alias do file_id
+
+        Verificar o blob, criar o hardlink e gravar o alias acontecem sob a trava
+        de escrita do índice, a mesma usada por release(): um release concorrente
+        não apaga o blob entre a verificação e o link. O arquivo enviado só é
+        descartado depois que o alias existe.
+        """
+        blob_path = ContentStore.blob_path(sha256)
+        backend = StorageBackend.get_backend()
+
+        now = time.time()
+        with ContentStore._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            duplicate = os.path.exists(blob_path)
+            if not duplicate:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+
+            # O file_id vira um hardlink barato para o blob
+            try:
+                os.link(blob_path, file_path)
+            except OSError:
+                shutil.copyfile(blob_path, file_path)
+
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, blob_path, file_size, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, blob_path, file_size, now)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO aliases (file_id, sha256, filename, created_at) VALUES (?, ?, ?, ?)",
+                (file_id, sha256, filename, now)
+            )
+
+        if duplicate:
+            # Conteúdo já conhecido: descartar a cópia recém-enviada
+            os.remove(temp_path)
+        elif backend.is_remote and backend.stat(StorageBackend.key_for(blob_path)) is not None:
+            duplicate = True  # Já enviado por outro nó
+        else:
+            backend.put(StorageBackend.key_for(blob_path), blob_path)
+        if backend.is_remote:
+            # Referência visível a todos os nós: o blob remoto só sai com a última
+            backend.put_bytes(ContentStore._ref_key(sha256, file_id), b"")
+
+        return {
+            "file_path": file_path,
+            "blob_path": blob_path,
+            "duplicate": duplicate
+        }
+
+    @staticmethod
+    def ensure_local(file_id: str, file_path: str) -> bool:
+        """Recria o upload local a partir do blob (buscando no backend remoto se preciso)"""
+        if os.path.exists(file_path):
+            return True
+        sha256 = ContentStore.get_hash(file_id)
+        if not sha256:
+            return False
+        blob_path = ContentStore.blob_path(sha256)
+        if not StorageBackend.get_backend().ensure_local(blob_path):
+            return False
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            os.link(blob_path, file_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(blob_path, file_path)
+        return True
+
+    @staticmethod
+    def _ref_key(sha256: str, file_id: str) -> str:
+        return f"refs/{sha256}/{file_id}"
+
+    @staticmethod
+    def get_hash(file_id: str) -> Optional[str]:
+        """Retorna o hash de conteúdo associado ao file_id
+
+        Uploads recebidos por outro nó (backend remoto) são encontrados pelo
+        registro compartilhado e passam a ter alias também neste nó.
+        """
+        with ContentStore._connect() as conn:
+            row = conn.execute("SELECT sha256 FROM aliases WHERE file_id = ?", (file_id,)).fetchone()
+        if row:
+            return row["sha256"]
+
+        record = FileRegistry.get(file_id, "upload") if StorageBackend.get_backend().is_remote else None
+        if not record or not record["content_hash"]:
+            return None
+        with ContentStore._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, blob_path, file_size, created_at) VALUES (?, ?, ?, ?)",
+                (record["content_hash"], ContentStore.blob_path(record["content_hash"]), record["size"], time.time())
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO aliases (file_id, sha256, filename, created_at) VALUES (?, ?, ?, ?)",
+                (file_id, record["content_hash"], None, record["created_at"])
+            )
+        return record["content_hash"]
+
+    @staticmethod
+    def release(file_id: str, sha256: Optional[str] = None):
+        """Remove o alias e apaga o blob quando não houver mais referências
+
+        sha256 (o content_hash do registro) permite liberar, no backend remoto,
+        uploads de outro nó que nunca ganharam alias local.
+        """
+        with ContentStore._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # Mesma trava de store()
+            row = conn.execute("SELECT sha256 FROM aliases WHERE file_id = ?", (file_id,)).fetchone()
+            if row:
+                sha256 = row["sha256"]
+                conn.execute("DELETE FROM aliases WHERE file_id = ?", (file_id,))
+            elif sha256 is None or not StorageBackend.get_backend().is_remote:
+                return
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM aliases WHERE sha256 = ?", (sha256,)
+            ).fetchone()[0]
+            backend = StorageBackend.get_backend()
+            if backend.is_remote:
+                backend.delete(ContentStore._ref_key(sha256, file_id))
+            if remaining == 0:
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                blob_path = ContentStore.blob_path(sha256)
+                if os.path.exists(blob_path):
+                    os.remove(blob_path)
+                # No backend remoto, outros nós podem ainda referenciar o blob
+                if not backend.is_remote or not backend.list_keys(f"refs/{sha256}/"):
+                    backend.delete(StorageBackend.key_for(blob_path))
+                PageHashIndex.remove(sha256)
+                SearchIndex.remove(sha256)
@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator
+import fitz
+from app.config import settings
+
+class _CachedDocument:
+    """Documento aberto com lock próprio e contagem de usos em andamento"""
+
+    __slots__ = ("doc", "mtime_ns", "size", "lock", "refs", "evicted")
+
+    def __init__(self, doc, mtime_ns: int, size: int):
+        self.doc = doc
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # Reentrante: uma rota pode chamar um serviço que abre o mesmo documento
+        self.lock = threading.RLock()
+        self.refs = 0
+        self.evicted = False
+
+class DocumentCache:
+    """Cache LRU de documentos fitz abertos, somente para leitura
+
+    A chave é o caminho do arquivo (o file_id no layout de armazenamento),
+    validada pelo mtime: um arquivo regravado é reaberto. O tamanho em bytes
+    do arquivo é usado como custo de cada entrada.
+    """
+
+    _entries: "OrderedDict[str, _CachedDocument]" = OrderedDict()
+    _lock = threading.Lock()
+    _bytes = 0
+    _hits = 0
+    _misses = 0
+    _evictions = 0
+
+    @staticmethod
+    @contextmanager
+    def open(file_path: str) -> Iterator[fitz.Document]:
+        """Empresta o documento em cache (não modificar nem fechar o documento)
+
+        O lock do documento é de thread e fica preso durante todo o bloco with:
+        em código assíncrono, usar somente dentro de asyncio.to_thread e nunca
+        com await no corpo.
+        """
+        entry = DocumentCache._acquire(file_path)
+        try:
+            with entry.lock:
+                yield entry.doc
+        finally:
+            DocumentCache._release(entry)
+
+    @staticmethod
+    def page_count(file_path: str) -> int:
+        """Número de páginas (abre o documento se preciso: chamar fora do loop de eventos)"""
+        with DocumentCache.open(file_path) as doc:
+            return len(doc)
+
+    @staticmethod
+    def _acquire(file_path: str) -> _CachedDocument:
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+
+        with DocumentCache._lock:
+            entry = DocumentCache._entries.get(key)
+            if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                DocumentCache._entries.move_to_end(key)
+                DocumentCache._hits += 1
+                entry.refs += 1
+                return entry
+            if entry:
+                DocumentCache._discard(key)  # Arquivo alterado desde a abertura
+            DocumentCache._misses += 1
+
+        # Abrir fora do lock global: o parse do xref não bloqueia outros documentos
+        entry = _CachedDocument(fitz.open(key), stat.st_mtime_ns, stat.st_size)
+        entry.refs = 1
+
+        with DocumentCache._lock:
+            current = DocumentCache._entries.get(key)
+            if current and current.mtime_ns == entry.mtime_ns:
+                # Outra thread abriu o mesmo arquivo ao mesmo tempo
+                current.refs += 1
+                entry.doc.close()
+                return current
+            if current:
+                DocumentCache._discard(key)
+            DocumentCache._entries[key] = entry
+            DocumentCache._bytes += entry.size
+            DocumentCache._evict()
+        return entry
+
+    @staticmethod
+    def _release(entry: _CachedDocument):
+        with DocumentCache._lock:
+            entry.refs -= 1
+            close = entry.evicted and entry.refs == 0
+        if close:
+            entry.doc.close()
+
+    @staticmethod
+    def _discard(key: str):
+        """Remove a entrada (chamar com o lock global); fecha quando não estiver em uso"""
+        entry = DocumentCache._entries.pop(key)
+        DocumentCache._bytes -= entry.size
+        entry.evicted = True
+        if entry.refs == 0:
+            entry.doc.close()
+
+    @staticmethod
+    def _evict():
+        """Despeja as entradas menos usadas até respeitar os limites (chamar com o lock global)"""
+        while DocumentCache._entries and (
+            len(DocumentCache._entries) > settings.DOCUMENT_CACHE_MAX_ENTRIES
+            or DocumentCache._bytes > settings.DOCUMENT_CACHE_MAX_BYTES
+        ):
+            key = next(iter(DocumentCache._entries))
+            DocumentCache._discard(key)
+            DocumentCache._evictions += 1
+
+    @staticmethod
+    def invalidate(file_path: str):
+        """Descarta o documento do cache (ex: arquivo apagado)"""
+        key = os.path.abspath(file_path)
+        with DocumentCache._lock:
+            if key in DocumentCache._entries:
+                DocumentCache._discard(key)
+
+    @staticmethod
+    def clear():
+        """Descarta todos os documentos"""
+        with DocumentCache._lock:
+            for key in list(DocumentCache._entries):
+                DocumentCache._discard(key)
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Métricas de uso do cache"""
+        with DocumentCache._lock:
+            requests = DocumentCache._hits + DocumentCache._misses
+            return {
+                "entries": len(DocumentCache._entries),
+                "bytes": DocumentCache._bytes,
+                "max_entries": settings.DOCUMENT_CACHE_MAX_ENTRIES,
+                "max_bytes": settings.DOCUMENT_CACHE_MAX_BYTES,
+                "hits": DocumentCache._hits,
+                "misses": DocumentCache._misses,
+                "evictions": DocumentCache._evictions,
+                "hit_rate": round(DocumentCache._hits / requests, 3) if requests else 0.0
+            }
@@ -1,16 +1,24 @@
 import os
 import uuid
+import asyncio
+import hashlib
 import aiofiles
 from fastapi import UploadFile, HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List
 from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.content_store import ContentStore
+from app.utils.file_registry import FileRegistry
+from app.utils.storage_backend import StorageBackend
+from app.utils.document_cache import DocumentCache
 
 class FileProcessor:
     """Utilitário para processamento de arquivos"""
     
     @staticmethod
     async def save_uploaded_file(file: UploadFile) -> Dict[str, Any]:
-        """Salva arquivo enviado e retorna metadados"""
+        """Salva arquivo enviado em streaming e retorna metadados"""
+        temp_path = None
         try:
             # Verificar extensão
             if not file.filename.lower().endswith('.pdf'):
@@ -18,34 +26,69 @@ class FileProcessor:
             
             # Gerar ID único
             file_id = str(uuid.uuid4())
-            file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+            file_path = StorageLayout.upload_path(file_id, create=True)
+            temp_path = os.path.join(settings.UPLOAD_DIR, f".{file_id}.part")
             
-            # Salvar arquivo
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                if len(content) > settings.MAX_FILE_SIZE:
-                    raise HTTPException(400, f"Arquivo muito grande. Máximo: {settings.MAX_FILE_SIZE // (1024 * 1024)}MB")
-                await f.write(content)
+            # Gravar em blocos: limite de tamanho, hash e contagem calculados em fluxo
+            stream_info = await FileProcessor.stream_to_file(file, temp_path)
+            
+            # Rename atômico para o blob do hash; conteúdo repetido vira apenas um alias
+            stored = await asyncio.to_thread(
+                ContentStore.store, temp_path, stream_info["sha256"], stream_info["file_size"],
+                file_id, file_path, file.filename
+            )
+            temp_path = None
             
             return {
                 "file_id": file_id,
                 "filename": file.filename,
                 "file_path": file_path,
-                "file_size": len(content)
+                "file_size": stream_info["file_size"],
+                "sha256": stream_info["sha256"],
+                "duplicate": stored["duplicate"]
             }
             
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(500, f"Erro ao processar arquivo: {str(e)}")
+        finally:
+            if temp_path:
+                FileProcessor.cleanup_file(temp_path)
+    
+    @staticmethod
+    async def stream_to_file(file: UploadFile, target_path: str,
+                             max_size: int = None) -> Dict[str, Any]:
+        """Copia o upload em blocos para disco sem carregar o arquivo inteiro em memória"""
+        max_size = max_size or settings.MAX_FILE_SIZE
+        hasher = hashlib.sha256()
+        total_size = 0
+        
+        async with aiofiles.open(target_path, 'wb') as f:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                total_size += len(chunk)
+                if total_size > max_size:
+                    raise HTTPException(400, f"Arquivo muito grande. Máximo: {max_size // (1024 * 1024)}MB")
+                
+                hasher.update(chunk)
+                await f.write(chunk)
+        
+        return {
+            "file_size": total_size,
+            "sha256": hasher.hexdigest()
+        }
     
     @staticmethod
     def get_file_path(file_id: str, directory: str = "uploads") -> str:
         """Retorna caminho do arquivo pelo ID"""
         if directory == "uploads":
-            file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+            file_path = StorageLayout.upload_path(file_id)
         elif directory == "outputs":
-            file_path = os.path.join(settings.OUTPUT_DIR, f"{file_id}.pdf")
+            file_path = StorageLayout.output_path(file_id, create=False)
         else:
             file_path = os.path.join(directory, f"{file_id}.pdf")
             
@@ -53,6 +96,28 @@ class FileProcessor:
             raise HTTPException(404, "Arquivo não encontrado")
         return file_path
     
+    @staticmethod
+    def register_output(output_path: str, parent_id: Optional[str], operation: str,
+                        kind: str = "output", media_type: str = "application/pdf",
+                        page_map: Optional[List[int]] = None,
+                        parent_ids: Optional[List[str]] = None) -> str:
+        """Registra um arquivo gerado por uma operação e devolve o próprio caminho
+
+        page_map (índices base 0 das páginas de origem) permite derivar a análise
+        da saída a partir da análise do documento de origem. parent_ids lista
+        todas as origens de saídas com mais de uma (ex: junção).
+        """
+        file_id = os.path.basename(output_path).split('.')[0]
+        source_map = None
+        if page_map is not None and parent_id:
+            parent = FileRegistry.get(parent_id)
+            if parent:
+                source_map = {"source_hash": FileRegistry.get_content_hash(parent), "pages": page_map}
+        FileRegistry.register(file_id, kind, output_path, parent_id, operation, media_type,
+                              page_map=source_map, parent_ids=parent_ids)
+        StorageBackend.get_backend().put(StorageBackend.key_for(output_path), output_path)
+        return output_path
+    
     @staticmethod
     def cleanup_file(file_path: str):
         """Remove arquivo temporário"""
@@ -66,9 +131,9 @@ class FileProcessor:
     def validate_file_exists(file_id: str, directory: str = "uploads") -> bool:
         """Valida se o arquivo existe"""
         if directory == "uploads":
-            file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+            file_path = StorageLayout.upload_path(file_id)
         elif directory == "outputs":
-            file_path = os.path.join(settings.OUTPUT_DIR, f"{file_id}.pdf")
+            file_path = StorageLayout.output_path(file_id, create=False)
         else:
             file_path = os.path.join(directory, f"{file_id}.pdf")
             
@@ -78,47 +143,18 @@ class FileProcessor:
     def get_file_info(file_path: str) -> Dict[str, Any]:
         """Retorna informações do arquivo"""
         try:
-            import fitz
-            doc = fitz.open(file_path)
-            info = {
-                "pages": len(doc),
-                "file_size": os.path.getsize(file_path),
-                "metadata": doc.metadata
-            }
-            doc.close()
+            with DocumentCache.open(file_path) as doc:
+                info = {
+                    "pages": len(doc),
+                    "file_size": os.path.getsize(file_path),
+                    "metadata": doc.metadata
+                }
             return info
         except Exception as e:
             raise HTTPException(500, f"Erro ao obter informações do arquivo: {str(e)}")
     
     @staticmethod
-    async def cleanup_old_files(max_age_hours: int = 24):
-        """Limpa arquivos antigos dos diretórios temporários"""
-        import time
-        import glob
-        
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-        
-        # Limpar uploads
-        for file_path in glob.glob(f"{settings.UPLOAD_DIR}/*.pdf"):
-            if os.path.getctime(file_path) < current_time - max_age_seconds:
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-        
-        # Limpar outputs
-        for file_path in glob.glob(f"{settings.OUTPUT_DIR}/*.pdf"):
-            if os.path.getctime(file_path) < current_time - max_age_seconds:
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-        
-        # Limpar temp
-        for file_path in glob.glob(f"{settings.TEMP_DIR}/*"):
-            if os.path.getctime(file_path) < current_time - max_age_seconds:
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
\ No newline at end of file
+    async def cleanup_old_files(max_age_hours: int = 24) -> Dict[str, Any]:
+        """Executa um ciclo de limpeza pelo registro (vencidos ou criados há mais de max_age_hours)"""
+        from app.services.core.storage_reaper import StorageReaper
+        return await asyncio.to_thread(StorageReaper.run_once, None, max_age_hours)
\ No newline at end of file
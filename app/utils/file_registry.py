@@ -0,0 +1,361 @@
+import os
+import json
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from app.config import settings
+from app.utils.storage_backend import StorageBackend
+from app.utils.document_cache import DocumentCache
+
+class FileRegistry:
+    """Registro indexado de uploads, saídas derivadas e imagens de pré-visualização
+
+    O índice SQLite é local ao nó. Com backend remoto, cada registro também é
+    publicado como JSON no bucket (registry/<file_id>.json) e importado sob
+    demanda por get(): qualquer nó encontra arquivos criados pelos outros.
+    """
+
+    _initialized = False
+
+    @staticmethod
+    @contextmanager
+    def _connect():
+        """Abre conexão com o registro de arquivos"""
+        conn = sqlite3.connect(settings.FILE_REGISTRY_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not FileRegistry._initialized:
+                FileRegistry._create_schema(conn)
+                FileRegistry._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn):
+        """Cria a tabela e os índices caso não existam"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                file_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                media_type TEXT NOT NULL,
+                parent_id TEXT,
+                operation TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            );
+        """)
+        # Registros criados antes do controle de acesso (LRU)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+        if "last_accessed" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN last_accessed REAL")
+            conn.execute("UPDATE files SET last_accessed = created_at")
+        # Registros anteriores ao ETag: hash calculado sob demanda no download
+        if "content_hash" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN content_hash TEXT")
+        # Mapa de páginas de saídas de edição: {"source_hash": ..., "pages": [...]}
+        if "page_map" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN page_map TEXT")
+        # Inquilino dono do upload (cabeçalho X-Tenant-ID); NULL = sem inquilino
+        if "tenant_id" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN tenant_id TEXT")
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_files_parent ON files(parent_id);
+            CREATE INDEX IF NOT EXISTS idx_files_expires ON files(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_files_created ON files(created_at);
+            CREATE INDEX IF NOT EXISTS idx_files_lru ON files(kind, last_accessed);
+            CREATE INDEX IF NOT EXISTS idx_files_content_hash ON files(content_hash);
+            CREATE INDEX IF NOT EXISTS idx_files_tenant ON files(tenant_id, kind);
+            CREATE TABLE IF NOT EXISTS file_parents (
+                file_id TEXT NOT NULL,
+                parent_id TEXT NOT NULL,
+                PRIMARY KEY (file_id, parent_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_file_parents_parent ON file_parents(parent_id);
+        """)
+        # Vínculos de registros anteriores à tabela de origens (um pai por arquivo)
+        conn.execute(
+            """INSERT OR IGNORE INTO file_parents (file_id, parent_id)
+               SELECT file_id, parent_id FROM files WHERE parent_id IS NOT NULL"""
+        )
+
+    @staticmethod
+    def register(file_id: str, kind: str, path: str, parent_id: Optional[str] = None,
+                 operation: Optional[str] = None, media_type: str = "application/pdf",
+                 ttl_hours: Optional[float] = None, content_hash: Optional[str] = None,
+                 page_map: Optional[Dict[str, Any]] = None,
+                 tenant_id: Optional[str] = None,
+                 parent_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Registra um arquivo (kind: upload, output ou image)
+
+        page_map indica, para saídas de edição de páginas, o hash do documento de
+        origem e o índice (base 0) de origem de cada página da saída. parent_ids
+        lista todos os arquivos de origem (ex: junção) para a exclusão em cascata;
+        o padrão é apenas parent_id.
+        """
+        now = time.time()
+        ttl_hours = settings.FILE_TTL_HOURS if ttl_hours is None else ttl_hours
+        record = {
+            "file_id": file_id,
+            "kind": kind,
+            "path": path,
+            "size": os.path.getsize(path),
+            "media_type": media_type,
+            "parent_id": parent_id,
+            "operation": operation,
+            "created_at": now,
+            "expires_at": now + ttl_hours * 3600 if ttl_hours else None,
+            "last_accessed": now,
+            "content_hash": content_hash or FileRegistry.hash_file(path),
+            "page_map": json.dumps(page_map) if page_map else None,
+            "tenant_id": tenant_id
+        }
+        with FileRegistry._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO files
+                   (file_id, kind, path, size, media_type, parent_id, operation,
+                    created_at, expires_at, last_accessed, content_hash, page_map, tenant_id)
+                   VALUES (:file_id, :kind, :path, :size, :media_type, :parent_id, :operation,
+                           :created_at, :expires_at, :last_accessed, :content_hash, :page_map, :tenant_id)""",
+                record
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO file_parents (file_id, parent_id) VALUES (?, ?)",
+                [(file_id, parent) for parent in parent_ids or [parent_id] if parent]
+            )
+
+        backend = StorageBackend.get_backend()
+        if backend.is_remote:
+            backend.put_json(FileRegistry._shared_key(file_id), {**record, "parent_ids": parent_ids})
+            # Marcadores de filhos: a exclusão em cascata em outro nó encontra esta saída
+            for parent in parent_ids or [parent_id]:
+                if parent:
+                    backend.put_bytes(f"children/{parent}/{file_id}", b"")
+        return record
+
+    @staticmethod
+    def _shared_key(file_id: str) -> str:
+        return f"registry/{file_id}.json"
+
+    @staticmethod
+    def _import_shared(file_id: str) -> Optional[Dict[str, Any]]:
+        """Copia para o índice local o registro publicado por outro nó, se houver"""
+        backend = StorageBackend.get_backend()
+        if not backend.is_remote:
+            return None
+        record = backend.get_json(FileRegistry._shared_key(file_id))
+        if record is None:
+            return None
+        parent_ids = record.pop("parent_ids", None) or [record["parent_id"]]
+        with FileRegistry._connect() as conn:
+            conn.execute(
+                """INSERT OR IGNORE INTO files
+                   (file_id, kind, path, size, media_type, parent_id, operation,
+                    created_at, expires_at, last_accessed, content_hash, page_map, tenant_id)
+                   VALUES (:file_id, :kind, :path, :size, :media_type, :parent_id, :operation,
+                           :created_at, :expires_at, :last_accessed, :content_hash, :page_map, :tenant_id)""",
+                record
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO file_parents (file_id, parent_id) VALUES (?, ?)",
+                [(file_id, parent) for parent in parent_ids if parent]
+            )
+        return record
+
+    @staticmethod
+    def get(file_id: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Busca um arquivo pelo ID (consulta pela chave primária)"""
+        with FileRegistry._connect() as conn:
+            row = conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        record = dict(row) if row else FileRegistry._import_shared(file_id)
+        if not record or (kind and record["kind"] != kind):
+            return None
+        return record
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """SHA-256 do conteúdo do arquivo, lido em blocos"""
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def get_content_hash(record: Dict[str, Any]) -> str:
+        """Hash de conteúdo do registro, calculado e gravado se ainda não existir"""
+        if not record.get("content_hash"):
+            record["content_hash"] = FileRegistry.hash_file(record["path"])
+            with FileRegistry._connect() as conn:
+                conn.execute(
+                    "UPDATE files SET content_hash = ? WHERE file_id = ?",
+                    (record["content_hash"], record["file_id"])
+                )
+        return record["content_hash"]
+
+    @staticmethod
+    def find_page_map(content_hash: str) -> Optional[Dict[str, Any]]:
+        """Mapa de páginas de uma saída de edição com este conteúdo, se houver"""
+        with FileRegistry._connect() as conn:
+            row = conn.execute(
+                "SELECT page_map FROM files WHERE content_hash = ? AND page_map IS NOT NULL LIMIT 1",
+                (content_hash,)
+            ).fetchone()
+        return json.loads(row["page_map"]) if row else None
+
+    @staticmethod
+    def find_by_content_hash(content_hash: str, kind: str = "upload") -> List[str]:
+        """IDs dos arquivos registrados com este conteúdo"""
+        with FileRegistry._connect() as conn:
+            rows = conn.execute(
+                "SELECT file_id FROM files WHERE content_hash = ? AND kind = ? ORDER BY created_at",
+                (content_hash, kind)
+            ).fetchall()
+        return [row["file_id"] for row in rows]
+
+    @staticmethod
+    def list_by_tenant(tenant_id: Optional[str], kind: str = "upload") -> List[Dict[str, Any]]:
+        """file_id e hash de conteúdo dos arquivos do inquilino (None = sem inquilino)"""
+        with FileRegistry._connect() as conn:
+            rows = conn.execute(
+                "SELECT file_id, content_hash FROM files WHERE tenant_id IS ? AND kind = ?",
+                (tenant_id, kind)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def touch(file_id: str):
+        """Marca o arquivo como acessado agora (ordem LRU da cota de disco)"""
+        with FileRegistry._connect() as conn:
+            conn.execute("UPDATE files SET last_accessed = ? WHERE file_id = ?", (time.time(), file_id))
+
+    @staticmethod
+    def expired(now: float, limit: int, created_before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Próximos arquivos vencidos, em ordem de expiração (varredura pelo índice)"""
+        with FileRegistry._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM files WHERE expires_at <= ? ORDER BY expires_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            if created_before is not None and len(rows) < limit:
+                rows += conn.execute(
+                    """SELECT * FROM files WHERE created_at <= ? AND (expires_at IS NULL OR expires_at > ?)
+                       ORDER BY created_at LIMIT ?""",
+                    (created_before, now, limit - len(rows))
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def least_recently_used(kind: str, limit: int) -> List[Dict[str, Any]]:
+        """Arquivos do tipo informado do menos para o mais recentemente acessado"""
+        with FileRegistry._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM files WHERE kind = ? ORDER BY last_accessed LIMIT ?",
+                (kind, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def total_size() -> int:
+        """Soma dos tamanhos dos arquivos registrados, em disco
+
+        Uploads com o mesmo content_hash são hardlinks de um único blob e
+        contam uma vez só.
+        """
+        with FileRegistry._connect() as conn:
+            return conn.execute(
+                """SELECT COALESCE(SUM(size), 0) FROM (
+                       SELECT MAX(size) AS size FROM files
+                       WHERE kind = 'upload' AND content_hash IS NOT NULL GROUP BY content_hash
+                       UNION ALL
+                       SELECT size FROM files WHERE kind != 'upload' OR content_hash IS NULL
+                   )"""
+            ).fetchone()[0]
+
+    @staticmethod
+    def update_path(file_id: str, path: str):
+        """Atualiza o caminho de um arquivo movido (ex: migração de layout)"""
+        with FileRegistry._connect() as conn:
+            conn.execute("UPDATE files SET path = ? WHERE file_id = ?", (path, file_id))
+
+    @staticmethod
+    def descendants(file_id: str) -> List[Dict[str, Any]]:
+        """Retorna todos os arquivos derivados, direta ou indiretamente, do file_id"""
+        with FileRegistry._connect() as conn:
+            rows = conn.execute(
+                """WITH RECURSIVE tree(file_id) AS (
+                       SELECT file_id FROM file_parents WHERE parent_id = ?
+                       UNION
+                       SELECT p.file_id FROM file_parents p JOIN tree t ON p.parent_id = t.file_id
+                   )
+                   SELECT files.* FROM files JOIN tree USING (file_id)""",
+                (file_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _import_shared_descendants(file_id: str):
+        """Importa os derivados registrados por outros nós (backend remoto)"""
+        backend = StorageBackend.get_backend()
+        if not backend.is_remote:
+            return
+        pending, seen = [file_id], {file_id}
+        while pending:
+            parent = pending.pop()
+            for key in backend.list_keys(f"children/{parent}/"):
+                child = key.rsplit("/", 1)[-1]
+                if child not in seen and FileRegistry.get(child):
+                    seen.add(child)
+                    pending.append(child)
+
+    @staticmethod
+    def forget(file_ids: List[str]):
+        """Remove registros sem tocar nos arquivos"""
+        if not file_ids:
+            return
+        with FileRegistry._connect() as conn:
+            conn.executemany("DELETE FROM files WHERE file_id = ?", [(file_id,) for file_id in file_ids])
+            conn.executemany("DELETE FROM file_parents WHERE file_id = ?", [(file_id,) for file_id in file_ids])
+        backend = StorageBackend.get_backend()
+        if backend.is_remote:
+            for file_id in file_ids:
+                backend.delete(FileRegistry._shared_key(file_id))
+                for key in backend.list_keys(f"children/{file_id}/"):
+                    backend.delete(key)
+
+    @staticmethod
+    def delete(file_id: str, cascade: bool = True) -> List[Dict[str, Any]]:
+        """Apaga o arquivo e, em cascata, todas as saídas derivadas dele"""
+        records = []
+        record = FileRegistry.get(file_id)
+        if record:
+            records.append(record)
+        if cascade:
+            FileRegistry._import_shared_descendants(file_id)
+            records.extend(FileRegistry.descendants(file_id))
+
+        FileRegistry.purge(records)
+        return records
+
+    @staticmethod
+    def purge(records: List[Dict[str, Any]]):
+        """Apaga os arquivos dos registros informados e remove os registros"""
+        backend = StorageBackend.get_backend()
+        for item in records:
+            DocumentCache.invalidate(item["path"])
+            try:
+                if os.path.exists(item["path"]):
+                    os.remove(item["path"])
+                # Uploads são removidos via ContentStore (blob compartilhado)
+                if backend.is_remote and item["kind"] != "upload":
+                    backend.delete(StorageBackend.key_for(item["path"]))
+            except Exception:
+                pass  # Ignora erros na limpeza
+
+        FileRegistry.forget([item["file_id"] for item in records])
@@ -0,0 +1,108 @@
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from app.config import settings
+
+class FileResponder:
+    """Downloads com ETag forte, GET condicional (304) e requisições parciais (206)"""
+
+    # Arquivos servidos por ID nunca mudam de conteúdo
+    IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    _RANGE_PATTERN = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+    @staticmethod
+    def _etag_matches(header: str, etag: str) -> bool:
+        """Comparação fraca de If-None-Match (aceita lista e '*')"""
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate == "*" or candidate.removeprefix("W/") == etag:
+                return True
+        return False
+
+    @staticmethod
+    def parse_range(header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+        """Converte o cabeçalho Range em intervalos (início, fim inclusivo)
+
+        Retorna None quando o cabeçalho deve ser ignorado e lista vazia quando
+        nenhum intervalo é satisfatível.
+        """
+        unit, _, ranges_spec = header.partition("=")
+        if unit.strip().lower() != "bytes" or not ranges_spec:
+            return None
+
+        ranges = []
+        for part in ranges_spec.split(","):
+            match = FileResponder._RANGE_PATTERN.match(part)
+            if not match or (not match.group(1) and not match.group(2)):
+                return None
+            if match.group(1):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else file_size - 1
+                if match.group(2) and end < start:
+                    return None
+            else:
+                # Sufixo: últimos N bytes
+                suffix = int(match.group(2))
+                if suffix == 0:
+                    continue
+                start = max(file_size - suffix, 0)
+                end = file_size - 1
+            if start < file_size:
+                ranges.append((start, min(end, file_size - 1)))
+        return ranges
+
+    @staticmethod
+    def _iter_range(path: str, start: int, end: int) -> Iterator[bytes]:
+        """Lê o intervalo do arquivo em blocos"""
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @staticmethod
+    def respond(request: Request, path: str, content_hash: str, media_type: str,
+                filename: Optional[str] = None) -> Response:
+        """Resposta de download respeitando If-None-Match, Range e If-Range"""
+        etag = f'"{content_hash}"'
+        headers: Dict[str, str] = {
+            "ETag": etag,
+            "Cache-Control": FileResponder.IMMUTABLE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes"
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and FileResponder._etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        file_size = os.path.getsize(path)
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        # If-Range com outro validador (ETag antigo ou data): enviar o arquivo inteiro
+        if range_header and (not if_range or if_range.strip() == etag):
+            ranges = FileResponder.parse_range(range_header, file_size)
+            if ranges == []:
+                headers["Content-Range"] = f"bytes */{file_size}"
+                return Response(status_code=416, headers=headers)
+            # Múltiplos intervalos (multipart/byteranges) não são suportados: resposta completa
+            if ranges and len(ranges) == 1:
+                start, end = ranges[0]
+                headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+                headers["Content-Length"] = str(end - start + 1)
+                if filename:
+                    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+                return StreamingResponse(
+                    FileResponder._iter_range(path, start, end),
+                    status_code=206,
+                    media_type=media_type,
+                    headers=headers
+                )
+
+        return FileResponse(path=path, filename=filename, media_type=media_type, headers=headers)
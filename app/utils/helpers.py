@@ -62,7 +62,7 @@ class Helpers:
     def create_directories():
         """Cria os diretórios necessários"""
         from app.config import settings
-        directories = [settings.UPLOAD_DIR, settings.OUTPUT_DIR, settings.TEMP_DIR]
+        directories = [settings.UPLOAD_DIR, settings.OUTPUT_DIR, settings.TEMP_DIR, settings.BLOB_DIR, settings.UPLOAD_SESSION_DIR, settings.ANALYSIS_JOBS_DIR]
         
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,138 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from app.config import settings
+
+BANDS = 4
+BAND_BITS = 16
+
+class PageHashIndex:
+    """Índice em disco dos hashes de página (dhash e simhash) por hash do conteúdo
+
+    Cada faixa de 16 bits do dhash é uma coluna indexada: a busca de páginas
+    parecidas consulta apenas os baldes das faixas, sem percorrer o índice.
+    """
+
+    _initialized = False
+
+    @staticmethod
+    @contextmanager
+    def _connect():
+        """Abre conexão com o índice de hashes de página"""
+        conn = sqlite3.connect(settings.PAGE_HASH_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not PageHashIndex._initialized:
+                PageHashIndex._create_schema(conn)
+                PageHashIndex._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn):
+        """Cria as tabelas e os índices caso não existam"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                sha256 TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                sha256 TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                dhash INTEGER NOT NULL,
+                simhash INTEGER,
+                band0 INTEGER NOT NULL,
+                band1 INTEGER NOT NULL,
+                band2 INTEGER NOT NULL,
+                band3 INTEGER NOT NULL,
+                PRIMARY KEY (sha256, page)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_band0 ON pages(band0);
+            CREATE INDEX IF NOT EXISTS idx_pages_band1 ON pages(band1);
+            CREATE INDEX IF NOT EXISTS idx_pages_band2 ON pages(band2);
+            CREATE INDEX IF NOT EXISTS idx_pages_band3 ON pages(band3);
+        """)
+
+    @staticmethod
+    def _to_signed(value: Optional[int]) -> Optional[int]:
+        # INTEGER do SQLite tem 64 bits com sinal
+        if value is None:
+            return None
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    @staticmethod
+    def _to_unsigned(value: Optional[int]) -> Optional[int]:
+        if value is None:
+            return None
+        return value + (1 << 64) if value < 0 else value
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        return {
+            "sha256": row["sha256"],
+            "page": row["page"],
+            "dhash": PageHashIndex._to_unsigned(row["dhash"]),
+            "simhash": PageHashIndex._to_unsigned(row["simhash"])
+        }
+
+    @staticmethod
+    def has(sha256: str, version: str) -> bool:
+        """O documento já foi indexado com esta versão dos hashes?"""
+        with PageHashIndex._connect() as conn:
+            row = conn.execute("SELECT version FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+        return bool(row) and row["version"] == version
+
+    @staticmethod
+    def put(sha256: str, version: str, fingerprints: List[Dict[str, Any]]):
+        """Grava (ou substitui) os hashes de todas as páginas do documento"""
+        mask = (1 << BAND_BITS) - 1
+        rows = [
+            (
+                sha256, item["page"], PageHashIndex._to_signed(item["dhash"]), PageHashIndex._to_signed(item["simhash"]),
+                *[(item["dhash"] >> (BAND_BITS * (BANDS - 1 - i))) & mask for i in range(BANDS)]
+            )
+            for item in fingerprints
+        ]
+        with PageHashIndex._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            conn.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (sha256, version, len(rows), time.time())
+            )
+
+    @staticmethod
+    def get(sha256: str) -> List[Dict[str, Any]]:
+        """Hashes das páginas do documento, em ordem de página"""
+        with PageHashIndex._connect() as conn:
+            rows = conn.execute("SELECT * FROM pages WHERE sha256 = ? ORDER BY page", (sha256,)).fetchall()
+        return [PageHashIndex._row(row) for row in rows]
+
+    @staticmethod
+    def candidates(band_values: List[List[int]], exclude_sha256: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Páginas que coincidem com algum dos valores consultados em alguma faixa"""
+        clauses, params = [], []
+        for i, values in enumerate(band_values):
+            clauses.append(f"band{i} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        query = f"SELECT * FROM pages WHERE ({' OR '.join(clauses)})"
+        if exclude_sha256:
+            query += " AND sha256 != ?"
+            params.append(exclude_sha256)
+
+        with PageHashIndex._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [PageHashIndex._row(row) for row in rows]
+
+    @staticmethod
+    def remove(sha256: str):
+        """Remove o documento do índice"""
+        with PageHashIndex._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
@@ -0,0 +1,125 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List
+from app.config import settings
+
+class SearchIndex:
+    """Índice de texto completo (SQLite FTS5) com uma linha por página, por hash do conteúdo
+
+    A tabela pages guarda (sha256, página) com índice normal; a tabela FTS usa o
+    mesmo rowid, então filtrar ou remover um documento não varre o índice textual.
+    """
+
+    _initialized = False
+
+    @staticmethod
+    @contextmanager
+    def _connect():
+        """Abre conexão com o índice de busca"""
+        conn = sqlite3.connect(settings.SEARCH_INDEX_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not SearchIndex._initialized:
+                SearchIndex._create_schema(conn)
+                SearchIndex._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn):
+        """Cria as tabelas e os índices caso não existam"""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                sha256 TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                rowid INTEGER PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                page INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_sha256 ON pages(sha256, page);
+            CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                text, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+
+    @staticmethod
+    def _scope(conn, sha256_list: List[str]):
+        """Carrega os hashes consultados na tabela temporária scope da conexão
+
+        Um IN (?, ...) com um parâmetro por documento passaria do limite de
+        variáveis do SQLite na busca em todos os documentos de um inquilino.
+        """
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS scope (sha256 TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM scope")
+        conn.executemany("INSERT OR IGNORE INTO scope VALUES (?)", [(sha256,) for sha256 in sha256_list])
+
+    @staticmethod
+    def indexed(sha256_list: List[str], version: str) -> set:
+        """Hashes da lista já indexados com esta versão"""
+        if not sha256_list:
+            return set()
+        with SearchIndex._connect() as conn:
+            SearchIndex._scope(conn, sha256_list)
+            rows = conn.execute(
+                "SELECT sha256 FROM documents JOIN scope USING (sha256) WHERE version = ?", (version,)
+            ).fetchall()
+        return {row["sha256"] for row in rows}
+
+    @staticmethod
+    def put(sha256: str, version: str, page_texts: List[str]):
+        """Grava (ou substitui) o texto de todas as páginas do documento"""
+        with SearchIndex._connect() as conn:
+            SearchIndex._delete(conn, sha256)
+            for page_number, text in enumerate(page_texts, start=1):
+                rowid = conn.execute(
+                    "INSERT INTO pages (sha256, page) VALUES (?, ?)", (sha256, page_number)
+                ).lastrowid
+                conn.execute("INSERT INTO page_text (rowid, text) VALUES (?, ?)", (rowid, text))
+            conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (sha256, version, len(page_texts), time.time())
+            )
+
+    @staticmethod
+    def search(fts_query: str, sha256_list: List[str], limit: int,
+               snippet_tokens: int = 12) -> List[Dict[str, Any]]:
+        """Páginas que casam com a consulta FTS5, da mais relevante (bm25) para a menos"""
+        if not sha256_list:
+            return []
+        with SearchIndex._connect() as conn:
+            SearchIndex._scope(conn, sha256_list)
+            rows = conn.execute(
+                """SELECT pages.sha256, pages.page, bm25(page_text) AS score,
+                          snippet(page_text, 0, '<mark>', '</mark>', '…', ?) AS snippet
+                   FROM page_text
+                   JOIN pages ON pages.rowid = page_text.rowid
+                   JOIN scope ON scope.sha256 = pages.sha256
+                   WHERE page_text MATCH ?
+                   ORDER BY score LIMIT ?""",
+                (snippet_tokens, fts_query, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _delete(conn, sha256: str):
+        # Subconsulta na mesma transação: um put concorrente do mesmo conteúdo
+        # (indexação do upload e busca) não deixa texto órfão com rowid reaproveitado
+        conn.execute(
+            "DELETE FROM page_text WHERE rowid IN (SELECT rowid FROM pages WHERE sha256 = ?)", (sha256,)
+        )
+        conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+        conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+
+    @staticmethod
+    def remove(sha256: str):
+        """Remove o documento do índice"""
+        with SearchIndex._connect() as conn:
+            SearchIndex._delete(conn, sha256)
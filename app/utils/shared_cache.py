@@ -0,0 +1,171 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from app.config import settings
+
+class SharedCache:
+    """Cache em dois níveis: L1 em memória no processo e L2 no Redis compartilhado entre workers
+
+    O Redis é opcional: se não estiver configurado ou cair, o cache segue apenas
+    com o L1 e volta a tentar o Redis após SHARED_CACHE_RETRY_SECONDS (circuit breaker).
+    """
+
+    _l1: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+    _l1_bytes = 0
+    _lock = threading.Lock()
+
+    _client = None
+    _client_injected = False
+    _circuit_open_until = 0.0
+
+    _stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "l2_errors": 0}
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"pdfgo:{namespace}:{key}"
+
+    @staticmethod
+    def set_client(client):
+        """Injeta o cliente do L2 (ex: fakeredis em testes); None desativa o L2"""
+        SharedCache._client = client
+        SharedCache._client_injected = True
+        SharedCache._circuit_open_until = 0.0
+
+    @staticmethod
+    def _get_client():
+        """Cliente Redis criado sob demanda, ou None com o L2 desativado/indisponível"""
+        if time.time() < SharedCache._circuit_open_until:
+            return None
+        if SharedCache._client_injected:
+            return SharedCache._client
+        if not settings.SHARED_CACHE_REDIS_ENABLED:
+            return None
+        if SharedCache._client is None:
+            try:
+                import redis
+            except ImportError:
+                return None
+            SharedCache._client = redis.Redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=settings.SHARED_CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=settings.SHARED_CACHE_REDIS_TIMEOUT
+            )
+        return SharedCache._client
+
+    @staticmethod
+    def _count(stat: str):
+        """Incrementa um contador (as requisições rodam em várias threads)"""
+        with SharedCache._lock:
+            SharedCache._stats[stat] += 1
+
+    @staticmethod
+    def _l2_failed():
+        """Abre o circuito: o L2 fica desligado por um intervalo após uma falha"""
+        with SharedCache._lock:
+            SharedCache._stats["l2_errors"] += 1
+            SharedCache._circuit_open_until = time.time() + settings.SHARED_CACHE_RETRY_SECONDS
+
+    @staticmethod
+    def _l1_get(full_key: str) -> Optional[bytes]:
+        with SharedCache._lock:
+            item = SharedCache._l1.get(full_key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at and expires_at < time.time():
+                SharedCache._l1_pop(full_key)
+                return None
+            SharedCache._l1.move_to_end(full_key)
+            return value
+
+    @staticmethod
+    def _l1_pop(full_key: str):
+        value, _ = SharedCache._l1.pop(full_key)
+        SharedCache._l1_bytes -= len(value)
+
+    @staticmethod
+    def _l1_set(full_key: str, value: bytes, ttl: Optional[int]):
+        if len(value) > settings.SHARED_CACHE_L1_MAX_BYTES:
+            return
+        with SharedCache._lock:
+            if full_key in SharedCache._l1:
+                SharedCache._l1_pop(full_key)
+            SharedCache._l1[full_key] = (value, time.time() + ttl if ttl else 0.0)
+            SharedCache._l1_bytes += len(value)
+            while SharedCache._l1_bytes > settings.SHARED_CACHE_L1_MAX_BYTES:
+                SharedCache._l1_pop(next(iter(SharedCache._l1)))
+
+    @staticmethod
+    def get(namespace: str, key: str) -> Optional[bytes]:
+        """Busca no L1 e depois no L2 (promovendo para o L1)"""
+        full_key = SharedCache._key(namespace, key)
+        value = SharedCache._l1_get(full_key)
+        if value is not None:
+            SharedCache._count("l1_hits")
+            return value
+
+        client = SharedCache._get_client()
+        if client is not None:
+            try:
+                value = client.get(full_key)
+            except Exception:
+                SharedCache._l2_failed()
+                value = None
+            if value is not None:
+                SharedCache._count("l2_hits")
+                SharedCache._l1_set(full_key, value, settings.SHARED_CACHE_TTL_SECONDS)
+                return value
+
+        SharedCache._count("misses")
+        return None
+
+    @staticmethod
+    def set(namespace: str, key: str, value: bytes, ttl: Optional[int] = None):
+        """Grava no L1 e, se couber no limite por item, no L2"""
+        ttl = settings.SHARED_CACHE_TTL_SECONDS if ttl is None else ttl
+        full_key = SharedCache._key(namespace, key)
+        SharedCache._l1_set(full_key, value, ttl)
+
+        if len(value) > settings.SHARED_CACHE_MAX_ITEM_BYTES:
+            return
+        client = SharedCache._get_client()
+        if client is not None:
+            try:
+                client.set(full_key, value, ex=ttl or None)
+            except Exception:
+                SharedCache._l2_failed()
+
+    @staticmethod
+    def get_json(namespace: str, key: str) -> Optional[Any]:
+        value = SharedCache.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    @staticmethod
+    def set_json(namespace: str, key: str, value: Any, ttl: Optional[int] = None):
+        SharedCache.set(namespace, key, json.dumps(value, default=str).encode("utf-8"), ttl)
+
+    @staticmethod
+    def clear_local():
+        """Esvazia o L1 deste processo"""
+        with SharedCache._lock:
+            SharedCache._l1.clear()
+            SharedCache._l1_bytes = 0
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Métricas dos dois níveis e estado do Redis"""
+        if not settings.SHARED_CACHE_REDIS_ENABLED and not SharedCache._client_injected:
+            l2_state = "disabled"
+        elif time.time() < SharedCache._circuit_open_until:
+            l2_state = "unavailable"
+        else:
+            l2_state = "active"
+        with SharedCache._lock:
+            return {
+                **SharedCache._stats,
+                "l1_entries": len(SharedCache._l1),
+                "l1_bytes": SharedCache._l1_bytes,
+                "l2": l2_state
+            }
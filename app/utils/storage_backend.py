@@ -0,0 +1,231 @@
+import os
+import json
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterator, List, Optional
+from app.config import settings
+
+class StorageBackend(ABC):
+    """Interface de armazenamento: put, get, stream e stat por chave relativa
+
+    Além dos arquivos, guarda pequenos registros JSON (put_json/get_json) que
+    tornam metadados visíveis a todos os nós quando o backend é remoto.
+    As operações fazem I/O bloqueante (rede no S3): em rotas assíncronas,
+    chamar via asyncio.to_thread.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    is_remote = False
+
+    @staticmethod
+    def get_backend() -> "StorageBackend":
+        """Retorna o backend configurado em STORAGE_BACKEND (instância única por processo)"""
+        if StorageBackend._instance is None:
+            with StorageBackend._instance_lock:
+                if StorageBackend._instance is None:
+                    if settings.STORAGE_BACKEND == "s3":
+                        StorageBackend._instance = S3StorageBackend()
+                    else:
+                        StorageBackend._instance = LocalStorageBackend()
+        return StorageBackend._instance
+
+    @staticmethod
+    def key_for(local_path: str) -> str:
+        """Chave do objeto: caminho relativo à raiz do armazenamento"""
+        return os.path.relpath(local_path, settings.STORAGE_ROOT).replace(os.sep, "/")
+
+    @abstractmethod
+    def put(self, key: str, local_path: str):
+        """Envia o arquivo local para a chave"""
+
+    @abstractmethod
+    def get(self, key: str, local_path: str):
+        """Baixa o objeto da chave para o caminho local"""
+
+    @abstractmethod
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None,
+               chunk_size: int = None) -> Iterator[bytes]:
+        """Lê o objeto em blocos, opcionalmente apenas o intervalo [start, end]"""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        """Tamanho e data de modificação do objeto, ou None se não existir"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove o objeto (sem erro se não existir)"""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        """Grava um objeto pequeno a partir da memória"""
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Conteúdo de um objeto pequeno, ou None se não existir"""
+
+    @abstractmethod
+    def list_keys(self, prefix: str) -> List[str]:
+        """Chaves com o prefixo"""
+
+    def put_json(self, key: str, value: Any):
+        self.put_bytes(key, json.dumps(value, default=str).encode("utf-8"))
+
+    def get_json(self, key: str) -> Optional[Any]:
+        data = self.get_bytes(key)
+        return json.loads(data) if data is not None else None
+
+    def ensure_local(self, local_path: str) -> bool:
+        """Cache de leitura: garante uma cópia local do objeto para o fitz"""
+        if os.path.exists(local_path):
+            return True
+        if not self.is_remote:
+            return False
+        key = StorageBackend.key_for(local_path)
+        if self.stat(key) is None:
+            return False
+        self.get(key, local_path)
+        return True
+
+class LocalStorageBackend(StorageBackend):
+    """Backend em disco local (layout padrão em storage/)"""
+
+    def _path(self, key: str) -> str:
+        return os.path.join(settings.STORAGE_ROOT, key)
+
+    def put(self, key: str, local_path: str):
+        target_path = self._path(key)
+        if os.path.abspath(target_path) == os.path.abspath(local_path):
+            return  # O arquivo já está no lugar definitivo
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.copyfile(local_path, target_path)
+
+    def get(self, key: str, local_path: str):
+        source_path = self._path(key)
+        if os.path.abspath(source_path) != os.path.abspath(local_path):
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            shutil.copyfile(source_path, local_path)
+
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None,
+               chunk_size: int = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        file_stat = os.stat(path)
+        return {"size": file_stat.st_size, "modified": file_stat.st_mtime}
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def put_bytes(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list_keys(self, prefix: str) -> List[str]:
+        directory, _, name_prefix = self._path(prefix).rpartition(os.sep)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            StorageBackend.key_for(os.path.join(directory, name))
+            for name in os.listdir(directory) if name.startswith(name_prefix)
+        ]
+
+class S3StorageBackend(StorageBackend):
+    """Backend compatível com S3 (AWS, MinIO...) com upload multipart e leitura em streaming"""
+
+    is_remote = True
+
+    def __init__(self):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise RuntimeError("boto3 é necessário para STORAGE_BACKEND=s3")
+
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY or None,
+            aws_secret_access_key=settings.S3_SECRET_KEY or None,
+            region_name=settings.S3_REGION or None
+        )
+        # Arquivos acima do limite são enviados em partes, lidas do disco sob demanda
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE
+        )
+
+    def put(self, key: str, local_path: str):
+        self.client.upload_file(local_path, self.bucket, key, Config=self.transfer_config)
+
+    def get(self, key: str, local_path: str):
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        temp_path = f"{local_path}.{threading.get_ident()}.download"
+        try:
+            self.client.download_file(self.bucket, key, temp_path, Config=self.transfer_config)
+            os.replace(temp_path, local_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None,
+               chunk_size: int = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        for chunk in response["Body"].iter_chunks(chunk_size):
+            yield chunk
+
+    def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError:
+            return None
+        return {"size": head["ContentLength"], "modified": head["LastModified"].timestamp()}
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        return keys
@@ -0,0 +1,54 @@
+import os
+import hashlib
+from app.config import settings
+
+class StorageLayout:
+    """Layout em disco particionado por prefixo de hash (ex: ab/cd/<id>.pdf)"""
+
+    @staticmethod
+    def shard(name: str) -> str:
+        """Subdiretório de dois níveis derivado do hash do nome"""
+        digest = hashlib.md5(name.encode("utf-8")).hexdigest()
+        return os.path.join(digest[:2], digest[2:4])
+
+    @staticmethod
+    def sharded_path(base_dir: str, name: str, extension: str = "pdf", create: bool = True) -> str:
+        """Caminho particionado para o arquivo <name>.<extension> dentro de base_dir"""
+        directory = os.path.join(base_dir, StorageLayout.shard(name))
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{name}.{extension}")
+
+    @staticmethod
+    def upload_path(file_id: str, create: bool = False) -> str:
+        """Caminho do PDF enviado (create=True apenas ao gravar um novo upload)"""
+        return StorageLayout.sharded_path(settings.UPLOAD_DIR, file_id, "pdf", create)
+
+    @staticmethod
+    def fetch_upload(file_id: str) -> str:
+        """Caminho local do upload para leitura, restaurado do backend se necessário"""
+        from app.utils.content_store import ContentStore
+        from app.utils.file_registry import FileRegistry
+        file_path = StorageLayout.upload_path(file_id)
+        if ContentStore.ensure_local(file_id, file_path):
+            FileRegistry.touch(file_id)
+        return file_path
+
+    @staticmethod
+    def output_path(output_name: str, create: bool = True) -> str:
+        """Caminho de um PDF gerado (o nome sem extensão é o ID de download)"""
+        return StorageLayout.sharded_path(settings.OUTPUT_DIR, output_name, "pdf", create)
+
+    @staticmethod
+    def temp_path(name: str, extension: str, create: bool = True) -> str:
+        """Caminho de um arquivo temporário (ex: imagens exportadas)"""
+        return StorageLayout.sharded_path(settings.TEMP_DIR, name, extension, create)
+
+    @staticmethod
+    def iter_files(base_dir: str, extension: str = None):
+        """Percorre todos os arquivos do layout, ignorando temporários ocultos"""
+        for root, dirs, files in os.walk(base_dir):
+            for filename in files:
+                if filename.startswith('.') or (extension and not filename.endswith(extension)):
+                    continue
+                yield os.path.join(root, filename)
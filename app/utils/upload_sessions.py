@@ -0,0 +1,242 @@
+import os
+import json
+import uuid
+import time
+import fcntl
+import asyncio
+import hashlib
+import aiofiles
+from contextlib import contextmanager
+from typing import Dict, Any, AsyncIterator
+from fastapi import HTTPException
+from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.content_store import ContentStore
+
+class UploadSessionManager:
+    """Sessões de upload retomável: blocos anexados direto em disco com hash incremental
+
+    O worker que recebe o último bloco grava o SHA-256 final nos metadados da
+    sessão, então a finalização em qualquer worker não relê o arquivo.
+    """
+
+    # Estado do hash por sessão (apenas neste processo; recalculado do disco se perdido)
+    _hashers: Dict[str, Any] = {}
+    _hashed_offsets: Dict[str, int] = {}
+
+    @staticmethod
+    def _meta_path(session_id: str) -> str:
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{session_id}.json")
+
+    @staticmethod
+    def _data_path(session_id: str) -> str:
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{session_id}.part")
+
+    @staticmethod
+    def create_session(filename: str, total_size: int) -> Dict[str, Any]:
+        """Cria uma nova sessão de upload"""
+        if not filename.lower().endswith('.pdf'):
+            raise HTTPException(400, "Arquivo deve ser PDF")
+        if total_size <= 0:
+            raise HTTPException(400, "Tamanho total deve ser positivo")
+        if total_size > settings.MAX_FILE_SIZE:
+            raise HTTPException(400, f"Arquivo muito grande. Máximo: {settings.MAX_FILE_SIZE // (1024 * 1024)}MB")
+
+        session_id = str(uuid.uuid4())
+        session = {
+            "session_id": session_id,
+            "filename": filename,
+            "total_size": total_size,
+            "created_at": time.time()
+        }
+
+        UploadSessionManager._save_session(session)
+        open(UploadSessionManager._data_path(session_id), "wb").close()
+
+        UploadSessionManager._hashers[session_id] = hashlib.sha256()
+        UploadSessionManager._hashed_offsets[session_id] = 0
+
+        return UploadSessionManager.get_status(session_id)
+
+    @staticmethod
+    def _load_session(session_id: str) -> Dict[str, Any]:
+        """Carrega metadados da sessão"""
+        meta_path = UploadSessionManager._meta_path(session_id)
+        if not os.path.exists(meta_path):
+            raise HTTPException(404, "Sessão de upload não encontrada")
+        with open(meta_path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_session(session: Dict[str, Any]):
+        """Grava os metadados da sessão (substituição atômica)"""
+        meta_path = UploadSessionManager._meta_path(session["session_id"])
+        temp_path = f"{meta_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(session, f)
+        os.replace(temp_path, meta_path)
+
+    @staticmethod
+    @contextmanager
+    def _file_lock(session_id: str):
+        """Trava exclusiva sobre o arquivo de dados, válida entre workers (flock)
+
+        Não espera: um bloco ou finalização já em andamento para a sessão
+        resulta em 409, e o cliente consulta o offset antes de tentar de novo.
+        """
+        try:
+            fd = os.open(UploadSessionManager._data_path(session_id), os.O_RDONLY)
+        except FileNotFoundError:
+            raise HTTPException(404, "Sessão de upload não encontrada")
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise HTTPException(409, "Outra requisição desta sessão está em andamento")
+            yield
+        finally:
+            os.close(fd)  # Fechar o descritor libera a trava
+
+    @staticmethod
+    def get_status(session_id: str) -> Dict[str, Any]:
+        """Retorna o offset atual da sessão"""
+        session = UploadSessionManager._load_session(session_id)
+        offset = os.path.getsize(UploadSessionManager._data_path(session_id))
+        return {
+            "session_id": session_id,
+            "filename": session["filename"],
+            "offset": offset,
+            "total_size": session["total_size"],
+            "complete": offset == session["total_size"]
+        }
+
+    @staticmethod
+    def _get_hasher(session_id: str, offset: int):
+        """Retorna o hash incremental alinhado ao offset atual do arquivo"""
+        hasher = UploadSessionManager._hashers.get(session_id)
+        if hasher is None or UploadSessionManager._hashed_offsets.get(session_id) != offset:
+            # Processo reiniciado ou outro worker recebeu blocos: recalcular do disco
+            hasher = hashlib.sha256()
+            with open(UploadSessionManager._data_path(session_id), "rb") as f:
+                for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            UploadSessionManager._hashers[session_id] = hasher
+            UploadSessionManager._hashed_offsets[session_id] = offset
+        return hasher
+
+    @staticmethod
+    async def append_chunk(session_id: str, start: int, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Anexa um intervalo de bytes ao final do arquivo da sessão"""
+        with UploadSessionManager._file_lock(session_id):
+            session = UploadSessionManager._load_session(session_id)
+            data_path = UploadSessionManager._data_path(session_id)
+            offset = os.path.getsize(data_path)
+
+            if start != offset:
+                raise HTTPException(409, f"Offset inválido: esperado {offset}, recebido {start}")
+
+            hasher = await asyncio.to_thread(UploadSessionManager._get_hasher, session_id, offset)
+            written = offset
+
+            try:
+                async with aiofiles.open(data_path, "ab") as f:
+                    async for chunk in stream:
+                        if not chunk:
+                            continue
+                        if written + len(chunk) > session["total_size"]:
+                            raise HTTPException(400, "Bloco excede o tamanho total declarado")
+                        hasher.update(chunk)
+                        await f.write(chunk)
+                        written += len(chunk)
+            except HTTPException:
+                # Descartar o bloco parcial para manter arquivo e hash consistentes
+                os.truncate(data_path, offset)
+                UploadSessionManager._hashers.pop(session_id, None)
+                raise
+            except Exception:
+                # Conexão interrompida: o que já foi gravado vale como progresso
+                UploadSessionManager._hashers.pop(session_id, None)
+                raise
+
+            UploadSessionManager._hashed_offsets[session_id] = written
+
+            if written == session["total_size"]:
+                # Hash final nos metadados: a finalização em qualquer worker é O(1)
+                session["sha256"] = hasher.hexdigest()
+                UploadSessionManager._save_session(session)
+
+        return UploadSessionManager.get_status(session_id)
+
+    @staticmethod
+    async def finalize(session_id: str) -> Dict[str, Any]:
+        """Conclui a sessão e move o arquivo para o fluxo normal de file_id"""
+        with UploadSessionManager._file_lock(session_id):
+            session = UploadSessionManager._load_session(session_id)
+            status = UploadSessionManager.get_status(session_id)
+            if not status["complete"]:
+                raise HTTPException(409, f"Upload incompleto: {status['offset']} de {status['total_size']} bytes")
+
+            sha256 = session.get("sha256")
+            if sha256 is None:
+                # Sessões completadas antes do hash ser gravado nos metadados
+                hasher = await asyncio.to_thread(UploadSessionManager._get_hasher, session_id, status["offset"])
+                sha256 = hasher.hexdigest()
+
+            file_id = str(uuid.uuid4())
+            file_path = StorageLayout.upload_path(file_id, create=True)
+
+            # Rename do arquivo já montado: custo constante
+            stored = await asyncio.to_thread(
+                ContentStore.store, UploadSessionManager._data_path(session_id), sha256,
+                status["total_size"], file_id, file_path, status["filename"]
+            )
+            UploadSessionManager.discard(session_id)
+
+        return {
+            "file_id": file_id,
+            "filename": status["filename"],
+            "file_path": file_path,
+            "file_size": status["total_size"],
+            "sha256": sha256,
+            "duplicate": stored["duplicate"]
+        }
+
+    @staticmethod
+    def sweep_stale(cutoff: float) -> int:
+        """Descarta sessões sem atividade desde cutoff (metadados e dados juntos)
+
+        A atividade é a última escrita em qualquer um dos dois arquivos: cada
+        bloco atualiza o .part, enquanto o .json só muda na criação e no último
+        bloco. Sessões com requisição em andamento (trava ocupada) são mantidas.
+        """
+        session_ids = {
+            name.rsplit(".", 1)[0] for name in os.listdir(settings.UPLOAD_SESSION_DIR)
+            if name.endswith((".json", ".part"))
+        }
+        removed = 0
+        for session_id in session_ids:
+            mtimes = [
+                os.path.getmtime(path)
+                for path in [UploadSessionManager._meta_path(session_id), UploadSessionManager._data_path(session_id)]
+                if os.path.exists(path)
+            ]
+            if not mtimes or max(mtimes) >= cutoff:
+                continue
+            try:
+                with UploadSessionManager._file_lock(session_id):
+                    UploadSessionManager.discard(session_id)
+            except HTTPException as e:
+                if e.status_code != 404:
+                    continue  # Em uso por outro worker
+                UploadSessionManager.discard(session_id)  # Metadados sem dados
+            removed += 1
+        return removed
+
+    @staticmethod
+    def discard(session_id: str):
+        """Remove a sessão e seus dados"""
+        for path in [UploadSessionManager._meta_path(session_id), UploadSessionManager._data_path(session_id)]:
+            if os.path.exists(path):
+                os.remove(path)
+        UploadSessionManager._hashers.pop(session_id, None)
+        UploadSessionManager._hashed_offsets.pop(session_id, None)
@@ -1,6 +1,7 @@
 import os
 from fastapi import HTTPException
 from typing import List, Dict, Any
+from app.utils.storage_layout import StorageLayout
 
 class Validators:
     """Utilitário de validações"""
@@ -34,7 +35,7 @@ class Validators:
     def validate_file_ids(file_ids: List[str]) -> bool:
         """Valida se todos os file_ids existem"""
         for file_id in file_ids:
-            upload_path = f"storage/uploads/{file_id}.pdf"
+            upload_path = StorageLayout.upload_path(file_id)
             if not os.path.exists(upload_path):
                 raise HTTPException(404, f"Arquivo {file_id} não encontrado")
         return True
@@ -0,0 +1,71 @@
+import os
+import zipfile
+from typing import Iterator, List, Tuple
+from fastapi.responses import StreamingResponse
+from app.config import settings
+
+class _StreamSink:
+    """Destino sem seek para o zipfile: acumula os bytes escritos até serem enviados"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ZipStreamer:
+    """ZIP gerado durante o envio, sem arquivo temporário em disco"""
+
+    @staticmethod
+    def stream(entries: List[Tuple[str, str]]) -> Iterator[bytes]:
+        """Gera os bytes do ZIP para as entradas (nome no arquivo, caminho local)
+
+        Os arquivos são armazenados sem compressão (PDFs e imagens já são
+        comprimidos), com descritores de dados após cada entrada.
+        """
+        sink = _StreamSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for arcname, path in entries:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = zipfile.ZIP_STORED
+                force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+                with open(path, "rb") as source, archive.open(info, "w", force_zip64=force_zip64) as target:
+                    for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                        target.write(chunk)
+                        yield sink.drain()
+                # Descritor de dados da entrada
+                data = sink.drain()
+                if data:
+                    yield data
+        # Diretório central
+        data = sink.drain()
+        if data:
+            yield data
+
+    @staticmethod
+    def response(entries: List[Tuple[str, str]], archive_name: str) -> StreamingResponse:
+        """Resposta HTTP com o ZIP em streaming"""
+        return StreamingResponse(
+            ZipStreamer.stream(entries),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{archive_name}"'}
+        )
+
+    @staticmethod
+    def entries_for(paths: List[str]) -> List[Tuple[str, str]]:
+        """Entradas numeradas na ordem das partes, com o nome de cada arquivo gerado"""
+        return [(f"{i + 1:03d}_{os.path.basename(path)}", path) for i, path in enumerate(paths)]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark da detecção de colunas: agrupamento 1-D em NumPy x KMeans (scikit-learn)
+
+Uso:
+    python scripts/benchmark_column_detection.py arquivo1.pdf [arquivo2.pdf ...]
+
+Para cada página mede o tempo das duas implementações e compara o agrupamento
+das posições x das linhas candidatas a tabela (número de colunas e decisão de
+tabela) e PDFAnalyzer._detect_columns. O scikit-learn só é necessário para a
+comparação e está em requirements/dev.txt.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.util
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz
+import numpy as np
+from app.services.core.page_features import PageFeatures
+from app.services.core.column_clustering import ColumnClustering
+from app.services.core.pdf_analyzer import PDFAnalyzer
+
+def numpy_table_columns(rows):
+    """Centros das colunas das linhas candidatas a tabela (até 10)"""
+    centers = ColumnClustering.cluster_positions([elem["bbox"][0] for row in rows for elem in row], max_clusters=10)
+    return centers if len(centers) >= 2 else []
+
+def kmeans_table_columns(rows):
+    """Implementação com KMeans usada antes na detecção de tabelas"""
+    from sklearn.cluster import KMeans
+
+    all_x_positions = [elem["bbox"][0] for row in rows for elem in row]
+    if not all_x_positions:
+        return []
+    n_clusters = min(10, len(set(all_x_positions)))
+    if n_clusters < 2:
+        return []
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+    kmeans.fit(np.array(all_x_positions).reshape(-1, 1))
+    return sorted(float(center[0]) for center in kmeans.cluster_centers_)
+
+def kmeans_text_columns(spans):
+    """Implementação anterior de PDFAnalyzer._detect_columns"""
+    from sklearn.cluster import KMeans
+
+    x_positions = [span["bbox"][0] for span in spans]
+    if not x_positions:
+        return 1
+    kmeans = KMeans(n_clusters=min(3, len(set(x_positions))), random_state=42)
+    kmeans.fit(np.array(x_positions).reshape(-1, 1))
+    return len(set(kmeans.labels_))
+
+def page_rows(features):
+    """Agrupamento em linhas por y0 com tolerância de 5pt (mínimo de 3 linhas)"""
+    elements = [{"bbox": span["bbox"]} for span in features.spans]
+    if len(elements) < 4:
+        return []
+    rows, current_row = [], []
+    current_y = min(elem["bbox"][1] for elem in elements)
+    for elem in sorted(elements, key=lambda x: x["bbox"][1]):
+        if abs(elem["bbox"][1] - current_y) <= 5:
+            current_row.append(elem)
+        elif current_row:
+            rows.append(current_row)
+            current_row = [elem]
+            current_y = elem["bbox"][1]
+    if current_row:
+        rows.append(current_row)
+    return rows if len(rows) >= 3 else []
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def benchmark(paths):
+    compare = importlib.util.find_spec("sklearn") is not None
+    if not compare:
+        print("⚠️  scikit-learn não instalado: medindo apenas a implementação NumPy")
+
+    pages = 0
+    new_time = old_time = 0.0
+    same_table_columns = same_table_decision = same_text_columns = 0
+
+    for path in paths:
+        with fitz.open(path) as doc:
+            for features in PageFeatures.iter_document(doc):
+                pages += 1
+                rows = page_rows(features)
+
+                new_table, t1 = timed(numpy_table_columns, rows) if rows else ([], 0.0)
+                new_text, t2 = timed(PDFAnalyzer._detect_columns, features.spans)
+                new_time += t1 + t2
+
+                if not compare:
+                    continue
+                old_table, t1 = timed(kmeans_table_columns, rows) if rows else ([], 0.0)
+                old_text, t2 = timed(kmeans_text_columns, features.spans) if features.spans else (1, 0.0)
+                old_time += t1 + t2
+
+                same_table_columns += len(new_table) == len(old_table)
+                same_table_decision += (len(new_table) >= 2) == (len(old_table) >= 2)
+                same_text_columns += new_text == old_text
+
+    if not pages:
+        print("Nenhuma página encontrada")
+        return
+
+    print(f"📄 {pages} páginas")
+    print(f"⚡ NumPy:  {new_time * 1e6 / pages:10.1f} µs/página")
+    if compare:
+        print(f"🐢 KMeans: {old_time * 1e6 / pages:10.1f} µs/página ({old_time / max(new_time, 1e-9):.0f}x mais lento)")
+        print(f"✅ Colunas de tabela iguais:  {same_table_columns / pages:.1%}")
+        print(f"✅ Decisão de tabela igual:   {same_table_decision / pages:.1%}")
+        print(f"✅ Colunas de texto iguais:   {same_text_columns / pages:.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara a detecção de colunas em NumPy com o KMeans")
+    parser.add_argument("paths", nargs="+", help="Arquivos PDF usados no benchmark")
+    args = parser.parse_args()
+    benchmark(args.paths)
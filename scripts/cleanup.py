@@ -4,51 +4,37 @@ Script para limpeza de arquivos temporários
 """
 
 import os
-import time
-import glob
-from datetime import datetime, timedelta
-
-def cleanup_old_files():
-    """Remove arquivos antigos dos diretórios de armazenamento"""
-    
-    # Configurações
-    max_age_hours = 24  # Remover arquivos com mais de 24 horas
-    directories = [
-        "storage/uploads",
-        "storage/outputs", 
-        "storage/temp"
-    ]
-    
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
-    
-    total_removed = 0
-    
-    for directory in directories:
-        print(f"🔍 Verificando {directory}...")
-        
-        # Encontrar todos os arquivos
-        pattern = os.path.join(directory, "*")
-        files = glob.glob(pattern)
-        
-        for file_path in files:
-            # Pular diretórios e arquivos .gitkeep
-            if os.path.isdir(file_path) or file_path.endswith('.gitkeep'):
-                continue
-            
-            # Verificar idade do arquivo
-            file_age = current_time - os.path.getctime(file_path)
-            
-            if file_age > max_age_seconds:
-                try:
-                    os.remove(file_path)
-                    print(f"🗑️  Removido: {file_path}")
-                    total_removed += 1
-                except Exception as e:
-                    print(f"❌ Erro ao remover {file_path}: {e}")
-    
-    print(f"✅ Limpeza concluída! {total_removed} arquivos removidos.")
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.core.storage_reaper import StorageReaper
+
+def cleanup_old_files(max_age_hours: float = 24, quota_bytes: int = None):
+    """Remove arquivos vencidos ou antigos usando o índice do registro de arquivos"""
+
+    print(f"🔍 Removendo arquivos vencidos ou com mais de {max_age_hours} horas...")
+    removed = StorageReaper.reap_expired(max_age_hours=max_age_hours)
+    print(f"🗑️  {removed} arquivos vencidos removidos")
+
+    evicted = StorageReaper.enforce_quota(quota_bytes)
+    if evicted:
+        print(f"📦 {evicted} arquivos despejados para respeitar a cota de disco")
+
+    sessions = StorageReaper.sweep_stale_sessions(max_age_hours)
+    if sessions:
+        print(f"🧾 {sessions} sessões de upload e estados de análise abandonados removidos")
+
+    print(f"✅ Limpeza concluída! {removed + evicted + sessions} arquivos removidos.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Limpeza de arquivos temporários do PDFGo")
+    parser.add_argument("--max-age-hours", type=float, default=24,
+                        help="Remove também arquivos criados há mais tempo que isso")
+    parser.add_argument("--quota-bytes", type=int, default=None,
+                        help="Cota de disco (padrão: STORAGE_QUOTA_BYTES)")
+    args = parser.parse_args()
+
     print("🧹 Iniciando limpeza de arquivos temporários...")
-    cleanup_old_files()
\ No newline at end of file
+    cleanup_old_files(args.max_age_hours, args.quota_bytes)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Script para migrar arquivos do layout plano para o layout particionado (ab/cd/<id>.ext)
+e registrar as saídas geradas antes do registro de arquivos
+"""
+
+import os
+import re
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.utils.storage_layout import StorageLayout
+from app.utils.file_registry import FileRegistry
+from app.utils.file_processor import FileProcessor
+
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+# Sufixo do nome (<id>_<sufixo>.pdf) -> operação que gerou a saída
+OUTPUT_SUFFIXES = {
+    "rotated": "rotate",
+    "watermarked": "watermark",
+    "updated": "metadata",
+    "compressed": "compress",
+    "pages_removed": "delete_pages",
+    "reordered": "reorder_pages",
+    "pages_inserted": "insert_pages",
+    "extracted_pages": "extract_pages",
+    "duplicated_pages": "duplicate_pages",
+    "rotated_specific": "rotate_specific",
+    "text": "split_content_type",
+    "image": "split_content_type",
+    "table": "split_content_type",
+    "form": "split_content_type",
+    "mixed": "split_content_type",
+}
+
+def migrate_directory(base_dir: str, dry_run: bool = False) -> int:
+    """Move os arquivos do nível raiz de base_dir para seus subdiretórios particionados"""
+    moved = 0
+    
+    for entry in os.scandir(base_dir):
+        # Pular subdiretórios (já particionados), temporários ocultos e .gitkeep
+        if not entry.is_file() or entry.name.startswith('.'):
+            continue
+        
+        name, extension = os.path.splitext(entry.name)
+        target_path = StorageLayout.sharded_path(base_dir, name, extension.lstrip('.'), create=not dry_run)
+        
+        if dry_run:
+            print(f"📦 {entry.path} -> {target_path}")
+            moved += 1
+            continue
+        
+        try:
+            os.replace(entry.path, target_path)
+            
+            # Atualizar o caminho no registro, se o arquivo estiver registrado
+            FileRegistry.update_path(name, target_path)
+            moved += 1
+        except Exception as e:
+            print(f"❌ Erro ao mover {entry.path}: {e}")
+    
+    return moved
+
+def parse_output_name(name: str):
+    """Operação e IDs de origem registrados a partir do nome de uma saída antiga
+
+    O primeiro UUID do nome é o da própria saída; outros UUIDs que sejam
+    arquivos registrados são as origens (exclusão em cascata).
+    """
+    ids = UUID_PATTERN.findall(name)
+    suffix = "_".join(part for part in UUID_PATTERN.sub("", name).split("_") if part)
+    
+    if not suffix:
+        operation = "split_page_range"
+    elif re.fullmatch(r"section_\d+", suffix):
+        operation = "split_sections"
+    elif re.fullmatch(r"pages_\d+-\d+", suffix):
+        operation = "split_smart_ranges"
+    else:
+        # Nomes livres (junção, marcadores) não identificam a operação
+        operation = OUTPUT_SUFFIXES.get(suffix, "legacy")
+    
+    parent_ids = [file_id for file_id in ids[1:] if FileRegistry.get(file_id)]
+    return operation, parent_ids
+
+def backfill_outputs(output_dir: str, dry_run: bool = False) -> int:
+    """Registra as saídas do diretório que ainda não estão no registro
+
+    Sem o registro o download das saídas anteriores a ele responderia 404.
+    """
+    registered = 0
+    
+    for root, _, files in os.walk(output_dir):
+        for filename in files:
+            name, extension = os.path.splitext(filename)
+            if filename.startswith('.') or extension != ".pdf" or FileRegistry.get(name):
+                continue
+            
+            path = os.path.join(root, filename)
+            operation, parent_ids = parse_output_name(name)
+            if dry_run:
+                print(f"📝 {path} ({operation})")
+                registered += 1
+                continue
+            
+            try:
+                FileProcessor.register_output(
+                    path, parent_ids[0] if parent_ids else None, operation, parent_ids=parent_ids or None
+                )
+                registered += 1
+            except Exception as e:
+                print(f"❌ Erro ao registrar {path}: {e}")
+    
+    return registered
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra o armazenamento para o layout particionado")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o que seria movido")
+    args = parser.parse_args()
+    
+    total_moved = 0
+    for directory in [settings.UPLOAD_DIR, settings.OUTPUT_DIR, settings.TEMP_DIR]:
+        print(f"🔍 Migrando {directory}...")
+        total_moved += migrate_directory(directory, args.dry_run)
+    
+    print(f"🔍 Registrando saídas antigas em {settings.OUTPUT_DIR}...")
+    total_registered = backfill_outputs(settings.OUTPUT_DIR, args.dry_run)
+    
+    print(f"✅ Migração concluída! {total_moved} arquivos {'a mover' if args.dry_run else 'movidos'}, "
+          f"{total_registered} saídas {'a registrar' if args.dry_run else 'registradas'}.")
+
+if __name__ == "__main__":
+    main()
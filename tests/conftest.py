@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+# Os caminhos de settings são relativos ao diretório atual e os diretórios são
+# criados na importação: entrar em um diretório descartável antes de importar o app
+os.chdir(tempfile.mkdtemp(prefix="pdfgo-tests-"))
+os.environ.setdefault("REAPER_ENABLED", "False")
+
+import fitz
+import pytest
+from app.config import settings
+from app.utils.analysis_cache import AnalysisCache
+from app.utils.content_store import ContentStore
+from app.utils.document_cache import DocumentCache
+from app.utils.file_registry import FileRegistry
+from app.utils.page_hash_index import PageHashIndex
+from app.utils.search_index import SearchIndex
+from app.utils.shared_cache import SharedCache
+from app.utils.storage_backend import StorageBackend
+
+SQLITE_STORES = [AnalysisCache, ContentStore, FileRegistry, PageHashIndex, SearchIndex]
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    """Armazenamento vazio por teste: diretórios, bancos SQLite e caches em memória"""
+    monkeypatch.chdir(tmp_path)
+    settings.__init__()
+    for store in SQLITE_STORES:
+        monkeypatch.setattr(store, "_initialized", False)
+    monkeypatch.setattr(StorageBackend, "_instance", None)
+    SharedCache.set_client(None)
+    SharedCache.clear_local()
+    DocumentCache.clear()
+    yield tmp_path
+    DocumentCache.clear()
+
+def write_pdf(path, pages, text=None, size=(595, 842)):
+    """Gera um PDF de texto simples; text(i) devolve o conteúdo da página i"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=size[0], height=size[1])
+        content = text(page_num) if text else f"Página {page_num + 1} contrato cláusula {page_num * 7}"
+        page.insert_text((72, 72), content, fontsize=11)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Fábrica de PDFs de teste no diretório temporário"""
+    counter = {"n": 0}
+
+    def factory(pages=3, text=None, name=None, size=(595, 842)):
+        counter["n"] += 1
+        return write_pdf(tmp_path / (name or f"doc{counter['n']}.pdf"), pages, text, size)
+
+    return factory
+
+@pytest.fixture
+def client():
+    """Cliente HTTP da API (tarefas de startup/shutdown incluídas)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+def upload(client, path, tenant_id=None, wait_for_analysis=False):
+    """Envia o PDF pelo endpoint de upload e devolve o JSON da resposta"""
+    headers = {"X-Tenant-ID": tenant_id} if tenant_id else {}
+    with open(path, "rb") as f:
+        response = client.post(
+            "/api/v1/upload/pdf",
+            files={"file": (os.path.basename(path), f, "application/pdf")},
+            params={"wait_for_analysis": wait_for_analysis},
+            headers=headers
+        )
+    assert response.status_code == 200, response.text
+    return response.json()
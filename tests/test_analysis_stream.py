@@ -0,0 +1,55 @@
+import json
+import threading
+import fitz
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.utils.document_cache import DocumentCache
+from tests.conftest import upload
+
+def _mixed_sizes(make_pdf):
+    # Páginas A4 seguidas de duas páginas em paisagem
+    first = make_pdf(pages=3)
+    with fitz.open(first) as doc:
+        for _ in range(2):
+            doc.new_page(width=842, height=595).insert_text((72, 72), "Anexo em paisagem")
+        doc.saveIncr()
+    return first
+
+def test_stream_summary_has_totals_but_no_page_lists(client, make_pdf):
+    file_id = upload(client, _mixed_sizes(make_pdf))["file_id"]
+
+    response = client.get(f"/api/v1/analyze/{file_id}/stream", params={"full": True})
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["start"] + ["page"] * 5 + ["summary"]
+    quality = records[-1]["analysis"]["quality_assessment"]
+    assert "content_analysis" not in quality and "page_sizes" not in quality
+    assert quality["page_size_counts"] == [
+        {"width": 595, "height": 842, "pages": 3}, {"width": 842, "height": 595, "pages": 2}
+    ]
+
+def test_stream_matches_full_analysis_totals(make_pdf):
+    pdf_path = _mixed_sizes(make_pdf)
+
+    streamed = list(PDFAnalyzer.iter_analysis(pdf_path, full=True))[-1]["analysis"]["quality_assessment"]
+    complete = PDFAnalyzer.analyze_document(pdf_path, full=True)["quality_assessment"]
+
+    assert len(complete["content_analysis"]) == len(complete["page_sizes"]) == 5
+    for key in ("text_density", "image_count", "quality_score", "page_size_counts"):
+        assert streamed[key] == complete[key]
+    assert complete["quality_score"] == 80  # Duas páginas fora do tamanho da primeira (-10 cada)
+
+def test_stream_does_not_hold_cached_document(make_pdf):
+    pdf_path = make_pdf(pages=3)
+    records = PDFAnalyzer.iter_analysis(pdf_path, full=True)
+    next(records)
+    next(records)  # Cliente lento: a resposta está parada no meio
+    reader_done = threading.Event()
+
+    reader = threading.Thread(
+        target=lambda: (DocumentCache.page_count(pdf_path), reader_done.set()), daemon=True
+    )
+    reader.start()
+    reader.join(timeout=5)
+
+    assert reader_done.is_set()
+    assert list(records)[-1]["type"] == "summary"
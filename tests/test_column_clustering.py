@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from app.services.core.column_clustering import ColumnClustering
+from app.services.core.pdf_analyzer import PDFAnalyzer
+
+def _columns(*starts, lines=5):
+    return [x + (i % 2) * 0.5 for x in starts for i in range(lines)]
+
+def test_centers_of_separated_columns():
+    centers = ColumnClustering.cluster_positions(_columns(72, 300, 450), max_clusters=10)
+
+    assert centers == pytest.approx([72.2, 300.2, 450.2])
+
+def test_small_jitter_does_not_split_a_column():
+    assert ColumnClustering.count_clusters([72.0, 72.4, 72.9, 73.5], max_clusters=10) == 1
+
+def test_cut_at_largest_gaps_when_limited():
+    centers = ColumnClustering.cluster_positions([0, 10, 100, 110, 500], max_clusters=2)
+
+    assert centers == pytest.approx([55, 500])
+    assert ColumnClustering.count_clusters([0, 10, 100, 110, 500], max_clusters=2) == 2
+
+def test_empty_input():
+    assert ColumnClustering.cluster_positions([], max_clusters=3) == []
+    assert ColumnClustering.count_clusters([], max_clusters=3) == 0
+
+def test_text_columns_from_spans():
+    spans = [{"bbox": (x, 0, x + 100, 10)} for x in _columns(72, 320)]
+
+    assert PDFAnalyzer._detect_columns(spans) == 2
+
+def test_matches_kmeans_on_separated_positions():
+    KMeans = pytest.importorskip("sklearn.cluster").KMeans
+    rng = np.random.default_rng(7)
+    positions = np.concatenate([rng.normal(x, 0.2, 20) for x in (60, 200, 350, 480)])
+
+    kmeans = KMeans(n_clusters=4, n_init=10, random_state=0).fit(positions.reshape(-1, 1))
+
+    assert ColumnClustering.cluster_positions(positions, max_clusters=4) == pytest.approx(
+        sorted(kmeans.cluster_centers_.ravel()), abs=1e-6
+    )
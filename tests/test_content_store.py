@@ -0,0 +1,72 @@
+import os
+import hashlib
+import threading
+from app.utils.content_store import ContentStore
+from app.utils.storage_layout import StorageLayout
+
+def _stage(content: bytes, name: str) -> str:
+    """Grava o conteúdo como upload temporário, como faz o streaming do upload"""
+    temp_path = f"{name}.part"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    return temp_path
+
+def _store(content: bytes, file_id: str):
+    sha256 = hashlib.sha256(content).hexdigest()
+    file_path = StorageLayout.upload_path(file_id, create=True)
+    return ContentStore.store(_stage(content, file_id), sha256, len(content), file_id, file_path, "a.pdf")
+
+def test_same_content_becomes_alias_of_one_blob():
+    first = _store(b"%PDF-1.4 conteudo", "first")
+    second = _store(b"%PDF-1.4 conteudo", "second")
+
+    assert not first["duplicate"]
+    assert second["duplicate"]
+    assert first["blob_path"] == second["blob_path"]
+    assert os.stat(second["file_path"]).st_ino == os.stat(first["blob_path"]).st_ino
+    assert not os.path.exists("second.part")
+    assert ContentStore.get_hash("first") == ContentStore.get_hash("second")
+
+def test_blob_removed_with_last_alias():
+    stored = _store(b"%PDF-1.4 x", "a")
+    _store(b"%PDF-1.4 x", "b")
+
+    ContentStore.release("a")
+    assert os.path.exists(stored["blob_path"])
+    assert ContentStore.get_hash("a") is None
+
+    ContentStore.release("b")
+    assert not os.path.exists(stored["blob_path"])
+
+def test_ensure_local_restores_alias_from_blob():
+    stored = _store(b"%PDF-1.4 y", "restore")
+    os.remove(stored["file_path"])
+
+    assert ContentStore.ensure_local("restore", stored["file_path"])
+    with open(stored["file_path"], "rb") as f:
+        assert f.read() == b"%PDF-1.4 y"
+
+def test_concurrent_store_and_release_never_lose_the_blob():
+    content = b"%PDF-1.4 concorrente"
+    errors = []
+
+    def worker(prefix: str):
+        try:
+            for i in range(40):
+                file_id = f"{prefix}{i}"
+                stored = _store(content, file_id)
+                with open(stored["file_path"], "rb") as f:
+                    assert f.read() == content
+                assert os.path.exists(stored["blob_path"])
+                ContentStore.release(file_id)
+        except Exception as e:  # pragma: no cover - falha relatada abaixo
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(prefix,)) for prefix in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not os.path.exists(ContentStore.blob_path(hashlib.sha256(content).hexdigest()))
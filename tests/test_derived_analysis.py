@@ -0,0 +1,42 @@
+import pytest
+from app.config import settings
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.utils.file_registry import FileRegistry
+from tests.conftest import upload
+
+def _source_text(page_num):
+    return f"Capítulo {page_num + 1} " + "conteúdo " * (page_num + 1)
+
+def _from_scratch(path, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(PDFAnalyzer, "derive_analysis", staticmethod(lambda *args: None))
+        return PDFAnalyzer.analyze_document(path)
+
+@pytest.mark.parametrize("endpoint, body", [
+    ("delete-pages", {"pages_to_delete": [2, 5]}),
+    ("reorder-pages", {"new_order": [6, 5, 4, 3, 2, 1]}),
+    ("extract-pages", {"pages_to_extract": [1, 3]}),
+    ("duplicate-pages", {"pages_to_duplicate": [2]}),
+])
+def test_edit_output_analysis_derived_from_source(client, make_pdf, monkeypatch, endpoint, body):
+    source = upload(client, make_pdf(pages=6, text=_source_text), wait_for_analysis=True)
+    edited = client.post(f"/api/v1/editor/{endpoint}", json={"file_id": source["file_id"], **body})
+    assert edited.status_code == 200, edited.text
+    output_id = edited.json()["download_url"].rsplit("/", 1)[-1]
+    output = FileRegistry.get(output_id)
+
+    derived = PDFAnalyzer.derive_analysis(output["path"])
+
+    assert derived["derived_from"] == FileRegistry.get(source["file_id"])["content_hash"]
+    expected = _from_scratch(output["path"], monkeypatch)
+    derived.pop("derived_from")
+    assert derived == expected
+
+def test_sampled_source_analysis_is_not_remapped(client, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGES_FOR_ANALYSIS", 3)
+    source = upload(client, make_pdf(pages=6, text=_source_text), wait_for_analysis=True)
+    assert source["analysis"]["sampled"]
+    edited = client.post("/api/v1/editor/extract-pages", json={"file_id": source["file_id"], "pages_to_extract": [2]})
+    output_id = edited.json()["download_url"].rsplit("/", 1)[-1]
+
+    assert PDFAnalyzer.derive_analysis(FileRegistry.get(output_id)["path"]) is None
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import pytest
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.utils.document_cache import DocumentCache
+from tests.conftest import upload
+
+def test_reopened_only_when_file_changes(make_pdf):
+    pdf_path = make_pdf(pages=2)
+    hits = DocumentCache.get_stats()["hits"]  # Contadores acumulam entre os testes
+    with DocumentCache.open(pdf_path) as first:
+        pass
+    with DocumentCache.open(pdf_path) as second:
+        assert second is first
+    assert DocumentCache.get_stats()["hits"] == hits + 1
+
+    make_pdf(pages=5, name="doc1.pdf")
+    assert DocumentCache.page_count(pdf_path) == 5
+
+@pytest.fixture
+def off_loop_only(monkeypatch):
+    """Falha se o documento em cache for emprestado na thread do loop de eventos"""
+    acquire = DocumentCache._acquire
+
+    def checked_acquire(file_path):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return acquire(file_path)
+        raise AssertionError("DocumentCache.open no loop de eventos")
+
+    monkeypatch.setattr(DocumentCache, "_acquire", staticmethod(checked_acquire))
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/api/v1/analyze/{id}/content"),
+    ("get", "/api/v1/analyze/{id}/tables"),
+    ("get", "/api/v1/preview/{id}/images"),
+    ("get", "/api/v1/preview/{id}/text"),
+    ("get", "/api/v1/preview/{id}/thumbnail"),
+    ("get", "/api/v1/preview/{id}/minimal-editor"),
+    ("get", "/api/v1/preview/{id}/page-previews?pages=1,2"),
+    ("get", "/api/v1/editor/{id}/thumbnails"),
+])
+def test_routes_borrow_cached_documents_off_the_loop(client, make_pdf, off_loop_only, method, path):
+    file_id = upload(client, make_pdf(pages=2))["file_id"]
+
+    response = client.request(method, path.format(id=file_id))
+
+    assert response.status_code == 200, response.text
+
+def test_export_and_split_off_the_loop(client, make_pdf, off_loop_only):
+    file_id = upload(client, make_pdf(pages=4))["file_id"]
+
+    exported = client.post(f"/api/v1/preview/{file_id}/export-images", json=[1, 2])
+    split = client.post("/api/v1/split/every-n-pages", json={
+        "file_id": file_id, "method": "every_n_pages", "parameters": {"n": 2}
+    })
+
+    assert exported.status_code == 200, exported.text
+    assert split.status_code == 200, split.text
+
+def test_enhanced_analysis_does_not_hold_the_lock_across_awaits(make_pdf, off_loop_only):
+    pdf_path = make_pdf(pages=3)
+    other_thread_done = threading.Event()
+
+    async def analyze_while_another_thread_reads():
+        task = asyncio.create_task(PDFAnalyzer.enhanced_content_analysis(pdf_path))
+        # Outra thread lendo o mesmo documento não fica presa ao loop
+        await asyncio.to_thread(lambda: (DocumentCache.page_count(pdf_path), other_thread_done.set()))
+        return await task
+
+    analysis = asyncio.run(analyze_while_another_thread_reads())
+
+    assert other_thread_done.is_set()
+    assert len(analysis["content_types"]) == 3
@@ -0,0 +1,91 @@
+import random
+import threading
+import fitz
+from app.services.core.duplicate_pages import DuplicatePages
+from app.services.core.page_fingerprint import PageFingerprint
+from app.utils.document_cache import DocumentCache
+from tests.conftest import upload
+
+PAGES = {
+    "capa": "Relatório anual de atividades da diretoria financeira exercício de dois mil e vinte",
+    "vendas": "Vendas do trimestre cresceram acima da meta em todas as regiões atendidas pela empresa",
+    "custos": "Custos operacionais foram reduzidos com a renegociação dos contratos de logística",
+}
+
+def _pages(*names):
+    return lambda i: PAGES[names[i]]
+
+def test_probe_bands_find_every_hash_within_max_distance():
+    rng = random.Random(7)
+    for _ in range(200):
+        value = rng.getrandbits(64)
+        flipped = value
+        for bit in rng.sample(range(64), 6):
+            flipped ^= 1 << bit
+        probes = PageFingerprint.probe_bands(value, 6)
+        assert any(band in values for band, values in zip(PageFingerprint.bands(flipped), probes))
+
+def test_simhash_follows_text_similarity():
+    base = PageFingerprint.simhash(PAGES["vendas"])
+
+    assert PageFingerprint.simhash("") is None
+    assert PageFingerprint.simhash(PAGES["vendas"].upper()) == base
+    assert PageFingerprint.hamming(base, PageFingerprint.simhash(PAGES["custos"])) > 6
+
+def test_compare_uses_image_only_without_text():
+    page = {"dhash": 0b1011, "simhash": None}
+
+    assert DuplicatePages.compare(page, {"dhash": 0b1010, "simhash": 123}) == {
+        "image_distance": 1, "text_distance": None, "exact": False
+    }
+    assert DuplicatePages.compare(page, {"dhash": 0b1011 ^ 0xFF, "simhash": None}) is None
+
+def test_duplicates_within_document(client, make_pdf):
+    pdf_path = make_pdf(pages=4, text=_pages("capa", "vendas", "capa", "custos"))
+    file_id = upload(client, pdf_path)["file_id"]
+
+    response = client.get(f"/api/v1/analyze/{file_id}/duplicates")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["groups"] == [{"pages": [1, 3], "exact": True}]
+    assert response.json()["duplicate_pages"] == 1
+
+def test_duplicates_across_uploads(client, make_pdf):
+    first = upload(client, make_pdf(pages=2, text=_pages("capa", "vendas")))["file_id"]
+    second = upload(client, make_pdf(pages=2, text=_pages("custos", "capa")))["file_id"]
+
+    response = client.get(f"/api/v1/analyze/{second}/duplicates/uploads")
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["documents_with_matches"] == 1
+    assert [page["page"] for page in result["pages"]] == [2]
+    assert result["pages"][0]["matches"][0]["file_id"] == first
+    assert result["pages"][0]["matches"][0]["page"] == 1
+
+def test_merge_drops_duplicate_pages(client, make_pdf):
+    file_ids = [
+        upload(client, make_pdf(pages=2, text=_pages("capa", "vendas")))["file_id"],
+        upload(client, make_pdf(pages=2, text=_pages("capa", "custos")))["file_id"],
+    ]
+
+    response = client.post("/api/v1/merge/simple", json={"file_ids": file_ids, "drop_duplicates": True})
+
+    assert response.status_code == 200, response.text
+    merged = client.get(response.json()["download_url"])
+    with fitz.open(stream=merged.content, filetype="pdf") as doc:
+        assert [page.get_text().strip() for page in doc] == [PAGES["capa"], PAGES["vendas"], PAGES["custos"]]
+
+def test_fingerprinting_does_not_wait_for_cached_document(make_pdf):
+    pdf_path = make_pdf(pages=3, text=_pages("capa", "vendas", "custos"))
+    done = threading.Event()
+
+    with DocumentCache.open(pdf_path):
+        # Uma requisição segura o documento em cache enquanto a indexação roda
+        worker = threading.Thread(
+            target=lambda: (DuplicatePages.fingerprint_document(pdf_path), done.set()), daemon=True
+        )
+        worker.start()
+        worker.join(timeout=10)
+
+    assert done.is_set()
@@ -0,0 +1,79 @@
+import os
+import uuid
+from app.config import settings
+from app.utils.file_registry import FileRegistry
+from tests.conftest import upload, write_pdf
+
+def _register(tmp_path, file_id, kind="output", **kwargs):
+    path = tmp_path / f"{file_id}.pdf"
+    path.write_bytes(b"%PDF-1.4 " + file_id.encode())
+    return FileRegistry.register(file_id, kind, str(path), **kwargs)
+
+def test_indexed_lookup_by_id_and_kind(tmp_path):
+    _register(tmp_path, "up", kind="upload")
+
+    assert FileRegistry.get("up")["kind"] == "upload"
+    assert FileRegistry.get("up", "output") is None
+    assert FileRegistry.get("missing") is None
+
+def test_cascade_delete_follows_every_parent(tmp_path):
+    for file_id in ("a", "b", "c"):
+        _register(tmp_path, file_id, kind="upload")
+    _register(tmp_path, "merged", parent_id="a", operation="merge", parent_ids=["a", "b", "c"])
+    _register(tmp_path, "rotated", parent_id="merged", operation="rotate")
+
+    # Excluir uma origem que não é a primeira também remove a junção e seus derivados
+    deleted = {record["file_id"] for record in FileRegistry.delete("b")}
+
+    assert deleted == {"b", "merged", "rotated"}
+    assert FileRegistry.get("merged") is None
+    assert not os.path.exists(tmp_path / "rotated.pdf")
+    assert FileRegistry.get("a") is not None
+
+def test_single_parent_default(tmp_path):
+    _register(tmp_path, "src", kind="upload")
+    _register(tmp_path, "out", parent_id="src", operation="split")
+
+    assert [record["file_id"] for record in FileRegistry.descendants("src")] == ["out"]
+
+def test_merge_output_removed_with_any_input(client, make_pdf):
+    first = upload(client, make_pdf(pages=2))["file_id"]
+    second = upload(client, make_pdf(pages=3))["file_id"]
+
+    merged = client.post("/api/v1/merge/simple", json={"file_ids": [first, second]})
+    assert merged.status_code == 200, merged.text
+    download_url = merged.json()["download_url"]
+    assert client.get(download_url).status_code == 200
+
+    client.delete(f"/api/v1/upload/{second}")
+
+    assert client.get(download_url).status_code == 404
+    assert client.get(f"/api/v1/upload/download/{first}").status_code == 200
+
+def test_migration_registers_legacy_outputs(client, make_pdf):
+    from scripts.migrate_storage_layout import migrate_directory, backfill_outputs
+    source = upload(client, make_pdf(pages=2))["file_id"]
+    legacy = {
+        f"{uuid.uuid4()}_compressed": "compress",
+        f"{uuid.uuid4()}_section_2": "split_sections",
+        f"{uuid.uuid4()}_relatorio_final": "legacy",
+        f"{uuid.uuid4()}_{source}_rotated": "rotate",
+    }
+    for name in legacy:
+        write_pdf(os.path.join(settings.OUTPUT_DIR, f"{name}.pdf"), pages=1)
+
+    migrate_directory(settings.OUTPUT_DIR)
+    assert backfill_outputs(settings.OUTPUT_DIR) == 4
+    assert backfill_outputs(settings.OUTPUT_DIR) == 0
+
+    for name, operation in legacy.items():
+        record = FileRegistry.get(name, "output")
+        assert record["operation"] == operation
+        assert record["content_hash"] == FileRegistry.hash_file(record["path"])
+        assert client.get(f"/api/v1/upload/download/{name}").status_code == 200
+    rotated = next(name for name in legacy if source in name)
+    assert FileRegistry.get(rotated)["parent_id"] == source
+
+    # Saídas registradas entram na exclusão em cascata da origem
+    client.delete(f"/api/v1/upload/{source}")
+    assert client.get(f"/api/v1/upload/download/{rotated}").status_code == 404
@@ -0,0 +1,60 @@
+import hashlib
+from app.utils.file_response import FileResponder
+from tests.conftest import upload
+
+def _download(client, make_pdf, **headers):
+    pdf_path = make_pdf(pages=4)
+    with open(pdf_path, "rb") as f:
+        content = f.read()
+    file_id = upload(client, pdf_path)["file_id"]
+    return content, client.get(f"/api/v1/upload/download/{file_id}", headers=headers)
+
+def _etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+def test_parse_range():
+    assert FileResponder.parse_range("bytes=0-9", 100) == [(0, 9)]
+    assert FileResponder.parse_range("bytes=90-", 100) == [(90, 99)]
+    assert FileResponder.parse_range("bytes=-10", 100) == [(90, 99)]
+    assert FileResponder.parse_range("bytes=50-500", 100) == [(50, 99)]
+    assert FileResponder.parse_range("bytes=200-300", 100) == []
+    assert FileResponder.parse_range("bytes=9-0", 100) is None
+    assert FileResponder.parse_range("items=0-9", 100) is None
+
+def test_strong_etag_is_content_hash(client, make_pdf):
+    content, response = _download(client, make_pdf)
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == _etag(content)
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+def test_conditional_get_returns_304(client, make_pdf):
+    content, first = _download(client, make_pdf)
+    download_url = str(first.url)
+
+    response = client.get(download_url, headers={"If-None-Match": f'"outro", W/{_etag(content)}'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == _etag(content)
+    assert response.content == b""
+    assert client.get(download_url, headers={"If-None-Match": '"outro"'}).status_code == 200
+
+def test_single_range_returns_206(client, make_pdf):
+    content, response = _download(client, make_pdf, Range="bytes=10-19")
+
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+def test_unsatisfiable_range_returns_416(client, make_pdf):
+    content, response = _download(client, make_pdf, Range="bytes=99999999-")
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+def test_stale_if_range_sends_whole_file(client, make_pdf):
+    content, response = _download(client, make_pdf, Range="bytes=0-9", **{"If-Range": '"antigo"'})
+
+    assert response.status_code == 200
+    assert response.content == content
@@ -0,0 +1,113 @@
+import threading
+import fitz
+from app.services.core.analysis_pool import AnalysisPool
+from app.services.core.ocr_classifier import OCRClassifier
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from app.utils.document_cache import DocumentCache
+
+PARAGRAPH = "Cláusula {n}: o contratante pagará o valor acordado até o quinto dia útil de cada mês."
+
+def _scan_of_text(text: str) -> fitz.Pixmap:
+    """Imagem de uma página de texto, como sai de um scanner"""
+    source = fitz.open()
+    source.new_page().insert_text((72, 72), text, fontsize=11)
+    return source[0].get_pixmap(dpi=72)
+
+def _document(path, builders):
+    doc = fitz.open()
+    for build in builders:
+        build(doc.new_page())
+    doc.save(str(path))
+    return str(path)
+
+def _text_page(page):
+    page.insert_text((72, 72), PARAGRAPH.format(n=1), fontsize=11)
+
+def _scanned_page(page):
+    page.insert_image(page.rect, pixmap=_scan_of_text(PARAGRAPH.format(n=2)))
+
+def _ocr_layer_page(page):
+    _scanned_page(page)
+    page.insert_text((72, 72), PARAGRAPH.format(n=2), fontsize=11, render_mode=3)
+
+def _small_image_page(page):
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+    logo.clear_with(60)
+    page.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=logo)
+
+def test_page_classes(tmp_path):
+    path = _document(tmp_path / "classes.pdf", [
+        _text_page, lambda page: None, _scanned_page, _ocr_layer_page, _small_image_page
+    ])
+
+    result = OCRClassifier.classify_document(path)
+
+    assert [page["class"] for page in result["pages"]] == ["text", "blank", "scanned", "ocr_layer", "image"]
+    assert result["pages_needing_ocr"] == [3]
+    assert result["needs_ocr"]
+    assert result["pages"][2]["image_coverage"] == 1.0
+    assert result["pages"][3]["invisible_glyphs"] >= 50
+    assert not result["pages"][4]["needs_ocr"]  # Imagem pequena (ex: logotipo)
+    assert result["page_classes"]["text"] == 1
+
+def test_text_document_needs_no_ocr(make_pdf):
+    path = make_pdf(pages=4, text=lambda i: PARAGRAPH.format(n=i))
+
+    result = OCRClassifier.classify_document(path)
+
+    assert not result["needs_ocr"]
+    assert result["page_classes"] == {"text": 4}
+    # Sem renderização: a camada de texto já decide
+    assert all("pixel_stddev" not in page for page in result["pages"])
+
+def test_plain_text_pages_are_text_pages(make_pdf):
+    """Páginas de um só parágrafo não contam como mistas na análise do documento"""
+    path = make_pdf(pages=3, text=lambda i: PARAGRAPH.format(n=i))
+
+    content = PDFAnalyzer.analyze_document(path)["content_analysis"]
+
+    assert content["text_pages"] == 3
+    assert content["mixed_pages"] == 0
+    assert [page["ocr_class"] for page in content["page_details"]] == ["text"] * 3
+
+def test_scanned_pages_are_image_pages(tmp_path):
+    path = _document(tmp_path / "digitalizado.pdf", [_scanned_page, _scanned_page])
+
+    content = PDFAnalyzer.analyze_document(path)["content_analysis"]
+
+    assert content["image_pages"] == 2
+
+def test_analysis_probes_only_pages_without_text(tmp_path, monkeypatch):
+    path = _document(tmp_path / "misto.pdf", [_text_page, _text_page, _small_image_page, _scanned_page])
+    probed = []
+    trace, pixmap = fitz.Page.get_texttrace, fitz.Page.get_pixmap
+    monkeypatch.setattr(fitz.Page, "get_texttrace", lambda page: (probed.append(page.number), trace(page))[1])
+    monkeypatch.setattr(fitz.Page, "get_pixmap",
+                        lambda page, *args, **kwargs: (probed.append(page.number), pixmap(page, *args, **kwargs))[1])
+
+    content = PDFAnalyzer.analyze_document(path)["content_analysis"]
+
+    # Páginas de texto são decididas por PageFeatures; só as sem texto visível são sondadas
+    assert set(probed) == {2, 3}
+    assert [page["ocr_class"] for page in content["page_details"]] == ["text", "text", "image", "scanned"]
+
+def test_sharded_classification_leaves_cached_document_free(make_pdf, monkeypatch):
+    path = make_pdf(pages=4, text=lambda i: PARAGRAPH.format(n=i))
+    reader_done = threading.Event()
+
+    def map_while_another_thread_reads(task, file_path, page_numbers):
+        reader = threading.Thread(
+            target=lambda: (DocumentCache.page_count(file_path), reader_done.set()), daemon=True
+        )
+        reader.start()
+        reader.join(timeout=5)
+        return task(file_path, page_numbers)
+
+    monkeypatch.setattr(AnalysisPool, "should_shard", staticmethod(lambda total_pages: True))
+    monkeypatch.setattr(AnalysisPool, "map_pages", staticmethod(map_while_another_thread_reads))
+    DocumentCache.page_count(path)
+
+    result = OCRClassifier.classify_document(path)
+
+    assert reader_done.is_set()
+    assert result["page_classes"] == {"text": 4}
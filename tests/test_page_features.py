@@ -0,0 +1,44 @@
+import fitz
+from app.services.core.page_features import PageFeatures
+
+def _page_with_repeated_logo(tmp_path):
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), False)
+    logo.clear_with(200)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Relatório com logotipo")
+    xref = page.insert_image(fitz.Rect(50, 100, 150, 200), pixmap=logo)
+    page.insert_image(fitz.Rect(300, 100, 400, 200), xref=xref)
+    doc.save(str(tmp_path / "logo.pdf"))
+    return fitz.open(str(tmp_path / "logo.pdf"))
+
+def test_image_count_is_distinct_xrefs(tmp_path):
+    doc = _page_with_repeated_logo(tmp_path)
+    features = PageFeatures(doc[0], 0)
+
+    assert len(features.images) == 2  # Posicionamentos
+    assert features.image_count == len({image[0] for image in doc[0].get_images()}) == 1
+    assert features.image_xrefs == [doc[0].get_images()[0][0]]
+
+def test_images_are_not_decoded(tmp_path, monkeypatch):
+    doc = _page_with_repeated_logo(tmp_path)
+    calls = []
+    get_image_info = fitz.Page.get_image_info
+
+    def recording_get_image_info(page, *args, **kwargs):
+        calls.append(kwargs)
+        return get_image_info(page, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_image_info", recording_get_image_info)
+    features = PageFeatures(doc[0], 0)
+
+    # xrefs=True decodificaria e calcularia o hash de cada imagem
+    assert calls == [{}]
+    assert [image["transform"][0] for image in features.images] == [100.0, 100.0]
+
+def test_text_matches_get_text(make_pdf):
+    doc = fitz.open(make_pdf(pages=1))
+    features = PageFeatures(doc[0], 0)
+
+    assert features.text == doc[0].get_text()
+    assert features.word_count == len(doc[0].get_text().split())
@@ -0,0 +1,79 @@
+import fitz
+from app.config import settings
+from app.services.core.page_sampling import PageSampler
+from app.services.core.pdf_analyzer import PDFAnalyzer
+from tests.conftest import upload
+
+def test_sample_keeps_ends_and_one_page_per_stratum():
+    pages = PageSampler.select(1000, 12, seed=0)
+
+    assert pages[0] == 0 and pages[-1] == 999
+    assert len(pages) == len(set(pages)) == 12
+    assert pages == sorted(pages)
+    # Dez estratos internos de 99 ou 100 páginas, uma página sorteada em cada
+    assert [(page - 1) * 10 // 998 for page in pages[1:-1]] == list(range(10))
+    assert PageSampler.select(1000, 12, seed=0) == pages
+
+def test_small_documents_are_not_sampled():
+    assert PageSampler.select(5, 10) == [0, 1, 2, 3, 4]
+
+def test_estimate_total_and_interval():
+    uniform = PageSampler.estimate_total([1, 1], [1.0] * 8, population=98, upper_bound=100)
+    assert uniform == {"estimate": 100, "ci_low": 100, "ci_high": 100}
+
+    half = PageSampler.estimate_total([0, 1], [0.0, 1.0] * 4, population=98, upper_bound=100)
+    assert half["estimate"] == 50
+    assert 1 <= half["ci_low"] < 50 < half["ci_high"] <= 100
+
+def _mixed_document(path, pages, text_pages):
+    """Páginas de texto corrido (tipo "text") seguidas de páginas com um rótulo curto (tipo "form")"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        lines = 12 if page_num % (pages // text_pages) == 0 else 1
+        for i in range(lines):
+            content = f"Parágrafo de texto corrido com bastante conteúdo {i}" if lines > 1 else "Assinatura:"
+            page.insert_text((72, 72 + i * 40), content, fontsize=10)
+    doc.save(str(path))
+    return str(path)
+
+def test_sampled_analysis_estimates_cover_true_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGES_FOR_ANALYSIS", 12)
+    path = _mixed_document(tmp_path / "grande.pdf", pages=90, text_pages=30)
+
+    sampled = PDFAnalyzer.analyze_document(path)
+    full = PDFAnalyzer.analyze_document(path, full=True)
+
+    assert sampled["sampled"] and not full["sampled"]
+    sampling = sampled["content_analysis"]["sampling"]
+    assert sampling["pages_analyzed"] == 12
+    assert sampled["quality_assessment"]["total_pages"] == 90
+    for key in ("text_pages", "mixed_pages"):
+        estimate = sampling["estimates"][key]
+        assert estimate["ci_low"] <= full["content_analysis"][key] <= estimate["ci_high"]
+    assert full["content_analysis"]["text_pages"] == 30
+
+def test_sampled_and_full_results_are_cached_separately(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGES_FOR_ANALYSIS", 12)
+    sampled = PDFAnalyzer.analyze_document(_mixed_document(tmp_path / "a.pdf", pages=30, text_pages=10))
+    PDFAnalyzer.save_analysis("abc", sampled)
+
+    assert PDFAnalyzer.get_cached_analysis("abc")["sampled"]
+    assert PDFAnalyzer.get_cached_analysis("abc", full=True) is None
+
+def test_content_split_uses_every_page_of_sampled_documents(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGES_FOR_ANALYSIS", 12)
+    file_id = upload(client, _mixed_document(tmp_path / "grande.pdf", pages=40, text_pages=10))["file_id"]
+
+    def split(parameters):
+        response = client.post("/api/v1/split/content-analysis", json={
+            "file_id": file_id, "method": "content_analysis", "parameters": parameters
+        })
+        assert response.status_code == 200, response.text
+        return [client.get(url).content for url in response.json()["output_files"]]
+
+    sections = split({"strategy": "by_sections"})
+    ranged = split({"ranges": ["30-35"]})
+
+    assert sum(fitz.open(stream=part, filetype="pdf").page_count for part in sections) == 40
+    assert fitz.open(stream=ranged[0], filetype="pdf").page_count >= 6
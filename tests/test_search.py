@@ -0,0 +1,90 @@
+import threading
+from app.services.core.text_search import TextSearch
+from app.utils.document_cache import DocumentCache
+from app.utils.search_index import SearchIndex
+from tests.conftest import upload
+
+def _contract(i):
+    if i == 1:
+        return "Cláusula de rescisão: multa de rescisão igual a três mensalidades"
+    return f"Página {i + 1} do contrato de locação comercial"
+
+def test_search_in_document(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=3, text=_contract))["file_id"]
+
+    response = client.get("/api/v1/search", params={"q": "cláusula rescisão", "file_id": file_id})
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["terms"] == ["cláusula", "rescisão"]
+    assert [(hit["file_id"], hit["page"]) for hit in result["hits"]] == [(file_id, 2)]
+    hit = result["hits"][0]
+    assert "<mark>Cláusula</mark>" in hit["snippet"]
+    assert hit["score"] == 1.0
+    assert hit["bbox"] == hit["rects"][0]
+    assert len(hit["rects"]) == 3
+
+def test_scores_are_relative_to_best_hit(client, make_pdf):
+    file_id = upload(client, make_pdf(
+        pages=3, text=lambda i: "contrato " * (3 - i) + "aditivo de prazo e valores do aluguel"
+    ))["file_id"]
+
+    hits = client.get("/api/v1/search", params={"q": "contrato", "file_id": file_id}).json()["hits"]
+
+    # O termo está em todas as páginas: o bm25 absoluto seria quase zero
+    assert [hit["page"] for hit in hits] == [1, 2, 3]
+    assert hits[0]["score"] == 1.0
+    assert 0 < hits[2]["score"] < hits[1]["score"] < 1.0
+
+def test_tenant_search_only_sees_own_documents(client, make_pdf):
+    own = upload(client, make_pdf(pages=2, text=_contract), tenant_id="a")["file_id"]
+    other = upload(client, make_pdf(pages=2, text=_contract), tenant_id="b")["file_id"]
+
+    response = client.get("/api/v1/search", params={"q": "clausula", "include_bbox": False},
+                          headers={"X-Tenant-ID": "a"})
+    denied = client.get("/api/v1/search", params={"q": "clausula", "file_id": other},
+                        headers={"X-Tenant-ID": "a"})
+
+    assert [hit["file_id"] for hit in response.json()["hits"]] == [own]
+    assert "bbox" not in response.json()["hits"][0]
+    assert denied.status_code == 404
+
+def test_query_without_terms_is_rejected(client):
+    response = client.get("/api/v1/search", params={"q": '"*" -'})
+
+    assert response.status_code == 400
+
+def test_search_scope_beyond_sqlite_variable_limit():
+    SearchIndex.put("real", TextSearch.VERSION, ["multa contratual", "sem termos"])
+    scope = [f"{n:064x}" for n in range(40000)] + ["real"]
+
+    assert SearchIndex.indexed(scope, TextSearch.VERSION) == {"real"}
+    assert [(row["sha256"], row["page"]) for row in SearchIndex.search('"multa"', scope, 10)] == [("real", 1)]
+
+def test_indexing_does_not_wait_for_cached_document(make_pdf):
+    pdf_path = make_pdf(pages=3, text=_contract)
+    done = threading.Event()
+
+    with DocumentCache.open(pdf_path):
+        worker = threading.Thread(target=lambda: (TextSearch.extract_pages(pdf_path), done.set()), daemon=True)
+        worker.start()
+        worker.join(timeout=10)
+
+    assert done.is_set()
+
+def test_copies_of_a_document_share_rects_and_respect_limit(client, make_pdf, monkeypatch):
+    pdf_path = make_pdf(pages=3, text=lambda i: f"Página {i + 1} do contrato de locação comercial")
+    file_ids = [upload(client, pdf_path)["file_id"] for _ in range(3)]
+    located = []
+    term_rects = TextSearch._term_rects
+    monkeypatch.setattr(TextSearch, "_term_rects", staticmethod(
+        lambda file_path, page_number, terms: (located.append(page_number), term_rects(file_path, page_number, terms))[1]
+    ))
+
+    hits = client.get("/api/v1/search", params={"q": "locação", "limit": 2}).json()["hits"]
+
+    assert len(hits) == 2
+    assert {hit["file_id"] for hit in hits} <= set(file_ids)
+    assert hits[0]["page"] == hits[1]["page"]
+    assert len(located) == 1
+    assert hits[0]["rects"] == hits[1]["rects"] and hits[0]["rects"]
@@ -0,0 +1,92 @@
+import threading
+import pytest
+from app.config import settings
+from app.utils.shared_cache import SharedCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+class _FlakyRedis:
+    """Cliente que falha até ser religado, simulando o Redis fora do ar"""
+
+    def __init__(self, client):
+        self.client = client
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis fora do ar")
+        return self.client.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.down:
+            raise ConnectionError("redis fora do ar")
+        return self.client.set(key, value, ex=ex)
+
+@pytest.fixture
+def redis_client():
+    client = _FlakyRedis(fakeredis.FakeRedis())
+    SharedCache.set_client(client)
+    yield client
+    SharedCache.set_client(None)
+
+def _delta(before, stat):
+    return SharedCache.get_stats()[stat] - before[stat]
+
+def test_l1_hit_without_touching_redis(redis_client):
+    SharedCache.set("text", "a", b"valor")
+    redis_client.down = True
+    before = SharedCache.get_stats()
+
+    assert SharedCache.get("text", "a") == b"valor"
+    assert _delta(before, "l1_hits") == 1
+    assert _delta(before, "l2_errors") == 0
+
+def test_l2_hit_from_other_worker_is_promoted_to_l1(redis_client):
+    SharedCache.set_json("thumbnail", "k", {"page": 1})
+    SharedCache.clear_local()  # Outro worker: L1 vazio, mesmo Redis
+    before = SharedCache.get_stats()
+
+    assert SharedCache.get_json("thumbnail", "k") == {"page": 1}
+    assert SharedCache.get_json("thumbnail", "k") == {"page": 1}
+    assert _delta(before, "l2_hits") == 1
+    assert _delta(before, "l1_hits") == 1
+
+def test_failure_opens_circuit_and_recovers(redis_client, monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("app.utils.shared_cache.time.time", lambda: clock["now"])
+    redis_client.down = True
+    before = SharedCache.get_stats()
+
+    assert SharedCache.get("text", "x") is None
+    assert SharedCache.get_stats()["l2"] == "unavailable"
+    # Com o circuito aberto o Redis não é consultado, mesmo de volta
+    redis_client.down = False
+    redis_client.client.set(SharedCache._key("text", "x"), b"remoto")
+    assert SharedCache.get("text", "x") is None
+    assert _delta(before, "l2_errors") == 1
+
+    clock["now"] += settings.SHARED_CACHE_RETRY_SECONDS + 1
+    assert SharedCache.get_stats()["l2"] == "active"
+    assert SharedCache.get("text", "x") == b"remoto"
+
+def test_oversized_items_stay_out_of_redis(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "SHARED_CACHE_MAX_ITEM_BYTES", 4)
+    SharedCache.set("text", "grande", b"0123456789")
+
+    assert redis_client.client.get(SharedCache._key("text", "grande")) is None
+    assert SharedCache.get("text", "grande") == b"0123456789"
+
+def test_counters_are_exact_under_concurrency():
+    before = SharedCache.get_stats()
+
+    def worker():
+        for _ in range(2000):
+            SharedCache.get("text", "ausente")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _delta(before, "misses") == 16000
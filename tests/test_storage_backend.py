@@ -0,0 +1,83 @@
+import time
+import pytest
+from app.config import settings
+from app.utils.content_store import ContentStore
+from app.utils.document_cache import DocumentCache
+from app.utils.storage_backend import StorageBackend
+from tests.conftest import SQLITE_STORES, upload
+
+moto = pytest.importorskip("moto")
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Bucket S3 simulado (moto) no lugar do MinIO"""
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(settings, "S3_REGION", "us-east-1")
+    with moto.mock_aws():
+        backend = StorageBackend.get_backend()
+        backend.client.create_bucket(Bucket=settings.S3_BUCKET)
+        yield backend
+
+def _switch_node(tmp_path_factory, monkeypatch):
+    """Simula outro nó: disco, bancos SQLite e caches vazios, mesmo bucket"""
+    monkeypatch.chdir(tmp_path_factory.mktemp("node"))
+    settings.__init__()
+    for store in SQLITE_STORES:
+        store._initialized = False
+    DocumentCache.clear()
+
+def _wait_for_analysis(client, file_id):
+    for _ in range(200):
+        status = client.get(f"/api/v1/analyze/{file_id}/status").json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.05)
+    pytest.fail("análise não terminou")
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+def test_files_jobs_and_outputs_visible_on_other_node(s3, client, make_pdf, tmp_path_factory, monkeypatch):
+    pdf_path = make_pdf(pages=3)
+    file_id = upload(client, pdf_path)["file_id"]
+    assert _wait_for_analysis(client, file_id)["status"] == "completed"
+    rotated = client.post("/api/v1/edit/rotate", json={
+        "file_id": file_id, "operations": [{"pages": [1], "rotation": 90}]
+    })
+    assert rotated.status_code == 200, rotated.text
+    output_url = rotated.json()["download_url"]
+
+    _switch_node(tmp_path_factory, monkeypatch)
+
+    with open(pdf_path, "rb") as f:
+        assert client.get(f"/api/v1/upload/download/{file_id}").content == f.read()
+    assert client.get(output_url).status_code == 200
+    assert client.get(f"/api/v1/analyze/{file_id}/status").json()["status"] == "completed"
+
+    # Exclusão em cascata a partir de um nó que não recebeu o upload
+    assert client.delete(f"/api/v1/upload/{file_id}").status_code == 200
+    _switch_node(tmp_path_factory, monkeypatch)
+    assert client.get(output_url).status_code == 404
+    assert client.get(f"/api/v1/upload/download/{file_id}").status_code == 404
+    assert s3.list_keys("blobs/") == []
+
+def test_remote_blob_kept_while_other_node_references_it(s3, client, make_pdf, tmp_path_factory, monkeypatch):
+    pdf_path = make_pdf(pages=2)
+    first = upload(client, pdf_path)["file_id"]
+    blob_key = StorageBackend.key_for(ContentStore.blob_path(ContentStore.get_hash(first)))
+
+    _switch_node(tmp_path_factory, monkeypatch)
+    second = upload(client, pdf_path)
+    assert second["duplicate"]
+
+    _switch_node(tmp_path_factory, monkeypatch)
+    client.delete(f"/api/v1/upload/{first}")
+    assert s3.stat(blob_key) is not None
+
+    _switch_node(tmp_path_factory, monkeypatch)
+    assert client.get(f"/api/v1/upload/download/{second['file_id']}").status_code == 200
+    client.delete(f"/api/v1/upload/{second['file_id']}")
+    assert s3.stat(blob_key) is None
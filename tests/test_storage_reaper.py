@@ -0,0 +1,81 @@
+import os
+import time
+from app.config import settings
+from app.services.core.storage_reaper import StorageReaper
+from app.utils.content_store import ContentStore
+from app.utils.file_registry import FileRegistry
+from app.utils.upload_sessions import UploadSessionManager
+from tests.conftest import upload
+
+def _age(path, hours):
+    past = time.time() - hours * 3600
+    os.utime(path, (past, past))
+
+def test_expired_upload_removed_with_its_blob(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=2))["file_id"]
+    record = FileRegistry.get(file_id)
+    blob_path = ContentStore.blob_path(record["content_hash"])
+
+    assert StorageReaper.reap_expired(max_age_hours=-1) == 1
+    assert FileRegistry.get(file_id) is None
+    assert not os.path.exists(record["path"])
+    assert not os.path.exists(blob_path)
+    assert client.get(f"/api/v1/upload/download/{file_id}").status_code == 404
+
+def test_dedup_aliases_count_once_toward_quota(client, make_pdf):
+    pdf_path = make_pdf(pages=4)
+    first = upload(client, pdf_path)["file_id"]
+    second = upload(client, pdf_path)["file_id"]
+    size = os.path.getsize(pdf_path)
+
+    assert FileRegistry.total_size() == size
+    # Já dentro da cota: os dois aliases ocupam um único blob
+    assert StorageReaper.enforce_quota(quota_bytes=size) == 0
+    assert FileRegistry.get(first) and FileRegistry.get(second)
+
+def test_quota_evicts_outputs_before_uploads(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=3))["file_id"]
+    rotated = client.post("/api/v1/edit/rotate", json={
+        "file_id": file_id, "operations": [{"pages": [1], "rotation": 90}]
+    })
+    output_id = rotated.json()["download_url"].rsplit("/", 1)[-1]
+
+    assert StorageReaper.enforce_quota(quota_bytes=FileRegistry.get(file_id)["size"]) == 1
+    assert FileRegistry.get(output_id) is None
+    assert FileRegistry.get(file_id) is not None
+
+def test_active_session_survives_sweep(client):
+    content = b"%PDF-1.4 " + b"z" * 100
+    session_id = client.post(
+        "/api/v1/upload/sessions", json={"filename": "a.pdf", "total_size": len(content)}
+    ).json()["session_id"]
+    # Metadados gravados há muito tempo, mas um bloco acabou de chegar
+    _age(UploadSessionManager._meta_path(session_id), 48)
+    client.put(f"/api/v1/upload/sessions/{session_id}", content=content[:10], params={"offset": 0})
+
+    assert StorageReaper.sweep_stale_sessions(max_age_hours=24) == 0
+    assert client.get(f"/api/v1/upload/sessions/{session_id}").json()["offset"] == 10
+
+def test_abandoned_session_removed_as_a_whole(client):
+    session_id = client.post(
+        "/api/v1/upload/sessions", json={"filename": "a.pdf", "total_size": 100}
+    ).json()["session_id"]
+    for path in [UploadSessionManager._meta_path(session_id), UploadSessionManager._data_path(session_id)]:
+        _age(path, 48)
+
+    assert StorageReaper.sweep_stale_sessions(max_age_hours=24) == 1
+    assert os.listdir(settings.UPLOAD_SESSION_DIR) == []
+
+def test_only_one_worker_holds_the_reaper_lease():
+    assert StorageReaper._acquire_lease()
+    holder = StorageReaper._lease_fd
+    try:
+        # Outro worker: mesmo arquivo de trava, outro descritor
+        StorageReaper._lease_fd = None
+        assert not StorageReaper._acquire_lease()
+    finally:
+        StorageReaper._lease_fd = holder
+        StorageReaper._release_lease()
+
+    assert StorageReaper._acquire_lease()
+    StorageReaper._release_lease()
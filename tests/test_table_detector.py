@@ -0,0 +1,52 @@
+import fitz
+from app.services.core.table_detector import TableDetector
+from tests.conftest import upload
+
+def _span(x, y, text, width=40):
+    return {"bbox": (x, y, x + width, y + 10), "text": text}
+
+def _grid(top, columns=(72, 200, 330), rows=4, row_height=14):
+    return [
+        _span(x, top + r * row_height, f"r{r}c{c}")
+        for r in range(rows) for c, x in enumerate(columns)
+    ]
+
+def test_single_table_with_cells():
+    tables = TableDetector.detect(_grid(100), include_cells=True)
+
+    assert len(tables) == 1
+    table = tables[0]
+    assert (table["rows"], table["columns"]) == (4, 3)
+    assert table["confidence"] == 1.0
+    assert table["column_positions"] == [72, 200, 330]
+    assert table["bbox"] == [72, 100, 370, 152]
+    assert table["cells"][2] == ["r2c0", "r2c1", "r2c2"]
+
+def test_two_regions_separated_by_prose():
+    prose = [_span(72, 300 + i * 14, "texto corrido de um parágrafo " * 2, width=400) for i in range(3)]
+    tables = TableDetector.detect(_grid(100) + prose + _grid(400, columns=(72, 250)))
+
+    assert [(table["rows"], table["columns"]) for table in tables] == [(4, 3), (4, 2)]
+
+def test_prose_and_short_lists_are_not_tables():
+    prose = [_span(72, 100 + i * 14, "linha de texto corrido", width=400) for i in range(10)]
+
+    assert TableDetector.detect(prose) == []
+    assert TableDetector.detect(_grid(100, rows=2)) == []
+
+def test_tables_route_reports_page_tables(client, tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Relatório trimestral de vendas por região")
+    for r, row in enumerate([("Região", "Q1", "Q2"), ("Norte", "10", "12"), ("Sul", "8", "9"), ("Leste", "5", "7")]):
+        for x, value in zip((72, 220, 320), row):
+            page.insert_text((x, 120 + r * 16), value, fontsize=10)
+    doc.save(str(tmp_path / "tabela.pdf"))
+
+    file_id = upload(client, str(tmp_path / "tabela.pdf"))["file_id"]
+    result = client.get(f"/api/v1/analyze/{file_id}/tables").json()
+
+    assert result["total_tables"] == 1
+    table = result["pages"][0]["tables"][0]
+    assert (table["rows"], table["columns"]) == (4, 3)
+    assert table["cells"][1] == ["Norte", "10", "12"]
@@ -0,0 +1,94 @@
+import json
+import fitz
+import pytest
+from app.services.core.text_extraction import TextExtractor, WORD_FIELDS
+from tests.conftest import upload
+
+SHA = "ab" * 32
+
+def _text(i):
+    return f"Página {i + 1} do relatório anual"
+
+def test_cursor_round_trip():
+    cursor = TextExtractor.encode_cursor(20, SHA, "words")
+
+    assert "=" not in cursor
+    assert TextExtractor.decode_cursor(cursor, SHA, "words") == 20
+
+@pytest.mark.parametrize("cursor, detail", [
+    ("nao-e-base64!", "Cursor inválido"),
+    (TextExtractor.encode_cursor(3, "cd" * 32, "plain"), "Cursor não corresponde"),
+    (TextExtractor.encode_cursor(3, SHA, "blocks"), "Cursor não corresponde"),
+    (TextExtractor.encode_cursor(-1, SHA, "plain"), "Cursor não corresponde"),
+])
+def test_cursor_rejected(cursor, detail):
+    with pytest.raises(ValueError, match=detail):
+        TextExtractor.decode_cursor(cursor, SHA, "plain")
+
+def test_pages_follow_cursor_to_the_end(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=5, text=_text))["file_id"]
+    url = f"/api/v1/preview/{file_id}/text/pages"
+
+    pages, cursor, calls = [], None, 0
+    while True:
+        response = client.get(url, params={"page_size": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages += response.json()["pages"]
+        cursor = response.json()["next_cursor"]
+        calls += 1
+        if cursor is None:
+            break
+
+    assert calls == 3
+    assert [page["page_number"] for page in pages] == [1, 2, 3, 4, 5]
+    assert [page["text"].strip() for page in pages] == [_text(i) for i in range(5)]
+
+def test_cursor_of_another_mode_or_document_is_400(client, make_pdf):
+    first = upload(client, make_pdf(pages=3, text=_text))["file_id"]
+    second = upload(client, make_pdf(pages=3))["file_id"]
+    cursor = client.get(f"/api/v1/preview/{first}/text/pages", params={"page_size": 1}).json()["next_cursor"]
+
+    assert client.get(f"/api/v1/preview/{first}/text/pages",
+                      params={"cursor": cursor, "mode": "words"}).status_code == 400
+    assert client.get(f"/api/v1/preview/{second}/text/pages", params={"cursor": cursor}).status_code == 400
+    assert client.get(f"/api/v1/preview/{first}/text/pages", params={"cursor": "lixo"}).status_code == 400
+
+def test_words_mode(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=1, text=_text))["file_id"]
+
+    result = client.get(f"/api/v1/preview/{file_id}/text/pages", params={"mode": "words"}).json()
+
+    assert result["word_fields"] == WORD_FIELDS
+    words = result["pages"][0]["words"]
+    assert [word[4] for word in words] == _text(0).split()
+    assert all(len(word) == len(WORD_FIELDS) for word in words)
+
+def test_reading_order_goes_column_by_column(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Relatório consolidado de desempenho operacional e financeiro do semestre", fontsize=12)
+    # A coluna da direita começa mais acima: ordenar só por y intercalaria as colunas
+    for x, y, text in [(72, 200, "esquerda um"), (72, 400, "esquerda dois"),
+                       (330, 150, "direita um"), (330, 350, "direita dois")]:
+        page.insert_text((x, y), text, fontsize=11)
+
+    blocks = TextExtractor.extract_page(page, 0, "reading_order")["blocks"]
+
+    assert [block["text"] for block in blocks] == [
+        "Relatório consolidado de desempenho operacional e financeiro do semestre",
+        "esquerda um", "esquerda dois", "direita um", "direita dois"
+    ]
+    assert [block["column"] for block in blocks[1:]] == [0, 0, 1, 1]
+
+def test_stream_resumes_from_start_page(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=5, text=_text))["file_id"]
+
+    response = client.get(f"/api/v1/preview/{file_id}/text/stream", params={"start_page": 4})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["start", "page", "page", "end"]
+    assert records[0]["total_pages"] == 5
+    assert [record["page_number"] for record in records[1:3]] == [4, 5]
+    assert records[2]["text"].strip() == _text(4)
@@ -0,0 +1,81 @@
+import json
+import hashlib
+import pytest
+from app.utils.upload_sessions import UploadSessionManager
+from app.utils.content_store import ContentStore
+
+def _create(client, content: bytes):
+    response = client.post("/api/v1/upload/sessions", json={"filename": "grande.pdf", "total_size": len(content)})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+def _put(client, session_id: str, content: bytes, start: int, end: int):
+    return client.put(
+        f"/api/v1/upload/sessions/{session_id}",
+        content=content[start:end],
+        headers={"Content-Range": f"bytes {start}-{end - 1}/{len(content)}"}
+    )
+
+def _forget_hash_state(session_id: str):
+    """Simula a próxima requisição chegando a outro worker"""
+    UploadSessionManager._hashers.pop(session_id, None)
+    UploadSessionManager._hashed_offsets.pop(session_id, None)
+
+def test_chunks_resume_and_finalize(client, make_pdf):
+    with open(make_pdf(pages=20), "rb") as f:
+        content = f.read()
+    session_id = _create(client, content)
+    middle = len(content) // 2
+
+    assert _put(client, session_id, content, 0, middle).json()["offset"] == middle
+    # Bloco repetido ou fora de ordem
+    assert _put(client, session_id, content, 0, middle).status_code == 409
+    assert client.get(f"/api/v1/upload/sessions/{session_id}").json()["offset"] == middle
+
+    status = _put(client, session_id, content, middle, len(content)).json()
+    assert status["complete"]
+
+    result = client.post(f"/api/v1/upload/sessions/{session_id}/complete")
+    assert result.status_code == 200, result.text
+    file_id = result.json()["file_id"]
+    assert ContentStore.get_hash(file_id) == hashlib.sha256(content).hexdigest()
+    assert client.get(f"/api/v1/upload/sessions/{session_id}").status_code == 404
+
+def test_last_chunk_persists_digest_for_any_worker(client, make_pdf, monkeypatch):
+    with open(make_pdf(pages=5), "rb") as f:
+        content = f.read()
+    session_id = _create(client, content)
+    middle = len(content) // 2
+    _put(client, session_id, content, 0, middle)
+
+    # Segundo bloco em outro worker: o prefixo é recalculado fora do loop de eventos
+    _forget_hash_state(session_id)
+    _put(client, session_id, content, middle, len(content))
+    with open(UploadSessionManager._meta_path(session_id)) as f:
+        assert json.load(f)["sha256"] == hashlib.sha256(content).hexdigest()
+
+    # Finalização em um terceiro worker não relê o arquivo
+    _forget_hash_state(session_id)
+    monkeypatch.setattr(UploadSessionManager, "_get_hasher", lambda *args: pytest.fail("rehash na finalização"))
+    result = client.post(f"/api/v1/upload/sessions/{session_id}/complete")
+    assert result.status_code == 200, result.text
+    assert ContentStore.get_hash(result.json()["file_id"]) == hashlib.sha256(content).hexdigest()
+
+def test_request_in_progress_on_other_worker_is_rejected(client):
+    content = b"%PDF-1.4 " + b"x" * 100
+    session_id = _create(client, content)
+
+    # A trava é de arquivo (flock): vale também entre processos
+    with UploadSessionManager._file_lock(session_id):
+        assert _put(client, session_id, content, 0, 10).status_code == 409
+        assert client.post(f"/api/v1/upload/sessions/{session_id}/complete").status_code == 409
+
+    assert _put(client, session_id, content, 0, 10).json()["offset"] == 10
+
+def test_incomplete_session_cannot_finalize(client):
+    content = b"%PDF-1.4 " + b"y" * 100
+    session_id = _create(client, content)
+    _put(client, session_id, content, 0, 50)
+
+    assert client.post(f"/api/v1/upload/sessions/{session_id}/complete").status_code == 409
+    assert _put(client, session_id, content, 50, len(content)).json()["complete"]
@@ -0,0 +1,38 @@
+import io
+import zipfile
+import fitz
+from app.utils.zip_stream import ZipStreamer
+from tests.conftest import upload
+
+def test_stream_yields_valid_archive_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.config.settings.UPLOAD_CHUNK_SIZE", 64)
+    paths = []
+    for name, data in [("a.pdf", b"%PDF-a" * 50), ("b.png", b"\x89PNG" * 10)]:
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+
+    chunks = list(ZipStreamer.stream(ZipStreamer.entries_for(paths)))
+
+    assert len(chunks) > 2  # Bytes enviados durante a leitura, não no fim
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["001_a.pdf", "002_b.png"]
+        assert archive.read("001_a.pdf") == b"%PDF-a" * 50
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+
+def test_split_bundle_returns_every_part(client, make_pdf):
+    file_id = upload(client, make_pdf(pages=5))["file_id"]
+
+    response = client.post(
+        "/api/v1/split/page-range", params={"bundle": True},
+        json={"file_id": file_id, "method": "page_range", "parameters": {"ranges": ["1-2", "3-5"]}}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = archive.namelist()
+        assert [name[:4] for name in names] == ["001_", "002_"]
+        page_counts = [fitz.open(stream=archive.read(name), filetype="pdf").page_count for name in names]
+    assert page_counts == [2, 3]